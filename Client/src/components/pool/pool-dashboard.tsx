@@ -15,7 +15,7 @@ import {
 	DialogDescription,
 } from "@/components/ui/dialog";
 import { Tabs, TabsContent, TabsList, TabsTrigger } from "@/components/ui/tabs";
-import type { Pool, PoolMembers } from "@/types/pool";
+import type { Pool } from "@/types/pool";
 import { PoolCard } from "@/components/pool/pool-card";
 import { PoolDetails } from "@/components/pool/pool-details";
 import { FilterSidebar } from "@/components/pool/filter-sidebar";
@@ -40,19 +40,58 @@ export default function PoolDashboard() {
 	const [isFilterOpen, setIsFilterOpen] = useState(false);
 	const [isCreatePoolOpen, setIsCreatePoolOpen] = useState(false);
 	const [pools, setPools] = useState<Pool[]>([]);
+	const [nextPoolsLink, setNextPoolsLink] = useState<string | null>(null);
+	const [isLoadingMore, setIsLoadingMore] = useState(false);
+	const [myPools, setMyPools] = useState<Pool[]>([]);
+	const [joinedPools, setJoinedPools] = useState<Pool[]>([]);
 	const [isLoading, setIsLoading] = useState(true);
 	const [currentUser, setCurrentUser] =
 		useState<CurrentUserDetailsProps | null>(null);
 	const { toast } = useToast();
 	const router = useRouter();
 
+	// "My Pools" and "Joined by Me" come from /pools/mine/ rather than filtering the full list
+	const refreshMyPools = useCallback(async () => {
+		const [created, joined] = await Promise.all([
+			poolApi.getAllMyPools("created"),
+			poolApi.getAllMyPools("joined"),
+		]);
+		setMyPools(created);
+		setJoinedPools(joined);
+	}, []);
+
+	// "All Pools" starts from the first page; further pages are fetched on demand
+	const loadFirstPoolsPage = useCallback(async () => {
+		const page = await poolApi.getPoolsPage();
+		setPools(page.results);
+		setNextPoolsLink(page.next);
+	}, []);
+
+	const loadMorePools = useCallback(async () => {
+		if (!nextPoolsLink) return;
+		try {
+			setIsLoadingMore(true);
+			const page = await poolApi.getPoolsPage(nextPoolsLink);
+			setPools((current) => [...current, ...page.results]);
+			setNextPoolsLink(page.next);
+		} catch (error) {
+			console.error("Error fetching more pools:", error);
+			toast({
+				title: "Pool Data Fetch Failed",
+				description: error instanceof Error ? error.message : String(error),
+				variant: "destructive",
+			});
+		} finally {
+			setIsLoadingMore(false);
+		}
+	}, [nextPoolsLink, toast]);
+
 	// Load pool data on component mount
 	useEffect(() => {
 		async function fetchPools() {
 			try {
 				setIsLoading(true);
-				const poolData = await poolApi.getAllPools();
-				setPools(poolData);
+				await Promise.all([loadFirstPoolsPage(), refreshMyPools()]);
 			} catch (error) {
 				console.error("Error fetching pools:", error);
 				toast({
@@ -89,7 +128,7 @@ export default function PoolDashboard() {
 
 		fetchPools();
 		fetchUserDetails();
-	}, [toast, router]);
+	}, [toast, router, refreshMyPools, loadFirstPoolsPage]);
 
 	// Failsafe effect to check and fetch user details if needed
 	useEffect(() => {
@@ -135,32 +174,6 @@ export default function PoolDashboard() {
 		ensureUserInState();
 	}, [currentUser]);
 
-	const myPools = useMemo(() => {
-		if (!currentUser) return [];
-
-		return pools.filter(
-			(pool: Pool) => pool.created_by?.email === currentUser.email,
-		);
-	}, [pools, currentUser]);
-
-	const joinedPools = useMemo(() => {
-		if (!currentUser) return [];
-
-		return pools.filter((pool: Pool) => {
-			// Check if the current user exists in the members array
-			return (
-				pool.members?.some(
-					(member: PoolMembers) =>
-						// Compare by full_name or email if available
-						member.full_name === currentUser.full_name ||
-						// Also check if the pool creator matches (in case they're also a member)
-						(pool.created_by?.email === currentUser.email &&
-							member.is_creator),
-				) && pool.created_by?.email !== currentUser.email
-			); // Exclude pools created by the user (those are in "My Pools")
-		});
-	}, [pools, currentUser]);
-
 	// Dynamically extract unique values from the current pool data
 	const dynamicFilterOptions = useMemo(() => {
 		if (!pools.length)
@@ -264,8 +277,7 @@ export default function PoolDashboard() {
 			);
 			await poolApi.createPool(data);
 			// Refresh pools after creating a new one
-			const updatedPools = await poolApi.getAllPools();
-			setPools(updatedPools);
+			await Promise.all([loadFirstPoolsPage(), refreshMyPools()]);
 			setIsCreatePoolOpen(false);
 
 			return true;
@@ -292,8 +304,7 @@ export default function PoolDashboard() {
 	// Handle pool update
 	const handlePoolUpdated = useCallback(async () => {
 		try {
-			const updatedPools = await poolApi.getAllPools();
-			setPools(updatedPools);
+			await Promise.all([loadFirstPoolsPage(), refreshMyPools()]);
 			toast({
 				title: "Success",
 				description: "Pool list refreshed with latest data",
@@ -306,7 +317,7 @@ export default function PoolDashboard() {
 				variant: "destructive",
 			});
 		}
-	}, [toast]);
+	}, [toast, refreshMyPools, loadFirstPoolsPage]);
 
 	const container = {
 		hidden: { opacity: 0 },
@@ -412,33 +423,46 @@ export default function PoolDashboard() {
 								<div className="h-10 w-10 border-4 border-primary/30 border-t-primary rounded-full animate-spin"></div>
 							</div>
 						) : (
-							<motion.div
-								className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 gap-3 sm:gap-4"
-								variants={container}
-								initial="hidden"
-								animate="show"
-							>
-								{filteredPools.length > 0 ? (
-									filteredPools.map((pool) => (
+							<>
+								<motion.div
+									className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 gap-3 sm:gap-4"
+									variants={container}
+									initial="hidden"
+									animate="show"
+								>
+									{filteredPools.length > 0 ? (
+										filteredPools.map((pool) => (
+											<motion.div
+												key={pool.id}
+												variants={item}
+											>
+												<PoolCard
+													pool={pool}
+													onClick={() => handlePoolSelect(pool)}
+												/>
+											</motion.div>
+										))
+									) : (
 										<motion.div
-											key={pool.id}
+											className="col-span-full text-center py-10 text-muted-foreground"
 											variants={item}
 										>
-											<PoolCard
-												pool={pool}
-												onClick={() => handlePoolSelect(pool)}
-											/>
+											No pools match your search criteria
 										</motion.div>
-									))
-								) : (
-									<motion.div
-										className="col-span-full text-center py-10 text-muted-foreground"
-										variants={item}
-									>
-										No pools match your search criteria
-									</motion.div>
+									)}
+								</motion.div>
+								{nextPoolsLink && (
+									<div className="flex justify-center mt-6">
+										<Button
+											variant="outline"
+											onClick={loadMorePools}
+											disabled={isLoadingMore}
+										>
+											{isLoadingMore ? "Loading..." : "Load more pools"}
+										</Button>
+									</div>
 								)}
-							</motion.div>
+							</>
 						)}
 					</TabsContent>
 					<TabsContent value="my">
@@ -1,5 +1,5 @@
 import { toast } from "@/hooks/use-toast";
-import type { Pool } from "@/types/pool";
+import type { Pool, PoolFacets, PoolSync, PoolTemplate } from "@/types/pool";
 import type { CreatePoolFormValues } from "@/schemas/schema";
 
 const API_BASE_URL = "https://api.thapargo.com";
@@ -56,15 +56,105 @@ async function apiRequest<T>(
 	}
 }
 
+/**
+ * Cursor-paginated list response returned by the pools endpoint
+ */
+export interface CursorPage<T> {
+	next: string | null;
+	previous: string | null;
+	results: T[];
+}
+
+/**
+ * Strip the API origin from a pagination link so it can go through apiRequest
+ */
+const toEndpoint = (link: string): string => {
+	const url = new URL(link);
+	return `${url.pathname}${url.search}`;
+};
+
 /**
  * Pool API Service
  */
 export const poolApi = {
 	/**
-	 * Get all pools
+	 * Get a single page of pools, starting from a `next`/`previous` link
+	 */
+	getPoolsPage: async (link?: string | null): Promise<CursorPage<Pool>> => {
+		return apiRequest<CursorPage<Pool>>(
+			link ? toEndpoint(link) : "/pools/",
+			{},
+			"Failed to fetch pools",
+		);
+	},
+
+	/**
+	 * Get a page of the pools the current user created or joined
+	 */
+	getMyPoolsPage: async (
+		params: { when?: "upcoming" | "past"; role?: "created" | "joined" } = {},
+		link?: string | null,
+	): Promise<CursorPage<Pool>> => {
+		const query = new URLSearchParams(
+			Object.entries(params).filter(([, value]) => value !== undefined),
+		).toString();
+		return apiRequest<CursorPage<Pool>>(
+			link ? toEndpoint(link) : `/pools/mine/${query ? `?${query}` : ""}`,
+			{},
+			"Failed to fetch your pools",
+		);
+	},
+
+	/**
+	 * Get all of the current user's upcoming pools in one role
+	 */
+	getAllMyPools: async (role: "created" | "joined"): Promise<Pool[]> => {
+		const pools: Pool[] = [];
+		let link: string | null = null;
+		do {
+			const page: CursorPage<Pool> = await poolApi.getMyPoolsPage({ role }, link);
+			pools.push(...page.results);
+			link = page.next;
+		} while (link);
+		return pools;
+	},
+
+	/**
+	 * Get a page of the current user's archived (finished) rides
+	 */
+	getPoolHistory: async (link?: string | null): Promise<CursorPage<Pool>> => {
+		return apiRequest<CursorPage<Pool>>(
+			link ? toEndpoint(link) : "/pools/history/?ordering=-departure_time",
+			{},
+			"Failed to fetch ride history",
+		);
+	},
+
+	/**
+	 * Get filter sidebar options (distinct values with counts, fare range)
+	 */
+	getPoolFacets: async (
+		params: Record<string, string> = {},
+	): Promise<PoolFacets> => {
+		const query = new URLSearchParams(params).toString();
+		return apiRequest<PoolFacets>(
+			`/pools/facets/${query ? `?${query}` : ""}`,
+			{},
+			"Failed to fetch filter options",
+		);
+	},
+
+	/**
+	 * Get pools changed since a previous sync cursor (full snapshot when omitted).
+	 * On `reset`, drop the local list and call again without a cursor.
 	 */
-	getAllPools: async (): Promise<Pool[]> => {
-		return apiRequest<Pool[]>("/pools/", {}, "Failed to fetch pools");
+	syncPools: async (cursor?: string | null): Promise<PoolSync> => {
+		const query = cursor ? `?since=${encodeURIComponent(cursor)}` : "";
+		return apiRequest<PoolSync>(
+			`/pools/sync/${query}`,
+			{},
+			"Failed to refresh pools",
+		);
 	},
 
 	/**
@@ -92,6 +182,49 @@ export const poolApi = {
 		);
 	},
 
+	/**
+	 * Create several pools in one request; none are created if any is invalid
+	 */
+	createPoolsBulk: async (
+		pools: CreatePoolFormValues[],
+	): Promise<{ created: number[] }> => {
+		return apiRequest<{ created: number[] }>(
+			"/pools/bulk/",
+			{
+				method: "POST",
+				body: JSON.stringify(pools),
+			},
+			"Failed to create pools",
+		);
+	},
+
+	/**
+	 * Get the current user's recurring pool templates
+	 */
+	getPoolTemplates: async (): Promise<PoolTemplate[]> => {
+		return apiRequest<PoolTemplate[]>(
+			"/pool-templates/",
+			{},
+			"Failed to fetch recurring pools",
+		);
+	},
+
+	/**
+	 * Create a recurring pool; its pools for the coming days are created right away
+	 */
+	createPoolTemplate: async (
+		template: Omit<PoolTemplate, "id" | "generated_until">,
+	): Promise<PoolTemplate> => {
+		return apiRequest<PoolTemplate>(
+			"/pool-templates/",
+			{
+				method: "POST",
+				body: JSON.stringify(template),
+			},
+			"Failed to create recurring pool",
+		);
+	},
+
 	/**
 	 * Update a pool (full update)
 	 */
@@ -138,4 +271,136 @@ export const poolApi = {
 			"Failed to join pool",
 		);
 	},
+
+	/**
+	 * Leave a pool; the seat goes to the first user on its waitlist
+	 */
+	leavePool: async (id: string | number): Promise<{ detail: string }> => {
+		return apiRequest<{ detail: string }>(
+			`/pools/${id}/leave/`,
+			{
+				method: "POST",
+			},
+			"Failed to leave pool",
+		);
+	},
+
+	/**
+	 * Take a free seat, or queue for the next one when the pool is full.
+	 * `position` is set when queued.
+	 */
+	joinWaitlist: async (
+		id: string | number,
+	): Promise<{ detail: string; position?: number }> => {
+		return apiRequest<{ detail: string; position?: number }>(
+			`/pools/${id}/waitlist/`,
+			{
+				method: "POST",
+			},
+			"Failed to join waitlist",
+		);
+	},
+
+	/**
+	 * The current user's place in a pool's waitlist (null when not waiting)
+	 */
+	getWaitlistPosition: async (
+		id: string | number,
+	): Promise<{ position: number | null }> => {
+		return apiRequest<{ position: number | null }>(
+			`/pools/${id}/waitlist/`,
+			{},
+			"Failed to fetch waitlist position",
+		);
+	},
+
+	/**
+	 * Leave a pool's waitlist
+	 */
+	leaveWaitlist: async (id: string | number): Promise<{ detail: string }> => {
+		return apiRequest<{ detail: string }>(
+			`/pools/${id}/waitlist/`,
+			{
+				method: "DELETE",
+			},
+			"Failed to leave waitlist",
+		);
+	},
 };
+
+export type PoolEventType =
+	| "pool.created"
+	| "pool.updated"
+	| "pool.joined"
+	| "pool.left";
+
+// Wait before reopening a dropped event stream (the server's "retry:" interval)
+const POOL_EVENTS_RETRY_MS = 15000;
+
+/**
+ * Subscribe to realtime pool events. Filters narrow the stream server-side
+ * (start_point, end_point, transport_mode, is_female_only).
+ * A "resync" event means the client fell behind and should refetch.
+ * Returns a function that closes the stream.
+ *
+ * The stream is opened with a short-lived ticket rather than the access token,
+ * since the URL ends up in server logs. Tickets expire, so the browser's own
+ * reconnect is replaced by reopening with a fresh ticket.
+ */
+export function subscribeToPoolEvents(
+	onEvent: (type: PoolEventType | "resync", pool?: Pool) => void,
+	filters: Record<string, string> = {},
+): () => void {
+	let source: EventSource | null = null;
+	let retry: ReturnType<typeof setTimeout> | null = null;
+	let closed = false;
+
+	const eventTypes: (PoolEventType | "resync")[] = [
+		"pool.created",
+		"pool.updated",
+		"pool.joined",
+		"pool.left",
+		"resync",
+	];
+
+	const reopenLater = () => {
+		if (!closed) retry = setTimeout(open, POOL_EVENTS_RETRY_MS);
+	};
+
+	async function open() {
+		let ticket: string;
+		try {
+			({ ticket } = await apiRequest<{ ticket: string }>(
+				"/pools/events/ticket/",
+				{ method: "POST" },
+				"Failed to open pool events",
+			));
+		} catch {
+			reopenLater();
+			return;
+		}
+		if (closed) return;
+
+		const query = new URLSearchParams({ ...filters, ticket });
+		source = new EventSource(`${API_BASE_URL}/pools/events/?${query}`);
+		for (const type of eventTypes) {
+			source.addEventListener(type, (event) => {
+				const data = JSON.parse((event as MessageEvent).data);
+				onEvent(type, data.pool);
+			});
+		}
+		source.onerror = () => {
+			source?.close();
+			source = null;
+			reopenLater();
+		};
+	}
+
+	open();
+
+	return () => {
+		closed = true;
+		if (retry) clearTimeout(retry);
+		source?.close();
+	};
+}
@@ -39,6 +39,48 @@ export interface Pool {
 	femaleOnly?: boolean; // Keep for backward compatibility
 }
 
+export interface FacetCount {
+	value: string;
+	count: number;
+}
+
+export interface PoolFacets {
+	total: number;
+	female_only: number;
+	start_points: FacetCount[];
+	end_points: FacetCount[];
+	transport_modes: FacetCount[];
+	fare: { min: number | null; max: number | null };
+}
+
+export interface PoolSync {
+	cursor: string;
+	reset: boolean;
+	changed: Pool[];
+	removed: number[];
+}
+
+export type Weekday = "Mon" | "Tue" | "Wed" | "Thu" | "Fri" | "Sat" | "Sun";
+
+// A pool that repeats on the given weekdays; times are local wall-clock times ("08:30").
+export interface PoolTemplate {
+	id: number;
+	start_point: string;
+	end_point: string;
+	departure_time: string;
+	arrival_time: string;
+	weekdays: Weekday[];
+	transport_mode: string;
+	total_persons: number;
+	fare_per_head: string | null;
+	description: string | null;
+	is_female_only: boolean;
+	starts_on: string;
+	ends_on: string | null;
+	active: boolean;
+	generated_until: string | null;
+}
+
 export interface FilterState {
 	searchQuery: string;
 	femaleOnlyFilter: boolean | null;
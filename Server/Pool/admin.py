@@ -1,5 +1,9 @@
 from django.contrib import admin
-from .models import Pool, PoolMember
+from .models import Pool, PoolMember, ArchivedPool, ArchivedPoolMember, PoolTemplate, Location
 
 admin.site.register(Pool)
 admin.site.register(PoolMember)
+admin.site.register(ArchivedPool)
+admin.site.register(ArchivedPoolMember)
+admin.site.register(PoolTemplate)
+admin.site.register(Location)
@@ -0,0 +1,207 @@
+"""
+Test data and timing helpers shared by seed_data, load_test and the
+benchmark commands, so that every load test and benchmark runs against the
+same kind of data.
+
+Seeder bulk-loads users, pools and memberships with realistic distributions:
+most rides leave campus for the station, bus stand or Chandigarh, in the
+evenings and around weekends, a few users create most pools, and seats are
+partly taken (female-only pools by female users only). Counts are targets,
+so seeding again only tops the data up. Every seeded user has an email
+ending SEED_DOMAIN; clear_seeded() removes them with their pools.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from authentication.models import CustomUser
+from Pool.cache import bump_version
+from Pool.models import Location, Pool, PoolMember, attach_locations
+
+SEED_DOMAIN = '@seed.thapar.edu'
+
+FIRST_NAMES = [
+    'Aarav', 'Aditi', 'Akshay', 'Ananya', 'Arjun', 'Diya', 'Gurpreet', 'Harleen', 'Ishaan', 'Jasleen', 'Karan',
+    'Kavya', 'Manpreet', 'Meera', 'Nikhil', 'Pooja', 'Rahul', 'Riya', 'Rohan', 'Simran', 'Tanvi', 'Varun',
+]
+LAST_NAMES = [
+    'Sharma', 'Singh', 'Gupta', 'Kaur', 'Verma', 'Bansal', 'Garg', 'Mehta', 'Sidhu', 'Arora', 'Jain', 'Malhotra',
+]
+GENDERS = {'Male': 68, 'Female': 30, 'Others': 2}
+
+ORIGIN = 'Thapar University'
+# (place, share of rides, latitude, longitude)
+PLACES = [
+    ('Patiala Railway Station', 16, 30.3339, 76.3997),
+    ('Patiala Bus Stand', 14, 30.3398, 76.3932),
+    ('Chandigarh ISBT 43', 12, 30.7185, 76.7524),
+    ('Chandigarh Airport', 8, 30.6735, 76.7885),
+    ('Rajpura Junction', 7, 30.4805, 76.5946),
+    ('Ambala Cantt', 6, 30.3378, 76.8266),
+    ('Delhi Airport T3', 6, 28.5562, 77.1000),
+    ('Omaxe Mall', 6, 30.3187, 76.3931),
+    ('Leela Bhawan', 5, 30.3368, 76.3856),
+    ('Fountain Chowk', 4, 30.3331, 76.3939),
+    ('Punjabi University', 4, 30.3569, 76.4518),
+    ('Rajindra Hospital', 3, 30.3380, 76.3766),
+    ('Ludhiana Railway Station', 3, 30.9121, 75.8498),
+    ('Sirhind', 2, 30.6431, 76.3847),
+    ('Bathinda', 2, 30.2110, 74.9455),
+    ('Baradari Gardens', 2, 30.3437, 76.3966),
+]
+ORIGIN_COORDINATES = (30.3564, 76.3647)
+# mode: (share of rides, seat counts to pick from, fare range, ride minutes)
+MODES = {
+    'Cab': (55, [4, 4, 4, 6, 7], (60, 450), (20, 300)),
+    'Auto': (30, [3, 3, 4], (20, 80), (10, 40)),
+    'Bus': (10, [2, 3, 4, 5, 6], (30, 250), (30, 300)),
+    'Train': (5, [2, 3, 4], (40, 300), (60, 300)),
+}
+# Departures by hour of day: a morning bump, a long evening peak, little overnight.
+HOUR_WEIGHTS = [1, 1, 1, 1, 2, 4, 8, 10, 9, 7, 6, 6, 7, 7, 8, 10, 14, 18, 20, 16, 11, 6, 3, 2]
+# Monday first; Friday and Sunday evenings are when students travel home and back.
+WEEKDAY_WEIGHTS = [8, 7, 7, 8, 14, 11, 13]
+
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def seeded_users():
+    return CustomUser.objects.filter(email__endswith=SEED_DOMAIN)
+
+
+def clear_seeded():
+    """Delete every seeded user with their pools and memberships; returns the rows deleted."""
+    deleted, _ = seeded_users().delete()
+    bump_version()
+    return deleted
+
+
+class Seeder:
+    """Rows are written with batched bulk inserts, one transaction per batch."""
+
+    def __init__(self, seed=1, batch_size=5000, stdout=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.stdout = stdout  # a command's stdout, for progress lines
+
+    def seed(self, users, pools, days):
+        """
+        Top the seeded users up to `users` and their pools up to `pools`, departing over
+        the next `days` days. Returns ((id, gender) of every seeded user, new pools, new memberships).
+        """
+        self.seed_places()
+        seeded = self.seed_users(users)
+        if not seeded and pools:
+            raise ValueError('There are no seeded users to create pools for.')
+        created, joined = self.seed_pools(seeded, pools, days)
+        bump_version()
+        return seeded, created, joined
+
+    def seed_places(self):
+        coordinates = {ORIGIN: ORIGIN_COORDINATES, **{place: (lat, lng) for place, _, lat, lng in PLACES}}
+        for location in Location.for_names(coordinates).values():
+            location.fill_coordinates(*coordinates[location.name])
+
+    def seed_users(self, count):
+        """Top the seeded users up to `count`; returns (id, gender) for all of them."""
+        rng, batch_size = self.rng, self.batch_size
+        existing = seeded_users().count()
+        # Seeded users only exist to be acted as through tokens; none of them can log in.
+        password = make_password(None)
+        genders, weights = list(GENDERS), list(GENDERS.values())
+        for offset in range(existing, count, batch_size):
+            numbers = range(offset, min(offset + batch_size, count))
+            picked = rng.choices(genders, weights, k=len(numbers))
+            CustomUser.objects.bulk_create([
+                CustomUser(
+                    email=f'user{n}{SEED_DOMAIN}',
+                    full_name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                    phone_number=f'6{n:09d}',
+                    gender=gender,
+                    password=password,
+                    google_authenticated=True,
+                )
+                for n, gender in zip(numbers, picked)
+            ])
+            self.progress('users', numbers[-1] + 1, count)
+        return list(seeded_users().order_by('id').values_list('id', 'gender'))
+
+    def seed_pools(self, users, count, days):
+        """Top the seeded pools up to `count`; returns (new pools, new memberships)."""
+        rng, batch_size = self.rng, self.batch_size
+        missing = count - Pool.objects.filter(created_by__email__endswith=SEED_DOMAIN).count()
+        females = [user_id for user_id, gender in users if gender == 'Female']
+        places, place_weights = [place for place, *_ in PLACES], [weight for _, weight, *_ in PLACES]
+        modes, mode_weights = list(MODES), [mode[0] for mode in MODES.values()]
+        today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        day_weights = [WEEKDAY_WEIGHTS[(today + timedelta(days=day)).weekday()] for day in range(days)]
+        now = timezone.now()
+
+        created = joined = 0
+        while created < missing:
+            size = min(batch_size, missing - created)
+            pools, joiners = [], []
+            for day, hour, mode, place in zip(
+                rng.choices(range(days), day_weights, k=size),
+                rng.choices(range(24), HOUR_WEIGHTS, k=size),
+                rng.choices(modes, mode_weights, k=size),
+                rng.choices(places, place_weights, k=size),
+            ):
+                _, seats, fares, minutes = MODES[mode]
+                departure = today + timedelta(days=day, hours=hour, minutes=rng.randrange(0, 60, 5))
+                if departure < now:
+                    departure += timedelta(days=days)
+                # Squaring skews towards the first users, so a few create most of the pools.
+                creator_id, gender = users[int(len(users) * rng.random() ** 2)]
+                female_only = gender == 'Female' and rng.random() < 0.35
+                candidates = females if female_only else users
+                total = rng.choice(seats)
+                wanted = min(rng.randint(0, total - 1), len(candidates) - 1)
+                # Rides going soon have filled up more than those days away.
+                if day > 2:
+                    wanted = rng.randint(0, wanted)
+                riders = set()
+                while len(riders) < wanted:
+                    rider = rng.choice(candidates)
+                    rider_id = rider if female_only else rider[0]
+                    if rider_id != creator_id:
+                        riders.add(rider_id)
+                # Half the rides go to campus rather than leave it.
+                start, end = (ORIGIN, place) if rng.random() < 0.5 else (place, ORIGIN)
+                pools.append(Pool(
+                    start_point=start,
+                    end_point=end,
+                    departure_time=departure,
+                    arrival_time=departure + timedelta(minutes=rng.randint(*minutes)),
+                    transport_mode=mode,
+                    total_persons=total,
+                    current_persons=1 + len(riders),
+                    fare_per_head=Decimal(rng.randrange(fares[0], fares[1], 10)) if rng.random() < 0.8 else None,
+                    is_female_only=female_only,
+                    created_by_id=creator_id,
+                ))
+                joiners.append(riders)
+
+            attach_locations(pools)
+            with transaction.atomic():
+                pools = Pool.objects.bulk_create(pools)
+                members = [PoolMember(pool=pool, user_id=pool.created_by_id, is_creator=True) for pool in pools]
+                members += [PoolMember(pool=pool, user_id=rider) for pool, riders in zip(pools, joiners) for rider in riders]
+                PoolMember.objects.bulk_create(members, batch_size=batch_size)
+            created += len(pools)
+            joined += len(members)
+            self.progress('pools', created, missing)
+        return created, joined
+
+    def progress(self, what, done, total):
+        if self.stdout is not None:
+            self.stdout.write(f"Seeding {what}: {done}/{total}", ending='\n' if done >= total else '\r')
+            self.stdout.flush()
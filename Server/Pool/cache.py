@@ -0,0 +1,119 @@
+import functools
+import hashlib
+import time
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+VERSION_KEY = 'pools:version'
+HITS_KEY = 'pools:cache:hits'
+MISSES_KEY = 'pools:cache:misses'
+
+
+def pool_cache():
+    return caches[settings.POOL_CACHE_ALIAS]
+
+
+def _incr(key, initial):
+    cache = pool_cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Missing (first use or evicted): start over. add() keeps a racing writer's value.
+        cache.add(key, initial, timeout=None)
+        return cache.get(key, initial)
+
+
+async def _aincr(key, initial):
+    cache = pool_cache()
+    try:
+        return await cache.aincr(key)
+    except ValueError:
+        await cache.aadd(key, initial, timeout=None)
+        return await cache.aget(key, initial)
+
+
+def get_version():
+    version = pool_cache().get(VERSION_KEY)
+    if version is None:
+        # Seed from the clock so an evicted counter never comes back at a version
+        # that still has entries cached under it.
+        pool_cache().add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = pool_cache().get(VERSION_KEY)
+    return version
+
+
+async def aget_version():
+    version = await pool_cache().aget(VERSION_KEY)
+    if version is None:
+        await pool_cache().aadd(VERSION_KEY, time.time_ns(), timeout=None)
+        version = await pool_cache().aget(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    # Called from every pool write path. Deferred to commit so a concurrent
+    # reader cannot re-cache the old rows under the new version.
+    transaction.on_commit(lambda: _incr(VERSION_KEY, time.time_ns()))
+
+
+def cache_stats():
+    cache = pool_cache()
+    return {'hits': cache.get(HITS_KEY, 0), 'misses': cache.get(MISSES_KEY, 0)}
+
+
+def normalized_query(request):
+    # So that ?a=1&b=2 and ?b=2&a=1 are treated as the same request.
+    return sorted((key, sorted(values)) for key, values in request.query_params.lists())
+
+
+def response_cache_key(request, view, version):
+    raw = repr((request.get_host(), view.action, sorted(view.kwargs.items()), normalized_query(request)))
+    return f'pools:{version}:{hashlib.sha256(raw.encode()).hexdigest()}'
+
+
+def cache_response(handler):
+    """
+    Cache a successful viewset read (list/retrieve) under the current pool version.
+
+    Permission checks still run on every request since they happen before the
+    handler is called; only the queries and serialization are skipped on a hit.
+    Works on async handlers too, through the cache's async methods.
+    """
+    if iscoroutinefunction(handler):
+        @functools.wraps(handler)
+        async def async_wrapper(view, request, *args, **kwargs):
+            cache = pool_cache()
+            key = response_cache_key(request, view, await aget_version())
+            data = await cache.aget(key)
+            if data is not None:
+                await _aincr(HITS_KEY, 1)
+                return Response(data, headers={'X-Cache': 'HIT'})
+
+            await _aincr(MISSES_KEY, 1)
+            response = await handler(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                await cache.aset(key, response.data, timeout=settings.POOL_CACHE_TIMEOUT)
+            response['X-Cache'] = 'MISS'
+            return response
+        return async_wrapper
+
+    @functools.wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        cache = pool_cache()
+        key = response_cache_key(request, view, get_version())
+        data = cache.get(key)
+        if data is not None:
+            _incr(HITS_KEY, 1)
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        _incr(MISSES_KEY, 1)
+        response = handler(view, request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, timeout=settings.POOL_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
+    return wrapper
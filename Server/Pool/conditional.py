@@ -0,0 +1,114 @@
+import functools
+import hashlib
+
+from asgiref.sync import iscoroutinefunction
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .cache import normalized_query
+
+
+def _list_stats(view):
+    # One aggregate over the filtered pools: any create, edit, join or removal
+    # changes either the newest updated_at or the row count.
+    return view.filter_queryset(view.get_base_queryset()).order_by(), {
+        'last_modified': Max('updated_at'), 'count': Count('id'),
+    }
+
+
+def _list_etag(stats, request):
+    # ETag only: removing a pool (deleted, archived, departed) can leave Max(updated_at)
+    # where it was, so a Last-Modified would let If-Modified-Since answer a stale 304.
+    raw = repr((stats['last_modified'], stats['count'], normalized_query(request)))
+    return 'W/' + quote_etag(hashlib.sha256(raw.encode()).hexdigest()), None
+
+
+def list_validators(view, request):
+    queryset, aggregates = _list_stats(view)
+    return _list_etag(queryset.aggregate(**aggregates), request)
+
+
+async def alist_validators(view, request):
+    queryset, aggregates = _list_stats(view)
+    return _list_etag(await queryset.aaggregate(**aggregates), request)
+
+
+def _detail_lookup(view):
+    lookup = view.kwargs[view.lookup_url_kwarg or view.lookup_field]
+    try:
+        queryset = view.get_base_queryset().filter(**{view.lookup_field: lookup})
+    except (TypeError, ValueError, ValidationError):
+        # Not a valid id (/pools/abc/): no validators, so the handler answers 404.
+        return lookup, None
+    return lookup, queryset.values_list('updated_at', flat=True)
+
+
+def _detail_etag(lookup, last_modified):
+    if last_modified is None:
+        return None, None
+    return 'W/' + quote_etag(f'{lookup}-{last_modified.timestamp()}'), last_modified
+
+
+def detail_validators(view, request):
+    lookup, queryset = _detail_lookup(view)
+    return _detail_etag(lookup, queryset.first() if queryset is not None else None)
+
+
+async def adetail_validators(view, request):
+    lookup, queryset = _detail_lookup(view)
+    return _detail_etag(lookup, await queryset.afirst() if queryset is not None else None)
+
+
+def _not_modified(request, etag, last_modified):
+    return get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp()) if last_modified else None
+    )
+
+
+def _stamp(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Let browsers keep the body but revalidate on every use.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_response(validators):
+    """
+    Answer If-None-Match / If-Modified-Since with 304 before the handler runs,
+    and stamp ETag / Last-Modified on full responses. Async handlers take the
+    async validators (alist_validators / adetail_validators).
+    """
+    def decorator(handler):
+        if iscoroutinefunction(handler):
+            @functools.wraps(handler)
+            async def async_wrapper(view, request, *args, **kwargs):
+                etag, last_modified = await validators(view, request)
+                if etag is None:
+                    return await handler(view, request, *args, **kwargs)
+
+                response = _not_modified(request, etag, last_modified)
+                if response is None:
+                    response = await handler(view, request, *args, **kwargs)
+                    if response.status_code != 200:
+                        return response
+                return _stamp(response, etag, last_modified)
+            return async_wrapper
+
+        @functools.wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            etag, last_modified = validators(view, request)
+            if etag is None:
+                return handler(view, request, *args, **kwargs)
+
+            response = _not_modified(request, etag, last_modified)
+            if response is None:
+                response = handler(view, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            return _stamp(response, etag, last_modified)
+        return wrapper
+    return decorator
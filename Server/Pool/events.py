@@ -0,0 +1,127 @@
+import asyncio
+import itertools
+import json
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import Pool
+from .serializers import PoolSerializer
+
+# Query parameters a client can narrow its event stream with (exact match on the pool).
+EVENT_FILTER_FIELDS = ['start_point', 'end_point', 'transport_mode', 'is_female_only']
+KEEPALIVE_SECONDS = 15
+QUEUE_SIZE = 100
+
+
+def format_sse(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+
+class Subscription:
+    def __init__(self, broadcaster, filters):
+        self.broadcaster = broadcaster
+        self.filters = filters
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def matches(self, event):
+        pool = event['data'].get('pool') or {}
+        for field, wanted in self.filters.items():
+            value = pool.get(field)
+            if isinstance(value, bool):
+                value = str(value).lower()
+            if str(value) != wanted:
+                return False
+        return True
+
+    def deliver(self, event):
+        # Runs on the subscriber's event loop.
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A client this far behind is better off refetching than replaying.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({'id': event['id'], 'type': 'resync', 'data': {}})
+
+    async def stream(self):
+        try:
+            yield f"retry: {KEEPALIVE_SECONDS * 1000}\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(self.queue.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            self.broadcaster.unsubscribe(self)
+
+
+class InProcessBroadcaster:
+    """
+    Fans pool events out to the event streams held open by this process.
+
+    Each worker process only sees its own publishes; a deployment with several
+    workers swaps this for a shared pub/sub implementing the same
+    publish/subscribe/unsubscribe/has_subscribers methods via
+    settings.POOL_EVENTS_BROADCASTER.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+        self._ids = itertools.count(1)
+
+    def subscribe(self, filters):
+        subscription = Subscription(self, filters)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def has_subscribers(self):
+        return bool(self._subscriptions)
+
+    def publish(self, event_type, data):
+        # May be called from any thread (sync views run in a worker thread under ASGI).
+        event = {'id': next(self._ids), 'type': event_type, 'data': data}
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if subscription.matches(event) and not subscription.loop.is_closed():
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+
+
+_broadcaster = None
+
+
+def get_broadcaster():
+    global _broadcaster
+    if _broadcaster is None:
+        _broadcaster = import_string(settings.POOL_EVENTS_BROADCASTER)()
+    return _broadcaster
+
+
+def publish_pool_event(event_type, pool_id):
+    """Publish the pool's current state once the surrounding transaction commits."""
+    def publish():
+        broadcaster = get_broadcaster()
+        if not broadcaster.has_subscribers():
+            return
+        pool = (
+            Pool.objects.select_related('created_by')
+            .prefetch_related('members__user')
+            .filter(pk=pool_id)
+            .first()
+        )
+        if pool is not None:
+            broadcaster.publish(event_type, {'pool': PoolSerializer(pool).data})
+
+    transaction.on_commit(publish)
@@ -0,0 +1,92 @@
+"""
+Geohashes and distances for nearby-location queries, without PostGIS.
+
+A geohash names a lat/lng cell; every prefix of it names an enclosing cell, so
+the locations inside a cell are one range on an indexed geohash column.
+nearby_cells() picks the cell size for a radius and returns the few cells
+covering it; callers read those ranges and then drop the points that
+haversine_km() puts outside the radius.
+"""
+import math
+
+ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+PRECISION = 9  # ~5 m cells; what Location.geohash stores
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def encode(latitude, longitude, precision=PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        # Bits alternate between longitude and latitude, starting with longitude.
+        target, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        middle = (target[0] + target[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            target[0] = middle
+        else:
+            target[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(ALPHABET[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def cell_degrees(precision):
+    """(latitude, longitude) size in degrees of a cell at `precision`."""
+    bits = 5 * precision
+    return 180 / 2 ** (bits // 2), 360 / 2 ** ((bits + 1) // 2)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _steps(low, high, step):
+    value = low
+    while value < high:
+        yield value
+        value += step
+    yield high
+
+
+def nearby_cells(latitude, longitude, radius_km):
+    """
+    Geohash prefixes whose cells together cover every point within radius_km.
+    Uses the finest precision whose cells are at least radius_km across, so the
+    radius's bounding box touches at most 3x3 of them.
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    dlng = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+    precision = PRECISION
+    while precision > 1:
+        lat_size, lng_size = cell_degrees(precision)
+        if lat_size >= dlat and lng_size >= dlng:
+            break
+        precision -= 1
+    lat_size, lng_size = cell_degrees(precision)
+
+    south, north = max(latitude - dlat, -90.0), min(latitude + dlat, 90.0)
+    west, east = longitude - dlng, longitude + dlng
+    cells = set()
+    # Stepping by at most one cell visits every cell the bounding box overlaps.
+    for lat in _steps(south, north, lat_size):
+        for lng in _steps(west, east, lng_size):
+            cells.add(encode(lat, (lng + 180) % 360 - 180, precision))
+    return sorted(cells)
+
+
+def prefix_upper_bound(prefix):
+    """The smallest geohash after every geohash starting with `prefix`; None if there is none."""
+    while prefix:
+        last = ALPHABET.index(prefix[-1])
+        if last + 1 < len(ALPHABET):
+            return prefix[:-1] + ALPHABET[last + 1]
+        prefix = prefix[:-1]
+    return None
@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from Pool.cache import bump_version
+from Pool.models import Pool, PoolMember, ArchivedPool, ArchivedPoolMember
+
+
+def copy_rows_sql(source, target, key, count, extra_columns=()):
+    # INSERT INTO target (...) SELECT ... FROM source WHERE key IN (...), built from model metadata
+    # so the archive tables keep mirroring the hot ones column for column.
+    qn = connection.ops.quote_name
+    columns = [field.column for field in source._meta.concrete_fields]
+    target_columns = columns + [column for column, _ in extra_columns]
+    select_columns = [qn(column) for column in columns] + [placeholder for _, placeholder in extra_columns]
+    return (
+        f"INSERT INTO {qn(target._meta.db_table)} ({', '.join(qn(c) for c in target_columns)}) "
+        f"SELECT {', '.join(select_columns)} FROM {qn(source._meta.db_table)} "
+        f"WHERE {qn(key)} IN ({', '.join(['%s'] * count)})"
+    )
+
+
+class Command(BaseCommand):
+    help = "Move pools that have departed (and their members) into the archive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Pools moved per transaction.')
+        parser.add_argument('--grace-hours', type=int, default=0,
+                            help='Only archive pools that departed at least this many hours ago.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+
+        archived = 0
+        while True:
+            with transaction.atomic():
+                # Departure, not arrival: the list stops serving a pool once it has left, and
+                # `history` only reads the archive, so a ride in progress must be archived too.
+                # Lock the batch so a concurrent join or edit cannot slip in between copy and delete.
+                ids = list(
+                    Pool.objects.select_for_update()
+                    .filter(departure_time__lt=cutoff)
+                    .order_by('id')
+                    .values_list('id', flat=True)[:batch_size]
+                )
+                if not ids:
+                    break
+
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        copy_rows_sql(Pool, ArchivedPool, 'id', len(ids), extra_columns=[('archived_at', '%s')]),
+                        [timezone.now(), *ids],
+                    )
+                    cursor.execute(copy_rows_sql(PoolMember, ArchivedPoolMember, 'pool_id', len(ids)), ids)
+                PoolMember.objects.filter(pool_id__in=ids).delete()
+                Pool.objects.filter(id__in=ids).delete()
+                bump_version()
+
+            archived += len(ids)
+            self.stdout.write(f"Archived {archived} pools so far.")
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} pools."))
@@ -0,0 +1,93 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from authentication.models import CustomUser
+from Pool.benchmarking import PLACES, Seeder, clear_seeded, percentile
+from Pool.matching import match_pools
+from Pool.models import Pool
+
+DESTINATIONS = [place for place, *_ in PLACES]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time /pools/match/ against growing numbers of seeded pools (default 10k, 100k and 1M) spread "
+        "over --days of departures. Reports latency of the candidate query plus ranking, of the whole "
+        "endpoint, and how many candidate rows were ranked, which should stay flat as the table grows. "
+        "The data is seed_data's and is only topped up; --cleanup removes it (like seed_data --clear)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10000,100000,1000000',
+                            help='Comma-separated seeded pool counts, ascending; pools are added between sizes.')
+        parser.add_argument('--users', type=int, default=10000, help='Seeded users to have in total.')
+        parser.add_argument('--days', type=int, default=365, help='Departures are spread over this many days.')
+        parser.add_argument('--queries', type=int, default=200, help='Timed match queries per size.')
+        parser.add_argument('--window', type=int, default=30, help='Minutes either side of the wanted time.')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--cleanup', action='store_true', help='Delete the seeded data and exit.')
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            self.stdout.write(f"Deleted {clear_seeded()} rows.")
+            return
+        if options['users'] < 1 or options['days'] < 1:
+            raise CommandError('--users and --days must be positive.')
+
+        seeder = Seeder(options['seed'], stdout=self.stdout)
+        rng = seeder.rng
+        start = timezone.now() + timedelta(hours=1)
+        span = timedelta(days=options['days'])
+        window = timedelta(minutes=options['window'])
+        users, _, _ = seeder.seed(options['users'], 0, options['days'])
+        # A female user, so female-only pools are candidates too.
+        female = next((user_id for user_id, gender in users if gender == 'Female'), users[0][0])
+        client = APIClient()
+        client.force_authenticate(CustomUser.objects.get(pk=female))
+
+        self.stdout.write(
+            f"{'pools':>9}{'match p50 ms':>14}{'p99 ms':>9}{'endpoint p50 ms':>17}{'p99 ms':>9}"
+            f"{'queries':>9}{'candidates':>12}{'results':>9}"
+        )
+        for size in [int(size) for size in options['sizes'].split(',')]:
+            seeder.seed(options['users'], size, options['days'])
+            match_times, endpoint_times, candidates, results, query_counts = [], [], [], [], []
+            for _ in range(options['queries']):
+                at = start + span * rng.random()
+                destination = rng.choice(DESTINATIONS)
+
+                started = time.perf_counter()
+                matches = match_pools(Pool.objects.all(), at, window, destination=destination, female=True)
+                match_times.append(time.perf_counter() - started)
+                results.append(len(matches))
+                candidates.append(
+                    Pool.objects.filter(departure_time__gte=at - window, departure_time__lte=at + window).count()
+                )
+
+                started = time.perf_counter()
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get('/pools/match/', {
+                        'time': at.isoformat(), 'end_point': destination, 'window': options['window'],
+                    })
+                endpoint_times.append(time.perf_counter() - started)
+                query_counts.append(len(queries.captured_queries))
+                assert response.status_code == 200, response.content
+
+            self.stdout.write(
+                f"{size:>9}{percentile(match_times, 0.5) * 1000:>14.2f}{percentile(match_times, 0.99) * 1000:>9.2f}"
+                f"{percentile(endpoint_times, 0.5) * 1000:>17.2f}{percentile(endpoint_times, 0.99) * 1000:>9.2f}"
+                f"{statistics.mean(query_counts):>9.1f}{statistics.mean(candidates):>12.1f}{statistics.mean(results):>9.1f}"
+            )
+
+        at = start + span / 2
+        plan = Pool.objects.filter(
+            departure_time__gte=at - window, departure_time__lte=at + window
+        ).order_by('departure_time', 'id').values('id', 'departure_time', 'end_point').explain()
+        self.stdout.write(f"\nCandidate query plan:\n{plan}")
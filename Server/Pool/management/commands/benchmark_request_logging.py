@@ -0,0 +1,106 @@
+import logging
+import os
+import statistics
+import tempfile
+import time
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import resolve
+
+from Transport_Pool.log import BackgroundHandler, JsonFormatter
+from Transport_Pool.middlewares import LogRequestMiddleware
+
+MODES = ['off', 'sampled_out', 'queue', 'sync_file']
+
+
+def get_response(request):
+    return HttpResponse(b'{}', content_type='application/json')
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-request cost of LogRequestMiddleware in-process, around a view that does "
+        "nothing: without the middleware (off), with every request sampled out (metrics only), logging through the "
+        "queue-backed JSON handler, and logging straight to a rotating file as the old setup did."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000, help='Timed requests per mode.')
+        parser.add_argument('--warmup', type=int, default=1000)
+        parser.add_argument('--queue-size', type=int, default=settings.LOGGING['handlers']['queue']['queue_size'],
+                            help='Queue bound for the queue mode; records beyond it are dropped, not waited on.')
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/pools/', {'page_size': 20}, REMOTE_ADDR='10.0.0.1')
+        request.resolver_match = resolve('/pools/')
+        access_logger = logging.getLogger('api.access')
+        saved_handlers = access_logger.handlers[:]
+
+        self.stdout.write(f"{'mode':<12}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}{'overhead us':>13}{'written':>9}{'dropped':>9}")
+        baseline = None
+        with tempfile.TemporaryDirectory() as directory:
+            try:
+                for mode in MODES:
+                    handler, handle_request = self.setup(mode, directory, options)
+                    access_logger.handlers = [handler] if handler else []
+
+                    for _ in range(options['warmup']):
+                        handle_request(request)
+                    timings = []
+                    for _ in range(options['requests']):
+                        started = time.perf_counter_ns()
+                        handle_request(request)
+                        timings.append(time.perf_counter_ns() - started)
+
+                    written, dropped = self.teardown(mode, handler, directory)
+                    mean = statistics.fmean(timings) / 1000
+                    baseline = mean if baseline is None else baseline
+                    timings.sort()
+                    self.stdout.write(
+                        f"{mode:<12}{mean:>10.2f}{timings[len(timings) // 2] / 1000:>10.2f}"
+                        f"{timings[int(len(timings) * 0.99)] / 1000:>10.2f}{mean - baseline:>13.2f}"
+                        f"{written:>9}{dropped:>9}"
+                    )
+            finally:
+                access_logger.handlers = saved_handlers
+
+    def setup(self, mode, directory, options):
+        if mode == 'off':
+            return None, get_response
+
+        middleware = LogRequestMiddleware(get_response)
+        middleware.slow_ms = float('inf')
+        middleware.sample_rate = 0 if mode == 'sampled_out' else 1
+        if mode == 'sampled_out':
+            return None, middleware
+
+        target = RotatingFileHandler(
+            os.path.join(directory, f'{mode}.log'), maxBytes=settings.LOG_MAX_BYTES, backupCount=1
+        )
+        target.setFormatter(JsonFormatter())
+        if mode == 'sync_file':
+            return target, middleware
+
+        handler = BackgroundHandler([target], queue_size=options['queue_size'])
+        handler.start()
+        return handler, middleware
+
+    def teardown(self, mode, handler, directory):
+        if handler is None:
+            return 0, 0
+        dropped = 0
+        if isinstance(handler, BackgroundHandler):
+            targets = handler.listener.handlers
+            handler.stop()  # waits for the writer thread to drain the queue
+            dropped = handler.dropped
+            for target in targets:
+                target.close()
+        else:
+            handler.close()
+        with open(os.path.join(directory, f'{mode}.log')) as log_file:
+            written = sum(1 for _ in log_file)
+        return written, dropped
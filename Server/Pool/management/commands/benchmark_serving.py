@@ -0,0 +1,193 @@
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authentication.models import CustomUser
+from Pool.benchmarking import SEED_DOMAIN, Seeder, percentile
+from Pool.models import Pool
+
+# The same app served both ways: gunicorn's default sync workers on wsgi.py (the current
+# deployment) and uvicorn workers on asgi.py with the async read views switched on.
+MODES = {
+    'wsgi': {'app': 'Transport_Pool.wsgi:application', 'worker_class': 'sync', 'async_reads': 'False'},
+    'asgi': {'app': 'Transport_Pool.asgi:application', 'worker_class': 'uvicorn.workers.UvicornWorker', 'async_reads': 'True'},
+}
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip().lower()
+
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    keep_alive = headers.get('connection') != 'close'
+    return status, keep_alive
+
+
+async def client(host, port, requests, deadline, warmup_until, results):
+    # One connection at a time per client, reused while the server keeps it alive
+    # (gunicorn's sync workers close after every response; uvicorn does not).
+    reader = writer = None
+    turn = 0
+    while time.monotonic() < deadline:
+        path, payload = requests[turn % len(requests)]
+        turn += 1
+        started = time.monotonic()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            writer.write(payload)
+            await writer.drain()
+            status, keep_alive = await read_response(reader)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            status, keep_alive = None, False
+        elapsed = time.monotonic() - started
+
+        if started >= warmup_until:
+            results.setdefault(path, []).append((elapsed, status))
+        if not keep_alive and writer is not None:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run_load(host, port, requests, concurrency, duration, warmup):
+    results = {}
+    warmup_until = time.monotonic() + warmup
+    deadline = warmup_until + duration
+    await asyncio.gather(*[
+        client(host, port, requests, deadline, warmup_until, results) for _ in range(concurrency)
+    ])
+    return results
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the read endpoints under the WSGI deployment (gunicorn sync workers) and the "
+        "ASGI one (uvicorn workers, ASYNC_READS=True) at the same concurrency, and report "
+        "throughput and latency percentiles for each. Tops up seed_data's users and pools first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+        parser.add_argument('--workers', type=int, default=2, help='Server worker processes in every mode.')
+        parser.add_argument('--concurrency', type=int, default=32, help='Concurrent client connections.')
+        parser.add_argument('--duration', type=float, default=20, help='Measured seconds per mode.')
+        parser.add_argument('--warmup', type=float, default=3, help='Unmeasured seconds before each run.')
+        parser.add_argument('--users', type=int, default=50, help='Seeded users to have in total (see seed_data).')
+        parser.add_argument('--pools', type=int, default=200, help='Pools by seeded users to have in total.')
+        parser.add_argument('--days', type=int, default=60, help='Departures of new pools are spread over this many days.')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--bypass-cache', action='store_true',
+                            help='Serve with a dummy cache so every read reaches the database.')
+
+    def handle(self, *args, **options):
+        user, pool_id = self.seed(options['users'], options['pools'], options['days'])
+        token = str(AccessToken.for_user(user))
+        host, port = '127.0.0.1', options['port']
+        paths = ['/pools/', f'/pools/{pool_id}/', '/auth/user/profile/']
+        requests = [
+            (path, (
+                f'GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\n'
+                f'Authorization: Bearer {token}\r\nAccept: application/json\r\n\r\n'
+            ).encode())
+            for path in paths
+        ]
+
+        self.stdout.write(
+            f"workers={options['workers']} concurrency={options['concurrency']} "
+            f"duration={options['duration']}s bypass_cache={options['bypass_cache']}"
+        )
+        self.stdout.write(f"{'mode':<6}{'path':<22}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>9}{'p99 ms':>9}")
+        for mode in options['modes']:
+            server = self.start_server(mode, host, port, options)
+            try:
+                results = asyncio.run(run_load(
+                    host, port, requests, options['concurrency'], options['duration'], options['warmup']
+                ))
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+            self.report(mode, paths, results, options['duration'])
+
+    def seed(self, users, pools, days):
+        """The first seeded user, to request as, and an upcoming pool of the seeded data."""
+        if users < 1 or days < 1:
+            raise CommandError('--users and --days must be positive.')
+        seeded, _, _ = Seeder(stdout=self.stdout).seed(users, pools, days)
+        pool_id = (
+            Pool.objects.filter(created_by__email__endswith=SEED_DOMAIN, departure_time__gte=timezone.now())
+            .order_by('departure_time', 'id').values_list('id', flat=True).first()
+        )
+        if pool_id is None:
+            raise CommandError('There are no upcoming seeded pools (--pools must be positive).')
+        return CustomUser.objects.get(pk=seeded[0][0]), pool_id
+
+    def start_server(self, mode, host, port, options):
+        config = MODES[mode]
+        env = dict(os.environ, ASYNC_READS=config['async_reads'])
+        if options['bypass_cache']:
+            env['CACHE_BACKEND'] = 'django.core.cache.backends.dummy.DummyCache'
+        server = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn', config['app'],
+                '--worker-class', config['worker_class'],
+                '--workers', str(options['workers']),
+                '--bind', f'{host}:{port}',
+                '--log-level', 'warning',
+            ],
+            cwd=settings.BASE_DIR,
+            env=env,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'{mode} server exited with status {server.returncode}')
+            try:
+                socket.create_connection((host, port), timeout=1).close()
+                return server
+            except OSError:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError(f'{mode} server did not start listening on {host}:{port}')
+
+    def report(self, mode, paths, results, duration):
+        everything = []
+        for path in paths:
+            samples = results.get(path, [])
+            everything.extend(samples)
+            self.write_row(mode, path, samples, duration)
+        self.write_row(mode, 'all', everything, duration)
+
+    def write_row(self, mode, label, samples, duration):
+        ok = [elapsed for elapsed, status in samples if status == 200]
+        errors = len(samples) - len(ok)
+        if not ok:
+            self.stdout.write(f"{mode:<6}{label:<22}{len(samples):>10}{errors:>8}{'-':>10}{'-':>9}{'-':>9}")
+            return
+        self.stdout.write(
+            f"{mode:<6}{label:<22}{len(samples):>10}{errors:>8}{len(ok) / duration:>10.1f}"
+            f"{statistics.median(ok) * 1000:>9.1f}{percentile(ok, 0.99) * 1000:>9.1f}"
+        )
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import PermissionDenied, ValidationError
+
+from Pool.models import PoolTemplate
+from Pool.recurring import expand_template
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the pools of every active recurring template for the coming "
+        "POOL_TEMPLATE_HORIZON_DAYS. Run daily; days already generated are skipped. "
+        "Templates whose pools no longer validate are reported and skipped, and the "
+        "command then exits with an error."
+    )
+
+    def handle(self, *args, **options):
+        created = 0
+        rejected = []
+        template_ids = list(PoolTemplate.objects.filter(active=True).order_by('id').values_list('id', flat=True))
+        for template_id in template_ids:
+            # One transaction per template, so a template whose pools are rejected does not
+            # hold back the others. Any other error is a bug or an outage and stops the run.
+            try:
+                created += len(expand_template(template_id))
+            except (ValidationError, PermissionDenied) as e:
+                rejected.append(template_id)
+                self.stderr.write(f"Template {template_id} could not be expanded: {e.detail}")
+
+        self.stdout.write(self.style.SUCCESS(f"Created {created} pools."))
+        if rejected:
+            raise CommandError(f"{len(rejected)} templates could not be expanded: {rejected}")
@@ -0,0 +1,194 @@
+import json
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
+from django.utils import timezone
+
+from authentication.tokens import ProfileRefreshToken
+from Pool.benchmarking import MODES, PLACES, percentile, seeded_users
+from Pool.models import Pool
+
+ENDPOINTS = ('list', 'filter', 'join', 'profile', 'refresh')
+DEFAULT_MIX = 'list=40,filter=25,join=10,profile=15,refresh=10'
+
+
+def parse_mix(value):
+    try:
+        mix = {name: int(weight) for name, weight in (part.split('=') for part in value.split(','))}
+    except ValueError:
+        raise CommandError(f"--mix must look like {DEFAULT_MIX}")
+    unknown = set(mix) - set(ENDPOINTS)
+    if unknown or not any(mix.values()) or min(mix.values()) < 0:
+        raise CommandError(f"--mix takes non-negative weights for {', '.join(ENDPOINTS)}")
+    return mix
+
+
+def summarize(samples, duration):
+    """Counts, throughput and latency percentiles (ms) for (seconds, status) samples."""
+    statuses = Counter(str(status or 'error') for _, status in samples)
+    errors = sum(1 for _, status in samples if status is None or status >= 500)
+    timings = [elapsed for elapsed, status in samples if status is not None]
+    summary = {
+        'requests': len(samples),
+        'errors': errors,
+        'statuses': dict(sorted(statuses.items())),
+        'throughput_rps': round(len(samples) / duration, 2),
+    }
+    if timings:
+        summary['latency_ms'] = {
+            'mean': round(statistics.mean(timings) * 1000, 2),
+            'p50': round(percentile(timings, 0.50) * 1000, 2),
+            'p95': round(percentile(timings, 0.95) * 1000, 2),
+            'p99': round(percentile(timings, 0.99) * 1000, 2),
+            'max': round(max(timings) * 1000, 2),
+        }
+    return summary
+
+
+class VirtualUser:
+    """One seeded user's session: list, filter, join, profile and refresh requests with its own tokens."""
+
+    def __init__(self, base_url, user, pool_ids, timeout, rng):
+        refresh = ProfileRefreshToken.for_user(user)
+        self.base_url = base_url
+        self.access_token, self.refresh_token = str(refresh.access_token), str(refresh)
+        self.pool_ids = pool_ids
+        self.timeout = timeout
+        self.rng = rng
+        self.session = requests.Session()
+        self.session.headers['Accept'] = 'application/json'
+
+    def request(self, method, path, **kwargs):
+        return self.session.request(
+            method, self.base_url + path, timeout=self.timeout,
+            headers={'Authorization': f'Bearer {self.access_token}'}, **kwargs,
+        )
+
+    def list(self):
+        return self.request('GET', '/pools/')
+
+    def filter(self):
+        params = self.rng.choice([
+            {'end_point': self.rng.choice(PLACES)[0]},
+            {'start_point': self.rng.choice(PLACES)[0], 'transport_mode': self.rng.choice(list(MODES))},
+            {'search': self.rng.choice(['Chandigarh', 'Railway', 'Airport', 'Patiala'])},
+            {'is_female_only': 'false', 'ordering': 'fare_per_head'},
+        ])
+        return self.request('GET', '/pools/', params=params)
+
+    def join(self):
+        # A 400 (already a member, or full) is the server answering, not an error.
+        return self.request('POST', f'/pools/{self.rng.choice(self.pool_ids)}/join/')
+
+    def profile(self):
+        return self.request('GET', '/auth/user/profile/')
+
+    def refresh(self):
+        # Refresh tokens rotate, so keep the new pair for the next requests.
+        response = self.session.post(
+            self.base_url + '/auth/token/refresh/', json={'refresh': self.refresh_token}, timeout=self.timeout
+        )
+        if response.status_code == 200:
+            body = response.json()
+            self.access_token = body['access']
+            self.refresh_token = body.get('refresh', self.refresh_token)
+        return response
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive a running server with a mix of list, filter, join, profile and token-refresh requests "
+        "from concurrent seeded users (see seed_data), and report requests, status codes, throughput "
+        "and p50/p95/p99 latency per endpoint as JSON, so runs can be compared. Run it with the same "
+        "settings and database as the server: tokens are minted locally. Joins take real seats; "
+        "re-seed afterwards (seed_data --clear, then seed_data) to start the next run from the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--concurrency', type=int, default=16,
+                            help='Concurrent virtual users, each a different seeded user.')
+        parser.add_argument('--duration', type=float, default=30, help='Measured seconds.')
+        parser.add_argument('--warmup', type=float, default=3, help='Unmeasured seconds before the run.')
+        parser.add_argument('--mix', default=DEFAULT_MIX, help='Relative weight of each kind of request.')
+        parser.add_argument('--timeout', type=float, default=10, help='Seconds before a request counts as an error.')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='Write the JSON report here and a table to stdout (default: JSON to stdout).')
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options['mix'])
+        rng = random.Random(options['seed'])
+        users = list(seeded_users().order_by('id')[:options['concurrency'] * 10])
+        if len(users) < options['concurrency']:
+            raise CommandError(f"Seed at least {options['concurrency']} users first (manage.py seed_data).")
+        pool_ids = list(
+            Pool.objects.filter(departure_time__gte=timezone.now(), current_persons__lt=F('total_persons'))
+            .order_by('departure_time', 'id').values_list('id', flat=True)[:20000]
+        )
+        if not pool_ids and mix.get('join'):
+            raise CommandError('There are no upcoming pools with free seats to join (manage.py seed_data).')
+
+        base_url = options['base_url'].rstrip('/')
+        clients = [
+            VirtualUser(base_url, user, pool_ids, options['timeout'], random.Random(rng.random()))
+            for user in rng.sample(users, options['concurrency'])
+        ]
+        results = {name: [] for name in ENDPOINTS}
+        warmup_until = time.monotonic() + options['warmup']
+        deadline = warmup_until + options['duration']
+        threads = [
+            threading.Thread(target=self.drive, args=(client, mix, warmup_until, deadline, results))
+            for client in clients
+        ]
+        started_at = timezone.now()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        duration = options['duration']
+        report = {
+            'base_url': base_url,
+            'started_at': started_at.isoformat(),
+            'duration_s': duration,
+            'concurrency': options['concurrency'],
+            'mix': mix,
+            'endpoints': {name: summarize(samples, duration) for name, samples in results.items() if mix.get(name)},
+            'total': summarize([sample for samples in results.values() for sample in samples], duration),
+        }
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.write_table(report)
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
+
+    def drive(self, client, mix, warmup_until, deadline, results):
+        names, weights = list(mix), list(mix.values())
+        samples = {name: [] for name in names}
+        while (started := time.monotonic()) < deadline:
+            name = client.rng.choices(names, weights)[0]
+            try:
+                status = getattr(client, name)().status_code
+            except requests.RequestException:
+                status = None
+            if started >= warmup_until:
+                samples[name].append((time.monotonic() - started, status))
+        for name, measured in samples.items():
+            # list.extend is atomic under the GIL.
+            results[name].extend(measured)
+
+    def write_table(self, report):
+        self.stdout.write(f"{'endpoint':<10}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        for name, summary in [*report['endpoints'].items(), ('total', report['total'])]:
+            latency = summary.get('latency_ms', {})
+            self.stdout.write(
+                f"{name:<10}{summary['requests']:>10}{summary['errors']:>8}{summary['throughput_rps']:>10.1f}"
+                + ''.join(f"{latency.get(key, '-'):>9}" for key in ('p50', 'p95', 'p99'))
+            )
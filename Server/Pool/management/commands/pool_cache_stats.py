@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from Pool.cache import cache_stats, get_version
+
+
+class Command(BaseCommand):
+    help = "Show hit/miss counters for the pool response cache."
+
+    def handle(self, *args, **options):
+        stats = cache_stats()
+        lookups = stats['hits'] + stats['misses']
+        hit_rate = stats['hits'] / lookups if lookups else 0.0
+        self.stdout.write(
+            f"version={get_version()} hits={stats['hits']} misses={stats['misses']} hit_rate={hit_rate:.1%}"
+        )
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Pool.benchmarking import SEED_DOMAIN, Seeder, clear_seeded
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-load seeded users, pools and pool memberships for load testing, with realistic "
+        "distributions: most rides leave campus for the station, bus stand or Chandigarh, in the "
+        "evenings and around weekends, a few users create most pools, and seats are partly taken "
+        "(female-only pools by female users only). Rows are written with batched bulk inserts, one "
+        "transaction per batch. Counts are targets, so re-running tops the data up; --clear removes "
+        f"every seeded user (emails ending {SEED_DOMAIN}) with their pools."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000, help='Seeded users to have in total.')
+        parser.add_argument('--pools', type=int, default=100000, help='Pools by seeded users to have in total.')
+        parser.add_argument('--days', type=int, default=60, help='Departures are spread over the next this many days.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--clear', action='store_true', help='Delete the seeded data and exit.')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self.stdout.write(f"Deleted {clear_seeded()} rows.")
+            return
+        if options['batch_size'] < 1 or options['days'] < 1:
+            raise CommandError('--batch-size and --days must be positive.')
+
+        started = time.monotonic()
+        seeder = Seeder(options['seed'], options['batch_size'], self.stdout)
+        try:
+            users, pools, members = seeder.seed(options['users'], options['pools'], options['days'])
+        except ValueError as e:
+            raise CommandError(e)
+        self.stdout.write(
+            f"Seeded {len(users)} users, {pools} new pools and {members} new memberships "
+            f"in {time.monotonic() - started:.1f}s."
+        )
@@ -0,0 +1,87 @@
+"""
+Ride matching for /pools/match/: open pools leaving within a window around a
+wanted time, ranked by how close they leave to it and how well their
+destination matches the wanted one.
+
+Candidates are read with two range scans on pool_departure_id_idx
+(departure_time, id), outwards from the wanted time, so the cost depends on
+how many pools leave inside the window, not on the table size. At most
+MAX_CANDIDATES of them are ranked: in a crowded window, the ones leaving
+closest to the wanted time.
+Destination similarity is pg_trgm's word similarity on PostgreSQL and a
+Python approximation of it elsewhere.
+"""
+import re
+from datetime import timedelta
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+
+MAX_CANDIDATES = 1000
+# Below this a destination is not considered a match (pg_trgm's own word_similarity_threshold).
+MIN_SIMILARITY = 0.3
+TIME_WEIGHT = 0.5
+DESTINATION_WEIGHT = 0.5
+
+
+def trigrams(text):
+    # pg_trgm's extraction: lower-cased alphanumeric words, padded with two spaces in front and one behind.
+    found = set()
+    for word in re.findall(r'\w+', text.lower()):
+        padded = f'  {word} '
+        found.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return found
+
+
+def word_similarity(term, text):
+    """Share of the term's trigrams found in `text`; close to, and never below, pg_trgm's word_similarity."""
+    wanted = trigrams(term)
+    return len(wanted & trigrams(text)) / len(wanted) if wanted else 0.0
+
+
+def match_pools(queryset, at, window, destination=None, seats=1, female=False):
+    """
+    [(pool_id, score, minutes_off, destination_similarity)] for the open pools in
+    `queryset` leaving within `window` of `at`, best first. Score is 0..1:
+    half time proximity, half destination similarity (all time when no
+    destination is given).
+    """
+    earliest = max(at - window, timezone.now())
+    candidates = queryset.filter(
+        departure_time__gte=earliest,
+        departure_time__lte=at + window,
+        current_persons__lte=F('total_persons') - seats,
+    )
+    if not female:
+        candidates = candidates.filter(is_female_only=False)
+
+    on_postgres = connections[queryset.db].vendor == 'postgresql'
+    fields = ['id', 'departure_time', 'end_point']
+    if destination and on_postgres:
+        candidates = candidates.annotate(similarity=TrigramWordSimilarity(destination, 'end_point'))
+        fields.append('similarity')
+
+    # The closest MAX_CANDIDATES on either side of `at`, then the closest of those overall.
+    rows = [
+        *candidates.filter(departure_time__gte=at).order_by('departure_time', 'id').values(*fields)[:MAX_CANDIDATES],
+        *candidates.filter(departure_time__lt=at).order_by('-departure_time', '-id').values(*fields)[:MAX_CANDIDATES],
+    ]
+    rows.sort(key=lambda row: abs(row['departure_time'] - at))
+
+    matches = []
+    for row in rows[:MAX_CANDIDATES]:
+        minutes_off = (row['departure_time'] - at) / timedelta(minutes=1)
+        closeness = 1 - abs(minutes_off) / (window / timedelta(minutes=1))
+        if destination:
+            similarity = row['similarity'] if on_postgres else word_similarity(destination, row['end_point'])
+            if similarity < MIN_SIMILARITY:
+                continue
+            score = TIME_WEIGHT * closeness + DESTINATION_WEIGHT * similarity
+        else:
+            similarity, score = None, closeness
+        matches.append((row['id'], round(score, 4), round(minutes_off, 1), similarity))
+
+    matches.sort(key=lambda match: (-match[1], abs(match[2]), match[0]))
+    return matches
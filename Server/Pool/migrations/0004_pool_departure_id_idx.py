@@ -0,0 +1,19 @@
+# Generated by Django 5.0.7 on 2026-10-17 11:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Pool', '0003_pool_is_female_only_delete_poolrequest'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pool',
+            index=models.Index(fields=['departure_time', 'id'], name='pool_departure_id_idx'),
+        ),
+    ]
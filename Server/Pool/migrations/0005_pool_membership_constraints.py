@@ -0,0 +1,46 @@
+# Generated by Django 5.0.7 on 2026-10-17 11:03
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def repair_memberships(apps, schema_editor):
+    # Earlier racing joins could leave duplicate members and oversold pools behind,
+    # which would make the new constraints fail to apply.
+    Pool = apps.get_model('Pool', 'Pool')
+    PoolMember = apps.get_model('Pool', 'PoolMember')
+
+    duplicates = (
+        PoolMember.objects.values('pool_id', 'user_id')
+        .annotate(keep=Min('id'), n=Count('id'))
+        .filter(n__gt=1)
+    )
+    for row in duplicates:
+        PoolMember.objects.filter(pool_id=row['pool_id'], user_id=row['user_id']).exclude(id=row['keep']).delete()
+
+    for pool in Pool.objects.annotate(n=Count('members')).iterator():
+        if pool.current_persons != pool.n or pool.n > pool.total_persons:
+            pool.current_persons = pool.n
+            pool.total_persons = max(pool.total_persons, pool.n)
+            pool.save(update_fields=['current_persons', 'total_persons'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Pool', '0004_pool_departure_id_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(repair_memberships, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='pool',
+            constraint=models.CheckConstraint(check=models.Q(('current_persons__gte', 0), ('current_persons__lte', models.F('total_persons'))), name='pool_current_persons_within_capacity'),
+        ),
+        migrations.AddConstraint(
+            model_name='poolmember',
+            constraint=models.UniqueConstraint(fields=('pool', 'user'), name='unique_pool_member'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.0.7 on 2026-10-17 11:05
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+SEARCH_INDEXES = [
+    django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('start_point', 'end_point', 'description', config='simple'), name='pool_search_vector_idx'),
+    django.contrib.postgres.indexes.GinIndex(fields=['start_point'], name='pool_start_point_trgm_idx', opclasses=['gin_trgm_ops']),
+    django.contrib.postgres.indexes.GinIndex(fields=['end_point'], name='pool_end_point_trgm_idx', opclasses=['gin_trgm_ops']),
+]
+
+
+# GIN indexes only exist on PostgreSQL; other backends (SQLite in tests) keep plain icontains search.
+# They are deliberately left out of the model state: SQLite rebuilds tables from that state and
+# cannot parse these index expressions.
+def add_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    Pool = apps.get_model('Pool', 'Pool')
+    for index in SEARCH_INDEXES:
+        schema_editor.add_index(Pool, index)
+
+
+def remove_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Pool = apps.get_model('Pool', 'Pool')
+    for index in SEARCH_INDEXES:
+        schema_editor.remove_index(Pool, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Pool', '0005_pool_membership_constraints'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_indexes, remove_search_indexes),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.0.7 on 2026-10-17 11:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Pool', '0006_pool_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPool',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('start_point', models.CharField(max_length=255)),
+                ('end_point', models.CharField(max_length=255)),
+                ('departure_time', models.DateTimeField()),
+                ('arrival_time', models.DateTimeField()),
+                ('transport_mode', models.CharField(max_length=50)),
+                ('total_persons', models.IntegerField()),
+                ('current_persons', models.IntegerField()),
+                ('fare_per_head', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('description', models.CharField(blank=True, max_length=400, null=True)),
+                ('is_female_only', models.BooleanField(default=False)),
+                ('archived_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedPoolMember',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('is_creator', models.BooleanField(default=False)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='pool',
+            index=models.Index(fields=['arrival_time'], name='pool_arrival_time_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedpool',
+            name='created_by',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_created_pools', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedpoolmember',
+            name='pool',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='members', to='Pool.archivedpool'),
+        ),
+        migrations.AddField(
+            model_name='archivedpoolmember',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_pools', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
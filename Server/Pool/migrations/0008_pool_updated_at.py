@@ -0,0 +1,47 @@
+# Generated by Django 5.0.7 on 2026-10-17 11:08
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Now
+
+
+# Live pools start out as modified "now"; archived ones as of when they were archived.
+def stamp_existing_rows(apps, schema_editor):
+    apps.get_model('Pool', 'Pool').objects.update(updated_at=Now())
+    apps.get_model('Pool', 'ArchivedPool').objects.update(updated_at=models.F('archived_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Pool', '0007_archived_pools'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedpool',
+            name='updated_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name='pool',
+            name='updated_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(stamp_existing_rows, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='archivedpool',
+            name='updated_at',
+            field=models.DateTimeField(),
+        ),
+        migrations.AlterField(
+            model_name='pool',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='pool',
+            index=models.Index(fields=['updated_at'], name='pool_updated_at_idx'),
+        ),
+    ]
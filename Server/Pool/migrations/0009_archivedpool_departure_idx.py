@@ -0,0 +1,19 @@
+# Generated by Django 5.0.7 on 2026-10-17 11:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Pool', '0008_pool_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='archivedpool',
+            index=models.Index(fields=['departure_time'], name='archivedpool_departure_idx'),
+        ),
+    ]
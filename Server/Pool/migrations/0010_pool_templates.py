@@ -0,0 +1,37 @@
+# Generated by Django 5.0.7 on 2026-10-17 11:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Pool', '0009_archivedpool_departure_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PoolTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_point', models.CharField(default='Thapar University', max_length=255)),
+                ('end_point', models.CharField(max_length=255)),
+                ('departure_time', models.TimeField()),
+                ('arrival_time', models.TimeField()),
+                ('weekdays', models.PositiveSmallIntegerField()),
+                ('transport_mode', models.CharField(max_length=50)),
+                ('total_persons', models.IntegerField()),
+                ('fare_per_head', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('description', models.CharField(blank=True, max_length=400, null=True)),
+                ('is_female_only', models.BooleanField(default=False)),
+                ('starts_on', models.DateField()),
+                ('ends_on', models.DateField(blank=True, null=True)),
+                ('active', models.BooleanField(default=True)),
+                ('generated_until', models.DateField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pool_templates', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.0.7 on 2026-10-17 11:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_locations(apps, schema_editor):
+    # One Location per distinct place name (same normalisation as Pool.models.normalize_place,
+    # copied so this migration does not change with it), then one UPDATE per place and column.
+    Location = apps.get_model('Pool', 'Location')
+    models_with_points = [apps.get_model('Pool', 'Pool'), apps.get_model('Pool', 'ArchivedPool')]
+
+    names = {}
+    for model in models_with_points:
+        for point in ('start_point', 'end_point'):
+            for name in model.objects.values_list(point, flat=True).distinct().iterator():
+                spellings = names.setdefault(' '.join(name.casefold().split()), [])
+                if name not in spellings:
+                    spellings.append(name)
+
+    Location.objects.bulk_create(
+        [Location(name=spellings[0].strip(), key=key) for key, spellings in names.items()],
+        batch_size=500, ignore_conflicts=True,
+    )
+    for location in Location.objects.filter(key__in=list(names)).iterator():
+        for model in models_with_points:
+            model.objects.filter(start_point__in=names[location.key]).update(start_location=location)
+            model.objects.filter(end_point__in=names[location.key]).update(end_location=location)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Pool', '0010_pool_templates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Location',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('key', models.CharField(editable=False, max_length=255, unique=True)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('geohash', models.CharField(blank=True, editable=False, max_length=12, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['geohash'], name='location_geohash_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='archivedpool',
+            name='end_location',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='Pool.location'),
+        ),
+        migrations.AddField(
+            model_name='archivedpool',
+            name='start_location',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='Pool.location'),
+        ),
+        migrations.AddField(
+            model_name='pool',
+            name='end_location',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='Pool.location'),
+        ),
+        migrations.AddField(
+            model_name='pool',
+            name='start_location',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='Pool.location'),
+        ),
+        migrations.RunPython(backfill_locations, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='pool',
+            index=models.Index(fields=['start_location', 'departure_time'], name='pool_start_location_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.7 on 2026-10-17 11:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Pool', '0011_locations'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    # The composite indexes are built before the single-column user indexes they replace are dropped.
+    operations = [
+        migrations.AddIndex(
+            model_name='archivedpoolmember',
+            index=models.Index(fields=['user', 'pool'], name='archivedmember_user_pool_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='poolmember',
+            index=models.Index(fields=['user', 'pool'], name='poolmember_user_pool_idx'),
+        ),
+        migrations.AlterField(
+            model_name='archivedpoolmember',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_pools', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='poolmember',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='pools', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
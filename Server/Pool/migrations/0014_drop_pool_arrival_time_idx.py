@@ -0,0 +1,17 @@
+# Generated by Django 5.0.7 on 2026-10-17 12:18
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Pool', '0013_waitlist'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='pool',
+            name='pool_arrival_time_idx',
+        ),
+    ]
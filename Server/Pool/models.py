@@ -1,9 +1,100 @@
 from django.db import models
 from authentication.models import CustomUser
+from . import geo
+
+
+def normalize_place(name):
+    return ' '.join(name.casefold().split())
+
+
+# One row per place, however its name was capitalised or spaced ("Patiala Bus Stand" and
+# "patiala bus stand " are the same row). Once a place has coordinates its geohash makes it
+# findable by distance (Pool/geo.py, PoolViewSet.nearby).
+class Location(models.Model):
+    name = models.CharField(max_length=255)  # as first written
+    key = models.CharField(max_length=255, unique=True, editable=False)  # normalize_place(name)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Cell prefix ranges for nearby_locations()
+            models.Index(fields=['geohash'], name='location_geohash_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.key = normalize_place(self.name)
+        has_coordinates = self.latitude is not None and self.longitude is not None
+        self.geohash = geo.encode(self.latitude, self.longitude) if has_coordinates else None
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def for_names(cls, names):
+        """{normalize_place(name): Location} for `names`, creating the places not seen before."""
+        wanted = {}
+        for name in names:
+            wanted.setdefault(normalize_place(name), name.strip())
+        found = {location.key: location for location in cls.objects.filter(key__in=wanted)}
+        missing = [cls(name=name, key=key) for key, name in wanted.items() if key not in found]
+        if missing:
+            # ignore_conflicts: a concurrent request may create the same place; read back either way.
+            cls.objects.bulk_create(missing, ignore_conflicts=True)
+            found.update(
+                (location.key, location) for location in cls.objects.filter(key__in=[m.key for m in missing])
+            )
+        return found
+
+    def fill_coordinates(self, latitude, longitude):
+        # The first coordinates given for a place stick; later ones do not move it (admins can).
+        if self.latitude is None:
+            Location.objects.filter(pk=self.pk, latitude__isnull=True).update(
+                latitude=latitude, longitude=longitude, geohash=geo.encode(latitude, longitude)
+            )
+
+    def __str__(self):
+        return self.name
+
+
+def nearby_locations(latitude, longitude, radius_km):
+    """{location id: distance in km} for the places within radius_km, read through the geohash index."""
+    cells = models.Q()
+    for prefix in geo.nearby_cells(latitude, longitude, radius_km):
+        upper = geo.prefix_upper_bound(prefix)
+        cells |= models.Q(geohash__gte=prefix, geohash__lt=upper) if upper else models.Q(geohash__gte=prefix)
+    distances = {}
+    for location_id, lat, lng in Location.objects.filter(cells).values_list('id', 'latitude', 'longitude'):
+        distance = geo.haversine_km(latitude, longitude, lat, lng)
+        if distance <= radius_km:
+            distances[location_id] = distance
+    return distances
+
+
+def attach_locations(pools):
+    """Point start_location/end_location of each pool at the Location for its start_point/end_point."""
+    pending = []
+    for pool in pools:
+        for field, point in Pool.LOCATION_FIELDS.items():
+            key = normalize_place(getattr(pool, point))
+            cached = getattr(Pool, field).is_cached(pool) and getattr(pool, field)
+            if not (cached and cached.key == key):
+                pending.append((pool, field, key))
+    if pending:
+        locations = Location.for_names(getattr(pool, Pool.LOCATION_FIELDS[field]) for pool, field, _ in pending)
+        for pool, field, key in pending:
+            setattr(pool, field, locations[key])
+
 
 class Pool(models.Model):
+    LOCATION_FIELDS = {'start_location': 'start_point', 'end_location': 'end_point'}
+
     start_point = models.CharField(max_length=255, default = "Thapar University")
     end_point = models.CharField(max_length=255)
+    # Kept in step with start_point/end_point by save() and attach_locations().
+    start_location = models.ForeignKey(
+        Location, related_name='+', null=True, editable=False, on_delete=models.SET_NULL, db_index=False
+    )
+    end_location = models.ForeignKey(Location, related_name='+', null=True, editable=False, on_delete=models.SET_NULL)
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
     transport_mode = models.CharField(max_length=50)
@@ -13,14 +104,152 @@ class Pool(models.Model):
     created_by = models.ForeignKey(CustomUser, related_name='created_pools', on_delete=models.CASCADE)
     description = models.CharField(max_length = 400, null = True, blank = True)
     is_female_only = models.BooleanField(default=False)
+    # Set on every save; queryset.update() callers must set it themselves.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Backs the (departure_time, id) keyset used by PoolCursorPagination,
+            # and lets archive_pools find departed rides without a full scan
+            models.Index(fields=['departure_time', 'id'], name='pool_departure_id_idx'),
+            # Backs the Max(updated_at) used for list ETags
+            models.Index(fields=['updated_at'], name='pool_updated_at_idx'),
+            # Upcoming pools from a set of places (PoolViewSet.nearby)
+            models.Index(fields=['start_location', 'departure_time'], name='pool_start_location_idx'),
+            # The GIN search indexes used by PoolSearchFilter are PostgreSQL-only and are
+            # created directly by migration 0006, outside the model state, so that SQLite
+            # table rebuilds do not try to recreate them.
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(current_persons__gte=0) & models.Q(current_persons__lte=models.F('total_persons')),
+                name='pool_current_persons_within_capacity',
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'start_point', 'end_point'} & set(update_fields):
+            attach_locations([self])
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *self.LOCATION_FIELDS}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.start_point} to {self.end_point} by {self.created_by.full_name}"
 
 class PoolMember(models.Model):
     pool = models.ForeignKey(Pool, related_name='members', on_delete=models.CASCADE)
-    user = models.ForeignKey(CustomUser, related_name='pools', on_delete=models.CASCADE)
+    # Indexed through poolmember_user_pool_idx
+    user = models.ForeignKey(CustomUser, related_name='pools', on_delete=models.CASCADE, db_index=False)
     is_creator = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # A user's pools (PoolViewSet.mine) without touching other users' rows
+            models.Index(fields=['user', 'pool'], name='poolmember_user_pool_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['pool', 'user'], name='unique_pool_member'),
+        ]
+
     def __str__(self):
         return self.user.full_name
+
+
+# Users waiting for a seat in a full pool, served oldest first (by id) as seats free up
+# (Pool/waitlist.py). Archiving or deleting the pool drops its waitlist.
+class WaitlistEntry(models.Model):
+    # Indexed through waitlist_pool_id_idx
+    pool = models.ForeignKey(Pool, related_name='waitlist', on_delete=models.CASCADE, db_index=False)
+    user = models.ForeignKey(CustomUser, related_name='waitlisted_pools', on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['pool', 'user'], name='unique_waitlist_entry'),
+        ]
+        indexes = [
+            # The head of a pool's queue, and a user's place in it
+            models.Index(fields=['pool', 'id'], name='waitlist_pool_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.full_name} waiting for pool {self.pool_id}"
+
+
+# Departed pools are moved here by the archive_pools command so that the hot
+# Pool/PoolMember tables only hold rides that can still be joined.
+class ArchivedPool(models.Model):
+    id = models.BigIntegerField(primary_key=True)  # keeps the original Pool id
+    start_point = models.CharField(max_length=255)
+    end_point = models.CharField(max_length=255)
+    start_location = models.ForeignKey(
+        Location, related_name='+', null=True, editable=False, on_delete=models.SET_NULL, db_index=False
+    )
+    end_location = models.ForeignKey(
+        Location, related_name='+', null=True, editable=False, on_delete=models.SET_NULL, db_index=False
+    )
+    departure_time = models.DateTimeField()
+    arrival_time = models.DateTimeField()
+    transport_mode = models.CharField(max_length=50)
+    total_persons = models.IntegerField()
+    current_persons = models.IntegerField()
+    fare_per_head = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    created_by = models.ForeignKey(CustomUser, related_name='archived_created_pools', on_delete=models.CASCADE)
+    description = models.CharField(max_length = 400, null = True, blank = True)
+    is_female_only = models.BooleanField(default=False)
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # Tombstone lookup for PoolViewSet.sync
+            models.Index(fields=['departure_time'], name='archivedpool_departure_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.start_point} to {self.end_point} (archived)"
+
+class ArchivedPoolMember(models.Model):
+    id = models.BigIntegerField(primary_key=True)  # keeps the original PoolMember id
+    pool = models.ForeignKey(ArchivedPool, related_name='members', on_delete=models.CASCADE)
+    # Indexed through archivedmember_user_pool_idx
+    user = models.ForeignKey(CustomUser, related_name='archived_pools', on_delete=models.CASCADE, db_index=False)
+    is_creator = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            # A user's finished rides (PoolViewSet.history)
+            models.Index(fields=['user', 'pool'], name='archivedmember_user_pool_idx'),
+        ]
+
+    def __str__(self):
+        return self.user.full_name
+
+
+# A pool that repeats on fixed weekdays. Expanded into concrete Pool rows a few days
+# ahead (Pool/recurring.py); generated_until records how far that has got.
+class PoolTemplate(models.Model):
+    WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+    created_by = models.ForeignKey(CustomUser, related_name='pool_templates', on_delete=models.CASCADE)
+    start_point = models.CharField(max_length=255, default = "Thapar University")
+    end_point = models.CharField(max_length=255)
+    # Wall-clock times in settings.POOL_TEMPLATE_TIME_ZONE; an arrival before the departure is on the next day.
+    departure_time = models.TimeField()
+    arrival_time = models.TimeField()
+    # Bit i set = repeats on WEEKDAYS[i]
+    weekdays = models.PositiveSmallIntegerField()
+    transport_mode = models.CharField(max_length=50)
+    total_persons = models.IntegerField()
+    fare_per_head = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    description = models.CharField(max_length = 400, null = True, blank = True)
+    is_female_only = models.BooleanField(default=False)
+    starts_on = models.DateField()
+    ends_on = models.DateField(null=True, blank=True)
+    active = models.BooleanField(default=True)
+    generated_until = models.DateField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.start_point} to {self.end_point} at {self.departure_time} by {self.created_by.full_name}"
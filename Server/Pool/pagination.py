@@ -0,0 +1,169 @@
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .search import SEARCH_RANK
+
+
+class PoolCursorPagination(BasePagination):
+    """
+    Keyset pagination over (<ordering field>, id).
+
+    The ordering field comes from the view's OrderingFilter (falling back to
+    `departure_time`) and `id` is always appended as a tie-breaker, so every
+    page is fetched with an index-friendly `WHERE (field, id) > (x, y)` seek
+    instead of an OFFSET. NULLs (only possible for fare_per_head) are treated
+    as the largest value. Ranked search results are ordered by `search_rank`
+    unless the client asks for a specific ordering.
+    """
+    cursor_query_param = 'cursor'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = 'departure_time'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self._build_page(list(self._page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self._build_page([row async for row in self._page_queryset(queryset, request, view)])
+
+    def _page_queryset(self, queryset, request, view):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.field, self.descending = self.get_ordering(request, queryset, view)
+        if self.field in queryset.query.annotations:
+            self.model_field = queryset.query.annotations[self.field].output_field
+        else:
+            self.model_field = queryset.model._meta.get_field(self.field)
+        self.cursor = self.decode_cursor(request)
+
+        self.reverse = bool(self.cursor and self.cursor['reverse'])
+        # Walking backwards is the same seek with the direction flipped.
+        walk_descending = self.descending != self.reverse
+        queryset = queryset.order_by(*self._order_by(walk_descending))
+        if self.cursor is not None:
+            queryset = queryset.filter(
+                self._seek(walk_descending, self.cursor['position'], self.cursor['pk'])
+            )
+
+        # Fetch one extra row to know whether there is a following page.
+        return queryset[:self.page_size + 1]
+
+    def _build_page(self, rows):
+        has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_previous = has_more
+            self.has_next = bool(self.page)
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None and bool(self.page)
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        for backend in getattr(view, 'filter_backends', []):
+            if hasattr(backend, 'get_ordering'):
+                if SEARCH_RANK in queryset.query.annotations and backend.ordering_param not in request.query_params:
+                    return SEARCH_RANK, True
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        # Only the leading ordering term takes part in the keyset; id breaks ties.
+        term = ordering[0] if ordering else self.ordering
+        return term.lstrip('-'), term.startswith('-')
+
+    def _order_by(self, descending):
+        if descending:
+            return [F(self.field).desc(nulls_first=True), F('id').desc()]
+        return [F(self.field).asc(nulls_last=True), F('id').asc()]
+
+    def _seek(self, descending, position, pk):
+        field = self.field
+        if descending:
+            if position is None:
+                return Q(**{f'{field}__isnull': True, 'id__lt': pk}) | Q(**{f'{field}__isnull': False})
+            return Q(**{f'{field}__lt': position}) | Q(**{field: position, 'id__lt': pk})
+        if position is None:
+            return Q(**{f'{field}__isnull': True, 'id__gt': pk})
+        return (
+            Q(**{f'{field}__gt': position})
+            | Q(**{field: position, 'id__gt': pk})
+            | Q(**{f'{field}__isnull': True})
+        )
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            tokens = parse.parse_qs(b64decode(encoded.encode('ascii')).decode('ascii'))
+            position = tokens.get('p', [None])[0]
+            if position is not None:
+                position = self.model_field.to_python(position)
+            return {
+                'reverse': tokens.get('r', ['0'])[0] == '1',
+                'position': position,
+                'pk': int(tokens['i'][0]),
+            }
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse):
+        tokens = {'i': str(instance.pk)}
+        position = getattr(instance, self.field)
+        if position is not None:
+            tokens['p'] = position.isoformat() if hasattr(position, 'isoformat') else str(position)
+        if reverse:
+            tokens['r'] = '1'
+        encoded = b64encode(parse.urlencode(tokens).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
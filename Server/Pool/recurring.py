@@ -0,0 +1,110 @@
+"""
+Creating many pools at once: the bulk-create endpoint and the expansion of
+recurring PoolTemplates into concrete pools.
+
+Both go through create_pools(), which validates every row with
+PoolSerializer and then writes all pools and their creator memberships with
+two batched INSERTs in one transaction.
+"""
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import PermissionDenied
+
+from .cache import bump_version
+from .events import publish_pool_event
+from .models import Pool, PoolMember, PoolTemplate, attach_locations
+from .serializers import PoolSerializer
+
+BATCH_SIZE = 500
+TEMPLATE_FIELDS = [
+    'start_point', 'end_point', 'transport_mode', 'total_persons', 'fare_per_head', 'description', 'is_female_only',
+]
+
+
+def validate_pools(rows, creator_gender):
+    """Validated data for each row, or ValidationError with the errors listed per row."""
+    serializer = PoolSerializer(data=rows, many=True)
+    serializer.is_valid(raise_exception=True)
+    if creator_gender != 'Female' and any(row.get('is_female_only') for row in serializer.validated_data):
+        raise PermissionDenied("Only female users can create female-only pools.")
+    return serializer.validated_data
+
+
+def create_pools(creator_id, validated_rows):
+    """Insert pools created by `creator_id`, each with its creator as first member."""
+    rows = [dict(row) for row in validated_rows]
+    coordinates = [PoolSerializer.pop_coordinates(row) for row in rows]
+    pools = [Pool(created_by_id=creator_id, **row) for row in rows]
+    with transaction.atomic():
+        # bulk_create skips Pool.save(), so look the places up here, all in one query.
+        attach_locations(pools)
+        # RETURNING fills in the ids (PostgreSQL, SQLite 3.35+), which the members need.
+        pools = Pool.objects.bulk_create(pools, batch_size=BATCH_SIZE)
+        for pool, pool_coordinates in zip(pools, coordinates):
+            PoolSerializer.fill_coordinates(pool, pool_coordinates)
+        PoolMember.objects.bulk_create(
+            [PoolMember(pool=pool, user_id=creator_id, is_creator=True) for pool in pools], batch_size=BATCH_SIZE
+        )
+        bump_version()
+        for pool in pools:
+            publish_pool_event('pool.created', pool.pk)
+    return pools
+
+
+def template_dates(template, first, last):
+    day = first
+    while day <= last:
+        if template.weekdays & (1 << day.weekday()):
+            yield day
+        day += timedelta(days=1)
+
+
+def template_rows(template, dates):
+    zone = ZoneInfo(settings.POOL_TEMPLATE_TIME_ZONE)
+    now = timezone.now()
+    for day in dates:
+        departure = datetime.combine(day, template.departure_time, tzinfo=zone)
+        if departure <= now:
+            continue
+        arrival = datetime.combine(day, template.arrival_time, tzinfo=zone)
+        if arrival <= departure:
+            arrival += timedelta(days=1)
+        row = {field: getattr(template, field) for field in TEMPLATE_FIELDS}
+        row.update(departure_time=departure, arrival_time=arrival)
+        yield row
+
+
+def expand_template(template_id, until=None):
+    """
+    Create the template's pools for the days after generated_until up to `until`
+    (default: POOL_TEMPLATE_HORIZON_DAYS from today) and move generated_until
+    forward. Returns the new pools. The template row is locked meanwhile, so two
+    expansions of the same template cannot create the same day twice.
+    """
+    zone = ZoneInfo(settings.POOL_TEMPLATE_TIME_ZONE)
+    today = timezone.now().astimezone(zone).date()
+    until = until or today + timedelta(days=settings.POOL_TEMPLATE_HORIZON_DAYS)
+    with transaction.atomic():
+        template = (
+            PoolTemplate.objects.select_related('created_by').select_for_update(of=('self',)).get(pk=template_id)
+        )
+        if template.ends_on is not None:
+            until = min(until, template.ends_on)
+        first = max(template.starts_on, today)
+        if template.generated_until is not None:
+            first = max(first, template.generated_until + timedelta(days=1))
+        if not template.active or first > until:
+            return []
+
+        rows = list(template_rows(template, template_dates(template, first, until)))
+        if rows:
+            pools = create_pools(template.created_by_id, validate_pools(rows, template.created_by.gender))
+        else:
+            pools = []
+        template.generated_until = until
+        template.save(update_fields=['generated_until'])
+    return pools
@@ -0,0 +1,53 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from django.db import connections
+from django.db.models import FloatField, Q
+from django.db.models.functions import Cast, Greatest
+from rest_framework import filters
+
+# Place names and free-text notes, so no language-specific stemming.
+SEARCH_CONFIG = 'simple'
+SEARCH_RANK = 'search_rank'
+
+
+def pool_search_vector():
+    # Must stay identical to the expression behind pool_search_vector_idx (migration 0006)
+    # for PostgreSQL to use the index.
+    return SearchVector('start_point', 'end_point', 'description', config=SEARCH_CONFIG)
+
+
+class PoolSearchFilter(filters.SearchFilter):
+    """
+    Ranked search over start_point, end_point and description.
+
+    On PostgreSQL a pool matches when its full-text vector matches the query
+    or the query is word-similar to one of its route points (typos, partial
+    names). Both checks are served by GIN indexes, and results carry a
+    `search_rank` annotation that PoolCursorPagination orders by when no
+    explicit ordering is requested. Other databases fall back to
+    SearchFilter's icontains lookups over `search_fields`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        term = ' '.join(self.get_search_terms(request))
+        if not term or connections[queryset.db].vendor != 'postgresql':
+            return super().filter_queryset(request, queryset, view)
+
+        query = SearchQuery(term, config=SEARCH_CONFIG, search_type='websearch')
+        route_similarity = Greatest(
+            TrigramWordSimilarity(term, 'start_point'),
+            TrigramWordSimilarity(term, 'end_point'),
+        )
+        # ts_rank() is a float4 (real): the value a cursor carries back would not
+        # compare equal to the stored rank, so rows would repeat across pages.
+        # As double precision it round-trips exactly through the cursor.
+        rank = Cast(SearchRank(pool_search_vector(), query) + route_similarity, FloatField())
+        return (
+            queryset
+            .alias(search_vector=pool_search_vector())
+            .annotate(**{SEARCH_RANK: rank})
+            .filter(
+                Q(search_vector=query)
+                | Q(start_point__trigram_word_similar=term)
+                | Q(end_point__trigram_word_similar=term)
+            )
+        )
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from Pool.models import Pool, PoolMember
+from Pool.models import Pool, PoolMember, ArchivedPool, ArchivedPoolMember, PoolTemplate
 from authentication.models import CustomUser
 
 class CustomUserLimitedSerializer(serializers.ModelSerializer):
@@ -16,22 +16,67 @@ class PoolMemberSerializer(serializers.ModelSerializer):
         fields = ['full_name', 'phone_number', 'gender', 'is_creator', 'pool']
 
 class PoolSerializer(serializers.ModelSerializer):
+    # Optional coordinates of start_point/end_point; they place a Location that has none yet.
+    COORDINATE_FIELDS = {
+        'start_location': ('start_latitude', 'start_longitude'),
+        'end_location': ('end_latitude', 'end_longitude'),
+    }
+
     created_by = CustomUserLimitedSerializer(read_only = True)
     members = PoolMemberSerializer(many=True, read_only=True)
+    start_latitude = serializers.FloatField(min_value=-90, max_value=90, required=False, write_only=True)
+    start_longitude = serializers.FloatField(min_value=-180, max_value=180, required=False, write_only=True)
+    end_latitude = serializers.FloatField(min_value=-90, max_value=90, required=False, write_only=True)
+    end_longitude = serializers.FloatField(min_value=-180, max_value=180, required=False, write_only=True)
     
     class Meta:
         model = Pool
         fields = '__all__'
+        # Follows the member count; only join, leave and the waitlist change it.
+        read_only_fields = ['current_persons']
+
+    @classmethod
+    def pop_coordinates(cls, data):
+        """Remove the coordinate fields from validated data: {location field: (latitude, longitude)}."""
+        return {
+            field: (data.pop(latitude), data.pop(longitude))
+            for field, (latitude, longitude) in cls.COORDINATE_FIELDS.items() if latitude in data
+        }
+
+    @staticmethod
+    def fill_coordinates(pool, coordinates):
+        for field, (latitude, longitude) in coordinates.items():
+            location = getattr(pool, field)
+            if location is not None:
+                location.fill_coordinates(latitude, longitude)
+
+    def create(self, validated_data):
+        coordinates = self.pop_coordinates(validated_data)
+        pool = super().create(validated_data)
+        self.fill_coordinates(pool, coordinates)
+        return pool
 
-    def get_members (self, obj):
-        members = PoolMember.objects.filter(self = obj)
-        return PoolMemberSerializer(members, many=True).data
+    def update(self, instance, validated_data):
+        coordinates = self.pop_coordinates(validated_data)
+        pool = super().update(instance, validated_data)
+        self.fill_coordinates(pool, coordinates)
+        return pool
 
     def validate(self, data):
         # total_persons cannot be less than current_persons.
         
         instance = self.instance
 
+        for latitude, longitude in self.COORDINATE_FIELDS.values():
+            if (latitude in data) != (longitude in data):
+                raise serializers.ValidationError({latitude: f"{latitude} and {longitude} go together."})
+
+        # A new pool starts with its creator on board.
+        if not instance and data.get('total_persons', 1) < 1:
+            raise serializers.ValidationError(
+                {"total_persons": "Total persons must be at least 1."}
+            )
+
         if instance and 'total_persons' in data:
             new_total = data['total_persons']
             if new_total < instance.current_persons:
@@ -39,4 +84,51 @@ class PoolSerializer(serializers.ModelSerializer):
                     {"total_persons": "Total persons cannot be less than the current number of members."}
                 )
         
-        return data
\ No newline at end of file
+        return data
+
+class ArchivedPoolMemberSerializer(serializers.ModelSerializer):
+    full_name = serializers.ReadOnlyField(source='user.full_name')
+    phone_number = serializers.ReadOnlyField(source='user.phone_number')
+    gender = serializers.ReadOnlyField(source='user.gender')
+    class Meta:
+        model = ArchivedPoolMember
+        fields = ['full_name', 'phone_number', 'gender', 'is_creator', 'pool']
+
+class ArchivedPoolSerializer(serializers.ModelSerializer):
+    created_by = CustomUserLimitedSerializer(read_only = True)
+    members = ArchivedPoolMemberSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = ArchivedPool
+        fields = '__all__'
+
+class WeekdaysField(serializers.Field):
+    """A weekday bitmask (bit 0 = Monday) as a list of day names, e.g. ["Mon", "Wed", "Fri"]."""
+    default_error_messages = {
+        'invalid': 'Expected a non-empty list of weekdays from {days}.',
+    }
+
+    def to_representation(self, value):
+        return [day for i, day in enumerate(PoolTemplate.WEEKDAYS) if value & (1 << i)]
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list) or not data or any(day not in PoolTemplate.WEEKDAYS for day in data):
+            self.fail('invalid', days=', '.join(PoolTemplate.WEEKDAYS))
+        return sum(1 << PoolTemplate.WEEKDAYS.index(day) for day in set(data))
+
+class PoolTemplateSerializer(serializers.ModelSerializer):
+    weekdays = WeekdaysField()
+
+    class Meta:
+        model = PoolTemplate
+        exclude = ['created_by']
+        read_only_fields = ['generated_until']
+
+    def validate(self, data):
+        if data.get('total_persons', getattr(self.instance, 'total_persons', 1)) < 1:
+            raise serializers.ValidationError({"total_persons": "Total persons must be at least 1."})
+        starts_on = data.get('starts_on', getattr(self.instance, 'starts_on', None))
+        ends_on = data.get('ends_on', getattr(self.instance, 'ends_on', None))
+        if starts_on and ends_on and ends_on < starts_on:
+            raise serializers.ValidationError({"ends_on": "Cannot be before starts_on."})
+        return data
@@ -0,0 +1,54 @@
+"""
+Background jobs for pools (run by the job queue, see jobs/queue.py).
+
+Each takes ids and re-reads the rows, so a job that runs late sees the current
+state, and does nothing when the pool has been archived or the user deleted
+in the meantime.
+"""
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.utils import timezone
+
+from authentication.models import CustomUser
+from jobs.queue import task
+
+from .models import Pool
+
+
+def describe(pool):
+    # Riders' local time, the zone recurring pools are defined in too.
+    zone = ZoneInfo(settings.POOL_TEMPLATE_TIME_ZONE)
+    departure = timezone.localtime(pool.departure_time, zone).strftime('%d %b %Y, %H:%M')
+    return f"{pool.start_point} to {pool.end_point} on {departure}"
+
+
+@task
+def notify_creator_of_join(pool_id, user_id):
+    pool = Pool.objects.select_related('created_by').filter(pk=pool_id).first()
+    user = CustomUser.objects.filter(pk=user_id).only('full_name').first()
+    if pool is None or user is None:
+        return
+    send_mail(
+        f"{user.full_name} joined your pool",
+        f"{user.full_name} joined your pool {describe(pool)}. "
+        f"{pool.current_persons} of {pool.total_persons} seats are now taken.",
+        settings.DEFAULT_FROM_EMAIL,
+        [pool.created_by.email],
+    )
+
+
+@task
+def notify_promoted_from_waitlist(pool_id, user_id):
+    pool = Pool.objects.filter(pk=pool_id).first()
+    user = CustomUser.objects.filter(pk=user_id).only('email').first()
+    if pool is None or user is None:
+        return
+    send_mail(
+        "You have a seat",
+        f"A seat opened up in the pool {describe(pool)} and it is yours: "
+        "you have been moved from the waitlist to the members.",
+        settings.DEFAULT_FROM_EMAIL,
+        [user.email],
+    )
@@ -1,3 +1,1089 @@
-from django.test import TestCase
+import csv
+import importlib
+import json
+import math
+import threading
+from datetime import time, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
\ No newline at end of file
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import clear_url_caches, resolve
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from authentication.models import CustomUser
+from authentication.tokens import EventStreamTicket, ProfileRefreshToken
+from authentication.user_cache import get_cached_user, user_cache
+from Pool import geo, urls as pool_urls
+from Pool.cache import bump_version, pool_cache
+from Pool.events import publish_pool_event
+from Pool.management.commands.archive_pools import copy_rows_sql
+from Pool.models import (
+    ArchivedPool, ArchivedPoolMember, Location, Pool, PoolMember, PoolTemplate, WaitlistEntry, attach_locations,
+    nearby_locations,
+)
+from Pool.recurring import expand_template
+from Pool.views import PoolViewSet
+
+
+def reload_pool_urls():
+    # Pool/urls.py picks the routes for settings.ASYNC_READS when it is imported, and the
+    # root URLconf's include() keeps the patterns it has already resolved.
+    importlib.reload(pool_urls)
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+def make_user(n, gender='Male'):
+    return CustomUser.objects.create_user(
+        email=f'user{n}@thapar.edu',
+        full_name=f'User {n}',
+        phone_number=f'98{n:08d}',
+        gender=gender,
+    )
+
+
+def make_pool(creator, total_persons=4, **kwargs):
+    departure = kwargs.pop('departure_time', timezone.now() + timedelta(days=1))
+    kwargs.setdefault('end_point', 'Patiala Railway Station')
+    kwargs.setdefault('transport_mode', 'Cab')
+    pool = Pool.objects.create(
+        departure_time=departure,
+        arrival_time=departure + timedelta(hours=1),
+        total_persons=total_persons,
+        created_by=creator,
+        **kwargs,
+    )
+    PoolMember.objects.create(pool=pool, user=creator, is_creator=True)
+    return pool
+
+
+def join(user, pool):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client.post(f'/pools/{pool.pk}/join/')
+
+
+def walk_pages(client, params, page_size=2):
+    """Page forwards to the end and back to the start; returns the ids seen each way."""
+    response = client.get('/pools/', {**params, 'page_size': page_size})
+    forwards, pages = [], []
+    while True:
+        pages.append([row['id'] for row in response.data['results']])
+        forwards += pages[-1]
+        if response.data['next'] is None:
+            break
+        response = client.get(response.data['next'])
+    backwards = list(pages[-1])
+    while response.data['previous'] is not None:
+        response = client.get(response.data['previous'])
+        backwards = [row['id'] for row in response.data['results']] + backwards
+    return forwards, backwards
+
+
+def pool_action(user, pool, name, method='post', **data):
+    client = APIClient()
+    client.force_authenticate(user)
+    return getattr(client, method)(f'/pools/{pool.pk}/{name}/', data, format='json')
+
+
+class PoolJoinTests(TestCase):
+    def setUp(self):
+        self.creator = make_user(0)
+        self.pool = make_pool(self.creator, total_persons=2)
+
+    def test_join_takes_a_seat(self):
+        response = join(make_user(1), self.pool)
+
+        self.assertEqual(response.status_code, 200)
+        self.pool.refresh_from_db()
+        self.assertEqual(self.pool.current_persons, 2)
+        self.assertEqual(self.pool.members.count(), 2)
+
+    def test_join_rejects_duplicates_and_full_pools(self):
+        member = make_user(1)
+        join(member, self.pool)
+
+        self.assertEqual(join(member, self.pool).status_code, 400)
+        self.assertEqual(join(make_user(2), self.pool).data['detail'], 'This pool is already full.')
+        self.pool.refresh_from_db()
+        self.assertEqual(self.pool.current_persons, 2)
+
+    def test_database_enforces_membership_and_capacity(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            PoolMember.objects.create(pool=self.pool, user=self.creator)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Pool.objects.filter(pk=self.pool.pk).update(current_persons=3)
+
+
+class PoolJoinConcurrencyTests(TransactionTestCase):
+    joiners = 12
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('An in-memory SQLite database cannot be shared between threads.')
+
+    def test_parallel_joins_never_oversell(self):
+        pool = make_pool(make_user(0), total_persons=4)
+        users = [make_user(n) for n in range(1, self.joiners + 1)]
+        barrier = threading.Barrier(len(users))
+        statuses = []
+
+        def worker(user):
+            try:
+                barrier.wait()
+                statuses.append(join(user, pool).status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        pool.refresh_from_db()
+        self.assertEqual(statuses.count(200), 3)
+        self.assertEqual(statuses.count(400), self.joiners - 3)
+        self.assertEqual(pool.current_persons, pool.total_persons)
+        self.assertEqual(pool.members.count(), pool.current_persons)
+
+
+class PoolWaitlistTests(TestCase):
+    def setUp(self):
+        self.creator = make_user(0, gender='Female')
+        self.pool = make_pool(self.creator, total_persons=2)
+        self.member = make_user(1)
+        join(self.member, self.pool)
+
+    def assertSeatsMatchMembers(self):
+        self.pool.refresh_from_db()
+        self.assertEqual(self.pool.current_persons, self.pool.members.count())
+
+    def test_full_pool_queues_in_order(self):
+        first, second = make_user(2), make_user(3)
+
+        self.assertEqual(pool_action(first, self.pool, 'waitlist').data['position'], 1)
+        self.assertEqual(pool_action(second, self.pool, 'waitlist').data['position'], 2)
+        self.assertEqual(pool_action(second, self.pool, 'waitlist', method='get').data['position'], 2)
+        self.assertEqual(pool_action(second, self.pool, 'waitlist').status_code, 400)
+
+    def test_leaving_promotes_the_head_of_the_waitlist(self):
+        first, second = make_user(2), make_user(3)
+        pool_action(first, self.pool, 'waitlist')
+        pool_action(second, self.pool, 'waitlist')
+
+        self.assertEqual(pool_action(self.member, self.pool, 'leave').status_code, 200)
+
+        self.assertTrue(self.pool.members.filter(user=first).exists())
+        self.assertFalse(self.pool.members.filter(user=self.member).exists())
+        self.assertEqual(pool_action(second, self.pool, 'waitlist', method='get').data['position'], 1)
+        self.assertSeatsMatchMembers()
+        self.assertEqual(self.pool.current_persons, 2)
+
+    def test_leaving_with_nobody_waiting_frees_the_seat(self):
+        self.assertEqual(pool_action(self.member, self.pool, 'leave').status_code, 200)
+        self.assertEqual(pool_action(self.member, self.pool, 'leave').status_code, 400)
+        self.assertEqual(pool_action(self.creator, self.pool, 'leave').status_code, 400)
+        self.assertSeatsMatchMembers()
+        self.assertEqual(self.pool.current_persons, 1)
+
+        # With a seat free, the waitlist seats straight away.
+        self.assertEqual(pool_action(make_user(2), self.pool, 'waitlist').status_code, 200)
+        self.assertSeatsMatchMembers()
+        self.assertEqual(self.pool.current_persons, 2)
+
+    def test_added_seats_go_to_the_waitlist(self):
+        waiting = [make_user(n) for n in (2, 3, 4)]
+        for user in waiting:
+            pool_action(user, self.pool, 'waitlist')
+
+        client = APIClient()
+        client.force_authenticate(self.creator)
+        response = client.patch(f'/pools/{self.pool.pk}/', {'total_persons': 4}, format='json')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            set(self.pool.members.filter(is_creator=False).values_list('user_id', flat=True)),
+            {self.member.pk, waiting[0].pk, waiting[1].pk},
+        )
+        self.assertEqual(list(WaitlistEntry.objects.values_list('user_id', flat=True)), [waiting[2].pk])
+        self.assertSeatsMatchMembers()
+        self.assertEqual(self.pool.current_persons, 4)
+
+    def test_cancelled_and_ineligible_entries_are_skipped(self):
+        cancelled, male, female = make_user(2), make_user(3), make_user(4, gender='Female')
+        for user in (cancelled, male, female):
+            pool_action(user, self.pool, 'waitlist')
+        self.assertEqual(pool_action(cancelled, self.pool, 'waitlist', method='delete').status_code, 200)
+        Pool.objects.filter(pk=self.pool.pk).update(is_female_only=True)
+
+        pool_action(self.member, self.pool, 'leave')
+
+        self.assertTrue(self.pool.members.filter(user=female).exists())
+        self.assertFalse(WaitlistEntry.objects.exists())
+        self.assertSeatsMatchMembers()
+
+
+class PoolCacheTests(TestCase):
+    def setUp(self):
+        pool_cache().clear()
+        user_cache().clear()
+        self.creator = make_user(0)
+        self.pool = make_pool(self.creator)
+        self.client = APIClient()
+        self.client.force_authenticate(self.creator)
+
+    def test_reads_are_cached_until_a_pool_changes(self):
+        self.assertEqual(self.client.get('/pools/')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/pools/')['X-Cache'], 'HIT')
+        self.assertEqual(self.client.get(f'/pools/{self.pool.pk}/')['X-Cache'], 'MISS')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            join(make_user(1), self.pool)
+
+        response = self.client.get('/pools/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['current_persons'], 2)
+        self.assertEqual(self.client.get(f'/pools/{self.pool.pk}/')['X-Cache'], 'MISS')
+
+    def test_response_variants_do_not_evict_user_entries(self):
+        get_cached_user(self.creator.pk)
+        for n in range(400):
+            self.client.get('/pools/', {'search': f'stop {n}'})
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_cached_user(self.creator.pk), self.creator)
+
+
+class PoolListQueryTests(TestCase):
+    def setUp(self):
+        pool_cache().clear()
+        self.creator = make_user(0)
+        self.client = APIClient()
+        self.client.force_authenticate(self.creator)
+
+    def test_query_count_does_not_grow_with_pools_or_members(self):
+        # The list ETag aggregate, the pools with their creators, and the members prefetch.
+        make_pool(self.creator)
+        with self.assertNumQueries(3):
+            self.assertEqual(len(self.client.get('/pools/').data['results']), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for n in range(1, 6):
+                pool = make_pool(make_user(n))
+                join(make_user(n + 10), pool)
+                join(make_user(n + 20), pool)
+        with self.assertNumQueries(3):
+            response = self.client.get('/pools/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertEqual(
+            sorted(len(pool['members']) for pool in response.data['results']), [1, 3, 3, 3, 3, 3]
+        )
+
+
+class PoolFacetsTests(TestCase):
+    def setUp(self):
+        pool_cache().clear()
+        self.user = make_user(0, gender='Female')
+        make_pool(self.user, start_point='Thapar University', fare_per_head=120)
+        make_pool(self.user, start_point='Thapar University', fare_per_head=80, is_female_only=True)
+        make_pool(self.user, start_point='Thapar University', end_point='Chandigarh', transport_mode='Bus')
+        make_pool(self.user, start_point='Patiala Bus Stand', fare_per_head=300, is_female_only=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_counts_each_place_mode_and_fare_range(self):
+        facets = self.client.get('/pools/facets/').data
+
+        self.assertEqual(facets['total'], 4)
+        self.assertEqual(facets['female_only'], 2)
+        self.assertEqual(facets['start_points'], [
+            {'value': 'Thapar University', 'count': 3}, {'value': 'Patiala Bus Stand', 'count': 1},
+        ])
+        self.assertEqual(facets['end_points'], [
+            {'value': 'Patiala Railway Station', 'count': 3}, {'value': 'Chandigarh', 'count': 1},
+        ])
+        self.assertEqual(facets['transport_modes'], [{'value': 'Cab', 'count': 3}, {'value': 'Bus', 'count': 1}])
+        # The pool without a fare is counted but does not pull the range down.
+        self.assertEqual(facets['fare'], {'min': Decimal('80'), 'max': Decimal('300')})
+
+    def test_fare_range_is_null_when_no_pool_has_a_fare(self):
+        facets = self.client.get('/pools/facets/', {'transport_mode': 'Bus'}).data
+
+        self.assertEqual(facets['total'], 1)
+        self.assertEqual(facets['fare'], {'min': None, 'max': None})
+
+    def test_facets_respect_the_current_filters(self):
+        facets = self.client.get('/pools/facets/', {'start_point': 'Thapar University'}).data
+
+        self.assertEqual(facets['total'], 3)
+        self.assertEqual(facets['female_only'], 1)
+        self.assertEqual(facets['start_points'], [{'value': 'Thapar University', 'count': 3}])
+        self.assertEqual(facets['fare'], {'min': Decimal('80'), 'max': Decimal('120')})
+
+        facets = self.client.get('/pools/facets/', {'is_female_only': 'true'}).data
+        self.assertEqual(facets['total'], 2)
+        self.assertEqual(facets['female_only'], 2)
+        self.assertEqual(facets['transport_modes'], [{'value': 'Cab', 'count': 2}])
+
+    def test_departed_pools_are_not_counted(self):
+        make_pool(self.user, departure_time=timezone.now() - timedelta(hours=1), is_female_only=True)
+
+        facets = self.client.get('/pools/facets/').data
+        self.assertEqual(facets['total'], 4)
+        self.assertEqual(facets['female_only'], 2)
+
+
+class PoolExportTests(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(email='admin@thapar.edu', full_name='Admin')
+        self.creator, self.rider = make_user(0), make_user(1)
+        self.upcoming = make_pool(self.creator, fare_per_head=150, description='Cab, with luggage')
+        join(self.rider, self.upcoming)
+        # Exports cover departed pools too, unlike the list.
+        self.departed = make_pool(
+            self.creator, departure_time=timezone.now() - timedelta(hours=2), end_point='Chandigarh',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def export(self, **params):
+        response = self.client.get('/pools/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_ndjson_streams_one_object_per_pool(self):
+        response, body = self.export()
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="pools.ndjson"')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.upcoming.pk, self.departed.pk])
+        self.assertEqual(list(rows[0]), PoolViewSet.export_fields)
+        self.assertEqual(rows[0]['created_by'], self.creator.email)
+        self.assertEqual(rows[0]['fare_per_head'], '150.00')
+        self.assertEqual(
+            [(member['email'], member['is_creator']) for member in rows[0]['members']],
+            [(self.creator.email, True), (self.rider.email, False)],
+        )
+        self.assertEqual(len(rows[1]['members']), 1)
+
+    def test_csv_has_a_header_and_the_selected_fields_in_order(self):
+        response, body = self.export(export='csv', fields='end_point, id,members')
+
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="pools.csv"')
+        header, *rows = list(csv.reader(StringIO(body)))
+        self.assertEqual(header, ['end_point', 'id', 'members'])
+        self.assertEqual([row[:2] for row in rows], [
+            ['Patiala Railway Station', str(self.upcoming.pk)], ['Chandigarh', str(self.departed.pk)],
+        ])
+        # Nested members go into one cell as JSON.
+        self.assertEqual([member['email'] for member in json.loads(rows[0][2])], [self.creator.email, self.rider.email])
+
+    def test_exports_respect_the_list_filters(self):
+        _, body = self.export(end_point='Chandigarh', fields='id')
+
+        self.assertEqual([json.loads(line) for line in body.splitlines()], [{'id': self.departed.pk}])
+
+    def test_unknown_fields_and_formats_are_rejected(self):
+        for params in ({'fields': 'id,password'}, {'fields': ' , '}, {'export': 'xml'}):
+            response = self.client.get('/pools/export/', params)
+            self.assertEqual(response.status_code, 400, params)
+        self.assertIn('password', str(self.client.get('/pools/export/', {'fields': 'password'}).data['fields']))
+
+    def test_only_staff_can_export(self):
+        client = APIClient()
+        client.force_authenticate(self.creator)
+        self.assertEqual(client.get('/pools/export/').status_code, 403)
+
+
+class PoolMineTests(TestCase):
+    def setUp(self):
+        pool_cache().clear()
+        self.user, self.other = make_user(0), make_user(1)
+        now = timezone.now()
+        self.created = [make_pool(self.user, departure_time=now + timedelta(days=n)) for n in (2, 1)]
+        self.joined = make_pool(self.other, departure_time=now + timedelta(days=3))
+        join(self.user, self.joined)
+        self.past_created = make_pool(self.user, departure_time=now - timedelta(days=1))
+        self.past_joined = make_pool(self.other, departure_time=now - timedelta(hours=1))
+        PoolMember.objects.create(pool=self.past_joined, user=self.user)
+        # Neither created nor joined by the user.
+        make_pool(self.other)
+        make_pool(self.other, departure_time=now - timedelta(hours=2))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def mine(self, **params):
+        response = self.client.get('/pools/mine/', params)
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_upcoming_rides_soonest_first(self):
+        self.assertEqual(self.mine(), [self.created[1].pk, self.created[0].pk, self.joined.pk])
+        self.assertEqual(self.mine(role='created'), [self.created[1].pk, self.created[0].pk])
+        self.assertEqual(self.mine(role='joined'), [self.joined.pk])
+
+    def test_past_rides_latest_first(self):
+        self.assertEqual(self.mine(when='past'), [self.past_joined.pk, self.past_created.pk])
+        self.assertEqual(self.mine(when='past', role='created'), [self.past_created.pk])
+        self.assertEqual(self.mine(when='past', role='joined'), [self.past_joined.pk])
+
+    def test_archived_rides_move_from_mine_to_history(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('archive_pools', stdout=StringIO())
+
+        self.assertEqual(self.mine(when='past'), [])
+        history = self.client.get('/pools/history/').data['results']
+        self.assertCountEqual([row['id'] for row in history], [self.past_created.pk, self.past_joined.pk])
+        self.assertEqual(self.mine(), [self.created[1].pk, self.created[0].pk, self.joined.pk])
+
+    def test_pages_follow_the_cursor(self):
+        response = self.client.get('/pools/mine/', {'page_size': 2})
+        ids = [row['id'] for row in response.data['results']]
+        self.assertIsNone(response.data['previous'])
+
+        response = self.client.get(response.data['next'])
+        ids += [row['id'] for row in response.data['results']]
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(ids, [self.created[1].pk, self.created[0].pk, self.joined.pk])
+
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([row['id'] for row in response.data['results']], ids[:2])
+
+    def test_members_are_rendered(self):
+        response = self.client.get('/pools/mine/', {'role': 'joined'})
+
+        members = response.data['results'][0]['members']
+        self.assertEqual(sorted(member['is_creator'] for member in members), [False, True])
+
+    def test_unknown_params_are_rejected(self):
+        self.assertEqual(self.client.get('/pools/mine/', {'when': 'soon'}).status_code, 400)
+        self.assertEqual(self.client.get('/pools/mine/', {'role': 'driver'}).status_code, 400)
+
+
+class PoolAsyncReadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Registered first so that it runs after the setting is restored.
+        cls.addClassCleanup(reload_pool_urls)
+        cls.enterClassContext(override_settings(ASYNC_READS=True))
+        reload_pool_urls()
+
+    def setUp(self):
+        pool_cache().clear()
+        self.creator = make_user(0)
+        self.pool = make_pool(self.creator)
+        self.auth = {'authorization': f'Bearer {ProfileRefreshToken.for_user(self.creator).access_token}'}
+
+    def test_reads_are_routed_to_the_async_handlers(self):
+        for path in ('/pools/', f'/pools/{self.pool.pk}/'):
+            self.assertTrue(iscoroutinefunction(resolve(path).func), path)
+
+    async def test_list_is_cached_after_the_first_read(self):
+        first = await self.async_client.get('/pools/', headers=self.auth)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual([row['id'] for row in first.json()['results']], [self.pool.pk])
+
+        second = await self.async_client.get('/pools/', headers=self.auth)
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.json(), first.json())
+
+    async def test_unchanged_reads_answer_304(self):
+        for path in ('/pools/', f'/pools/{self.pool.pk}/'):
+            etag = (await self.async_client.get(path, headers=self.auth))['ETag']
+            response = await self.async_client.get(path, headers={**self.auth, 'if-none-match': etag})
+            self.assertEqual(response.status_code, 304, path)
+
+    async def test_retrieve(self):
+        response = await self.async_client.get(f'/pools/{self.pool.pk}/', headers=self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['id'], self.pool.pk)
+
+        response = await self.async_client.get(f'/pools/{self.pool.pk + 1000}/', headers=self.auth)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual((await self.async_client.get('/pools/')).status_code, 401)
+
+    async def test_writes_fall_back_to_the_sync_viewset(self):
+        departure = timezone.now() + timedelta(days=2)
+        response = await self.async_client.post('/pools/', {
+            'end_point': 'Chandigarh',
+            'departure_time': departure.isoformat(),
+            'arrival_time': (departure + timedelta(hours=2)).isoformat(),
+            'transport_mode': 'Bus',
+            'total_persons': 3,
+        }, content_type='application/json', headers=self.auth)
+
+        self.assertEqual(response.status_code, 201)
+        pool = await Pool.objects.aget(pk=response.json()['id'])
+        self.assertEqual(pool.created_by_id, self.creator.pk)
+        self.assertTrue(await PoolMember.objects.filter(pool=pool, user=self.creator, is_creator=True).aexists())
+
+
+class PoolEventsTests(TestCase):
+    def setUp(self):
+        user_cache().clear()
+        self.user = make_user(0)
+        self.pool = make_pool(self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def ticket(self):
+        response = self.client.post('/pools/events/ticket/')
+        self.assertEqual(response.status_code, 200)
+        return response.data['ticket']
+
+    def publish(self, event_type, pool):
+        with self.captureOnCommitCallbacks(execute=True):
+            publish_pool_event(event_type, pool.pk)
+
+    def test_the_stream_needs_a_ticket(self):
+        access = str(ProfileRefreshToken.for_user(self.user).access_token)
+        expired = EventStreamTicket.for_user(self.user)
+        expired.set_exp(lifetime=-timedelta(seconds=1))
+
+        # No ticket, an access token (not accepted in the URL) and an expired ticket.
+        for params in ({}, {'ticket': access}, {'ticket': str(expired)}, {'token': access}):
+            self.assertEqual(self.client.get('/pools/events/', params).status_code, 401, params)
+        self.assertEqual(APIClient().post('/pools/events/ticket/').status_code, 401)
+
+        # A ticket opens nothing else.
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.ticket()}')
+        self.assertEqual(client.get('/pools/').status_code, 401)
+
+    def test_incomplete_profiles_cannot_subscribe(self):
+        CustomUser.objects.filter(pk=self.user.pk).update(phone_number=None)
+        ticket = EventStreamTicket.for_user(self.user)
+        user_cache().clear()
+
+        self.assertEqual(self.client.get('/pools/events/', {'ticket': str(ticket)}).status_code, 403)
+
+    async def test_subscribers_receive_matching_events(self):
+        ticket = await sync_to_async(self.ticket)()
+        other = await sync_to_async(make_pool)(self.user, end_point='Chandigarh')
+        response = await self.async_client.get('/pools/events/', {'ticket': ticket, 'end_point': 'Chandigarh'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        try:
+            self.assertTrue((await anext(stream)).startswith(b'retry:'))
+
+            # Filtered out: the stream only carries pools going to Chandigarh.
+            await sync_to_async(self.publish)('pool.updated', self.pool)
+            await sync_to_async(self.publish)('pool.joined', other)
+
+            event = (await anext(stream)).decode()
+            self.assertTrue(event.startswith('id: '))
+            self.assertIn('event: pool.joined\n', event)
+            data = json.loads(event.split('data: ', 1)[1])
+            self.assertEqual(data['pool']['id'], other.pk)
+        finally:
+            await stream.aclose()
+
+
+class PoolSearchPaginationTests(TestCase):
+    def setUp(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('Ranked search needs PostgreSQL.')
+        pool_cache().clear()
+        self.user = make_user(0)
+        # Equal ranks (identical rows) and near-equal ones, so pages split ties.
+        self.pools = [make_pool(self.user, description=f'Cab share {n % 3}') for n in range(7)]
+        self.pools += [make_pool(self.user, end_point='Patiala Bus Stand') for _ in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_ranked_pages_neither_repeat_nor_skip_rows(self):
+        forwards, backwards = walk_pages(self.client, {'search': 'Patiala'})
+
+        self.assertCountEqual(forwards, [pool.pk for pool in self.pools])
+        self.assertEqual(backwards, forwards)
+
+
+class PoolConditionalRequestTests(TestCase):
+    def setUp(self):
+        pool_cache().clear()
+        self.creator = make_user(0)
+        self.pool = make_pool(self.creator)
+        self.client = APIClient()
+        self.client.force_authenticate(self.creator)
+
+    def test_unchanged_resources_answer_304(self):
+        for path in ('/pools/', f'/pools/{self.pool.pk}/'):
+            etag = self.client.get(path)['ETag']
+            response = self.client.get(path, headers={'if-none-match': etag})
+            self.assertEqual(response.status_code, 304)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                Pool.objects.filter(pk=self.pool.pk).update(updated_at=timezone.now() + timedelta(seconds=1))
+            response = self.client.get(path, headers={'if-none-match': etag})
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+
+    def test_removing_a_pool_changes_the_list(self):
+        other = make_pool(self.creator)
+        first = self.client.get('/pools/')
+        self.assertNotIn('Last-Modified', first)
+
+        # Removed the way archive_pools removes pools.
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+            bump_version()
+        response = self.client.get('/pools/', headers={
+            'if-none-match': first['ETag'], 'if-modified-since': 'Fri, 01 Jan 2100 00:00:00 GMT',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([pool['id'] for pool in response.data['results']], [self.pool.pk])
+        response = self.client.get('/pools/', headers={'if-modified-since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_malformed_and_unknown_ids_are_404(self):
+        self.assertEqual(self.client.get('/pools/abc/').status_code, 404)
+        self.assertEqual(self.client.get(f'/pools/{self.pool.pk + 1000}/').status_code, 404)
+
+
+class ArchivePoolsTests(TestCase):
+    def setUp(self):
+        pool_cache().clear()
+        self.creator, self.rider = make_user(0), make_user(1)
+        now = timezone.now()
+        # Departed an hour ago and still on the road, departed yesterday, and upcoming.
+        self.departed = [
+            make_pool(self.creator, departure_time=now - timedelta(hours=1), fare_per_head=120, description='Cab'),
+            make_pool(self.creator, departure_time=now - timedelta(days=1)),
+        ]
+        self.upcoming = make_pool(self.creator)
+        for pool in [*self.departed, self.upcoming]:
+            join(self.rider, pool)
+        self.client = APIClient()
+        self.client.force_authenticate(self.rider)
+
+    def test_departed_pools_move_to_history(self):
+        originals = {pool.pk: Pool.objects.values().get(pk=pool.pk) for pool in self.departed}
+        member_ids = set(PoolMember.objects.filter(pool__in=self.departed).values_list('id', flat=True))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('archive_pools', batch_size=1, stdout=StringIO())
+
+        self.assertEqual(list(Pool.objects.values_list('id', flat=True)), [self.upcoming.pk])
+        for pool_id, original in originals.items():
+            archived = ArchivedPool.objects.values().get(pk=pool_id)
+            self.assertIsNotNone(archived.pop('archived_at'))
+            self.assertEqual(archived, original)
+        self.assertEqual(set(ArchivedPoolMember.objects.values_list('id', flat=True)), member_ids)
+
+        history = self.client.get('/pools/history/').data['results']
+        self.assertCountEqual([row['id'] for row in history], originals)
+        self.assertEqual(
+            [row['id'] for row in self.client.get('/pools/').data['results']], [self.upcoming.pk]
+        )
+
+    def test_archive_tables_mirror_the_hot_ones(self):
+        def columns(model):
+            return [field.column for field in model._meta.concrete_fields]
+
+        self.assertEqual(columns(ArchivedPool), columns(Pool) + ['archived_at'])
+        self.assertEqual(columns(ArchivedPoolMember), columns(PoolMember))
+        quoted = ', '.join(connection.ops.quote_name(column) for column in columns(Pool))
+        sql = copy_rows_sql(Pool, ArchivedPool, 'id', 2, extra_columns=[('archived_at', '%s')])
+        self.assertIn(f'({quoted}, "archived_at") SELECT {quoted}, %s FROM', sql)
+        self.assertTrue(sql.endswith('IN (%s, %s)'))
+
+
+class PoolMatchTests(TestCase):
+    def setUp(self):
+        self.creator = make_user(0, gender='Female')
+        self.rider = make_user(1)
+        self.at = timezone.now() + timedelta(days=2)
+
+    def pool_at(self, minutes, **kwargs):
+        return make_pool(self.creator, departure_time=self.at + timedelta(minutes=minutes), **kwargs)
+
+    def match(self, user=None, **params):
+        client = APIClient()
+        client.force_authenticate(user or self.rider)
+        response = client.get('/pools/match/', {'time': self.at.isoformat(), **params})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_only_joinable_pools_in_the_window_match(self):
+        inside = self.pool_at(10)
+        self.pool_at(45)
+        full = self.pool_at(5, total_persons=1)
+        female_only = self.pool_at(-5, is_female_only=True)
+
+        self.assertEqual(self.match(), [inside.pk])
+        self.assertEqual(self.match(user=make_user(2, gender='Female')), [female_only.pk, inside.pk])
+        self.assertNotIn(full.pk, self.match(window=60))
+
+    def test_seats_must_all_be_free(self):
+        pair = self.pool_at(0, total_persons=3)
+        single = self.pool_at(1, total_persons=2)
+
+        self.assertEqual(self.match(), [pair.pk, single.pk])
+        self.assertEqual(self.match(seats=2), [pair.pk])
+        self.assertEqual(self.match(seats=3), [])
+
+    def test_ranked_by_time_and_destination(self):
+        late, early, station = self.pool_at(20), self.pool_at(-3), self.pool_at(-10)
+        Pool.objects.filter(pk__in=[late.pk, early.pk]).update(end_point='Chandigarh ISBT 43')
+
+        self.assertEqual(self.match(), [early.pk, station.pk, late.pk])
+        self.assertEqual(self.match(end_point='Chandigarh'), [early.pk, late.pk])
+        self.assertEqual(self.match(end_point='Railway Station'), [station.pk])
+
+    def test_a_crowded_window_keeps_the_closest_candidates(self):
+        far_before, far_after = self.pool_at(-25), self.pool_at(25)
+        closest = [self.pool_at(-2), self.pool_at(1), self.pool_at(3)]
+
+        with mock.patch('Pool.matching.MAX_CANDIDATES', 3):
+            self.assertEqual(self.match(), [closest[1].pk, closest[0].pk, closest[2].pk])
+        self.assertEqual(len(self.match()), 5)
+
+    def test_own_and_joined_pools_are_left_out(self):
+        own = make_pool(self.rider, departure_time=self.at)
+        joined, other = self.pool_at(1), self.pool_at(2)
+        join(self.rider, joined)
+
+        self.assertEqual(self.match(), [other.pk])
+        self.assertEqual(self.match(user=self.creator), [own.pk])
+
+    def test_start_point_matches_the_place_however_it_is_written(self):
+        bus_stand = self.pool_at(0, start_point='Patiala Bus Stand')
+        self.pool_at(1)
+
+        self.assertEqual(self.match(start_point='  patiala BUS  stand'), [bus_stand.pk])
+        self.assertEqual(self.match(start_point='Patiala'), [])
+
+    def test_pools_gone_since_matching_are_skipped(self):
+        pool = self.pool_at(0)
+        with mock.patch('Pool.views.match_pools', return_value=[(pool.pk + 1000, 1.0, 0.0, None), (pool.pk, 0.9, 0.0, None)]):
+            self.assertEqual(self.match(), [pool.pk])
+
+
+@override_settings(POOL_TEMPLATE_TIME_ZONE='Asia/Kolkata', POOL_TEMPLATE_HORIZON_DAYS=7)
+class RecurringPoolTests(TestCase):
+    def setUp(self):
+        self.user = make_user(0, gender='Female')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.today = timezone.now().astimezone(ZoneInfo('Asia/Kolkata')).date()
+
+    def pool_row(self, **fields):
+        departure = timezone.now() + timedelta(days=1)
+        return {
+            'end_point': 'Patiala Railway Station',
+            'departure_time': departure.isoformat(),
+            'arrival_time': (departure + timedelta(hours=1)).isoformat(),
+            'transport_mode': 'Cab',
+            'total_persons': 4,
+            **fields,
+        }
+
+    def make_template(self, **fields):
+        return PoolTemplate.objects.create(**{
+            'created_by': self.user,
+            'end_point': 'Chandigarh ISBT 43',
+            'departure_time': time(23, 30),
+            'arrival_time': time(1, 15),
+            'weekdays': 0b0000101,  # Mon, Wed
+            'transport_mode': 'Bus',
+            'total_persons': 3,
+            'starts_on': self.today + timedelta(days=1),
+            **fields,
+        })
+
+    def test_bulk_create_is_all_or_nothing(self):
+        response = self.client.post('/pools/bulk/', [
+            self.pool_row(),
+            self.pool_row(end_point=''),
+            self.pool_row(total_persons=0),
+        ], format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertEqual(list(response.data[1]), ['end_point'])
+        self.assertEqual(list(response.data[2]), ['total_persons'])
+        self.assertFalse(Pool.objects.exists())
+
+        response = self.client.post('/pools/bulk/', [self.pool_row(), self.pool_row()], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            list(PoolMember.objects.filter(is_creator=True).order_by('pool_id').values_list('pool_id', flat=True)),
+            response.data['created'],
+        )
+
+    def test_female_only_pools_need_a_female_creator(self):
+        client = APIClient()
+        client.force_authenticate(make_user(1))
+
+        response = client.post('/pools/bulk/', [self.pool_row(), self.pool_row(is_female_only=True)], format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Pool.objects.exists())
+
+        response = client.post('/pool-templates/', {
+            'end_point': 'Omaxe Mall', 'departure_time': '18:00', 'arrival_time': '18:30', 'weekdays': ['Fri'],
+            'transport_mode': 'Auto', 'total_persons': 3, 'starts_on': self.today.isoformat(), 'is_female_only': True,
+        }, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(PoolTemplate.objects.exists())
+
+    def test_templates_expand_on_their_weekdays_in_local_time(self):
+        response = self.client.post('/pool-templates/', {
+            'end_point': 'Chandigarh ISBT 43', 'departure_time': '23:30', 'arrival_time': '01:15',
+            'weekdays': ['Mon', 'Wed'], 'transport_mode': 'Bus', 'total_persons': 3,
+            'starts_on': (self.today + timedelta(days=1)).isoformat(),
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['generated_until'], (self.today + timedelta(days=7)).isoformat())
+
+        zone = ZoneInfo('Asia/Kolkata')
+        expected = [
+            self.today + timedelta(days=n) for n in range(1, 8) if (self.today + timedelta(days=n)).weekday() in (0, 2)
+        ]
+        pools = Pool.objects.order_by('departure_time')
+        self.assertEqual([pool.departure_time.astimezone(zone).date() for pool in pools], expected)
+        for pool in pools:
+            self.assertEqual(pool.departure_time.astimezone(zone).time(), time(23, 30))
+            # Arrives after midnight, on the next day.
+            self.assertEqual(pool.arrival_time - pool.departure_time, timedelta(minutes=105))
+
+    def test_generated_until_advances_without_duplicates(self):
+        template = self.make_template(weekdays=0b1111111)
+
+        self.assertEqual(len(expand_template(template.pk, until=self.today + timedelta(days=3))), 3)
+        self.assertEqual(expand_template(template.pk, until=self.today + timedelta(days=3)), [])
+        self.assertEqual(len(expand_template(template.pk, until=self.today + timedelta(days=5))), 2)
+
+        template.refresh_from_db()
+        self.assertEqual(template.generated_until, self.today + timedelta(days=5))
+        departures = list(Pool.objects.values_list('departure_time', flat=True))
+        self.assertEqual(len(departures), len(set(departures)))
+
+        call_command('expand_pool_templates', stdout=StringIO())
+        self.assertEqual(Pool.objects.count(), 7)
+        self.assertEqual(PoolTemplate.objects.get().generated_until, self.today + timedelta(days=7))
+
+    def test_rejected_templates_are_reported_and_the_rest_expanded(self):
+        rejected = self.make_template(is_female_only=True)
+        kept = self.make_template(weekdays=0b1111111)
+        CustomUser.objects.filter(pk=self.user.pk).update(gender='Male')
+        stderr = StringIO()
+
+        with self.assertRaises(CommandError):
+            call_command('expand_pool_templates', stdout=StringIO(), stderr=stderr)
+
+        self.assertIn(f'Template {rejected.pk}', stderr.getvalue())
+        self.assertEqual(Pool.objects.count(), 7)
+        self.assertEqual(PoolTemplate.objects.get(pk=kept.pk).generated_until, self.today + timedelta(days=7))
+
+
+class PoolPaginationTests(TestCase):
+    def setUp(self):
+        pool_cache().clear()
+        self.user = make_user(0)
+        departure = timezone.now() + timedelta(days=1)
+        fares = [None, 100, 100, None, 50, 100, None, 75, 50]
+        # Three departure times shared by three pools each, and repeated or missing fares.
+        self.pools = [
+            make_pool(self.user, departure_time=departure + timedelta(hours=n % 3), fare_per_head=fare)
+            for n, fare in enumerate(fares)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def expected(self, key, descending=False):
+        # NULLs sort as the largest value; id breaks ties in the direction of the ordering.
+        def sort_key(pool):
+            value = getattr(pool, key)
+            return (value is None, value or 0, pool.pk)
+        return [pool.pk for pool in sorted(self.pools, key=sort_key, reverse=descending)]
+
+    def test_pages_cover_every_row_once_in_both_directions(self):
+        cases = [
+            ({}, self.expected('departure_time')),
+            ({'ordering': '-departure_time'}, self.expected('departure_time', descending=True)),
+            ({'ordering': 'fare_per_head'}, self.expected('fare_per_head')),
+            ({'ordering': '-fare_per_head'}, self.expected('fare_per_head', descending=True)),
+        ]
+        for params, expected in cases:
+            for page_size in (2, 4):
+                with self.subTest(**params, page_size=page_size):
+                    forwards, backwards = walk_pages(self.client, params, page_size)
+                    self.assertEqual(forwards, expected)
+                    self.assertEqual(backwards, expected)
+
+    def test_invalid_cursors_are_404(self):
+        self.assertEqual(self.client.get('/pools/', {'cursor': 'not-a-cursor'}).status_code, 404)
+
+
+class PoolSyncTests(TestCase):
+    def setUp(self):
+        pool_cache().clear()
+        self.user = make_user(0)
+        self.pools = [make_pool(self.user) for _ in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def sync(self, **params):
+        response = self.client.get('/pools/sync/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_without_since_everything_upcoming_is_sent(self):
+        data = self.sync()
+
+        self.assertFalse(data['reset'])
+        self.assertEqual([pool['id'] for pool in data['changed']], [pool.pk for pool in self.pools])
+        self.assertEqual(data['removed'], [])
+
+    def test_changes_committed_just_before_the_cursor_are_sent_again(self):
+        now = timezone.now()
+        Pool.objects.update(updated_at=now - timedelta(minutes=1))
+        cursor = self.sync()['cursor']
+        # Written by transactions that committed after the last sync read, with older timestamps.
+        Pool.objects.filter(pk=self.pools[0].pk).update(updated_at=now - timedelta(seconds=3))
+        Pool.objects.filter(pk=self.pools[1].pk).update(updated_at=now - timedelta(seconds=30))
+
+        data = self.sync(since=cursor)
+        self.assertEqual([pool['id'] for pool in data['changed']], [self.pools[0].pk])
+
+    def test_departed_and_archived_pools_are_removed(self):
+        now = timezone.now()
+        archived = make_pool(self.user, departure_time=now - timedelta(minutes=20))
+        # Left before `since`: already reported to the client.
+        make_pool(self.user, departure_time=now - timedelta(hours=2))
+        call_command('archive_pools', stdout=StringIO())
+        # Departed, not archived yet.
+        departed = make_pool(self.user, departure_time=now - timedelta(minutes=10))
+
+        data = self.sync(since=(now - timedelta(hours=1)).isoformat())
+        self.assertCountEqual(data['removed'], [departed.pk, archived.pk])
+
+    def test_too_many_changes_ask_for_a_reload(self):
+        with mock.patch.object(PoolViewSet, 'sync_limit', 2):
+            data = self.sync(since=(timezone.now() - timedelta(hours=1)).isoformat())
+
+        self.assertEqual(data, {'cursor': data['cursor'], 'reset': True, 'changed': [], 'removed': []})
+        with mock.patch.object(PoolViewSet, 'sync_limit', 3):
+            self.assertFalse(self.sync(since=(timezone.now() - timedelta(hours=1)).isoformat())['reset'])
+
+    def test_the_snapshot_is_never_reset(self):
+        # On reset the client reloads the snapshot, so the snapshot itself must always be sent.
+        with mock.patch.object(PoolViewSet, 'sync_limit', 2):
+            data = self.sync()
+
+        self.assertFalse(data['reset'])
+        self.assertEqual([pool['id'] for pool in data['changed']], [pool.pk for pool in self.pools])
+
+
+def destination(latitude, longitude, bearing, distance_km):
+    """The point distance_km from (latitude, longitude) along `bearing` (degrees), on a sphere."""
+    lat, lng, bearing = map(math.radians, (latitude, longitude, bearing))
+    angle = distance_km / geo.EARTH_RADIUS_KM
+    lat2 = math.asin(math.sin(lat) * math.cos(angle) + math.cos(lat) * math.sin(angle) * math.cos(bearing))
+    lng2 = lng + math.atan2(
+        math.sin(bearing) * math.sin(angle) * math.cos(lat), math.cos(angle) - math.sin(lat) * math.sin(lat2)
+    )
+    return math.degrees(lat2), (math.degrees(lng2) + 180) % 360 - 180
+
+
+class GeohashTests(SimpleTestCase):
+    def test_nearby_cells_cover_the_whole_radius(self):
+        lat_size, lng_size = geo.cell_degrees(5)
+        centres = [
+            (30.3564, 76.3647),
+            # Exactly on a corner shared by four precision-5 cells.
+            (-90 + 2730 * lat_size, -180 + 5831 * lng_size),
+            # Either side of the antimeridian.
+            (0.0, 179.999),
+            (-16.5, -179.99),
+        ]
+        for latitude, longitude in centres:
+            for radius in (0.5, 2, 5, 50):
+                cells = geo.nearby_cells(latitude, longitude, radius)
+                self.assertLessEqual(len(cells), 9)
+                for bearing in range(0, 360, 15):
+                    point = destination(latitude, longitude, bearing, radius * 0.999)
+                    with self.subTest(centre=(latitude, longitude), radius=radius, bearing=bearing):
+                        self.assertTrue(any(geo.encode(*point).startswith(cell) for cell in cells))
+
+    def test_prefix_upper_bound(self):
+        self.assertEqual(geo.prefix_upper_bound('u4pr'), 'u4ps')
+        self.assertEqual(geo.prefix_upper_bound('ttz'), 'tu')
+        self.assertIsNone(geo.prefix_upper_bound('zz'))
+        geohash = geo.encode(30.3564, 76.3647)
+        for length in range(1, len(geohash)):
+            self.assertTrue(geohash[:length] <= geohash < (geo.prefix_upper_bound(geohash[:length]) or '~'))
+
+
+class LocationTests(TestCase):
+    def test_names_differing_in_case_and_spacing_are_one_place(self):
+        found = Location.for_names(['  Patiala   Bus Stand', 'patiala bus stand'])
+        self.assertEqual(list(found), ['patiala bus stand'])
+        self.assertEqual(found['patiala bus stand'].name, 'Patiala   Bus Stand')
+
+        user = make_user(0)
+        pools = [make_pool(user, end_point='PATIALA BUS STAND '), make_pool(user, end_point='Patiala Bus Stand')]
+        pools.append(Pool(end_point='patiala  bus stand', start_point=' thapar UNIVERSITY'))
+        attach_locations(pools[2:])
+
+        self.assertEqual({pool.end_location_id for pool in pools}, {found['patiala bus stand'].pk})
+        self.assertEqual(pools[1].start_location, pools[2].start_location)
+        self.assertEqual(Location.objects.count(), 2)
+
+    def test_nearby_locations_across_the_antimeridian(self):
+        places = Location.for_names(['Taveuni East', 'Taveuni West', 'Suva'])
+        east, west, far = places['taveuni east'], places['taveuni west'], places['suva']
+        east.fill_coordinates(-16.8, 179.99)
+        west.fill_coordinates(-16.8, -179.99)
+        far.fill_coordinates(-18.14, 178.44)
+
+        distances = nearby_locations(-16.8, 179.999, 5)
+        self.assertEqual(set(distances), {east.pk, west.pk})
+        self.assertAlmostEqual(distances[west.pk], geo.haversine_km(-16.8, 179.999, -16.8, -179.99))
+
+
+class PoolNearbyTests(TestCase):
+    def setUp(self):
+        pool_cache().clear()
+        self.user = make_user(0)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        coordinates = {
+            'Thapar University': (30.3564, 76.3647),
+            'Leela Bhawan': (30.3368, 76.3856),  # ~2.9 km from Thapar
+            'Rajpura Junction': (30.4805, 76.5946),  # ~26 km
+        }
+        for name, location in Location.for_names(coordinates).items():
+            location.fill_coordinates(*coordinates[location.name])
+        self.pools = {name: make_pool(self.user, start_point=name) for name in coordinates}
+
+    def nearby(self, **params):
+        response = self.client.get('/pools/nearby/', {'lat': 30.3564, 'lng': 76.3647, **params})
+        self.assertEqual(response.status_code, 200)
+        return {row['id']: row['start_distance_km'] for row in response.data['results']}
+
+    def test_only_pools_starting_within_the_radius(self):
+        self.assertEqual(self.nearby(), {self.pools['Thapar University'].pk: 0.0})
+        found = self.nearby(radius=3)
+        self.assertEqual(set(found), {self.pools['Thapar University'].pk, self.pools['Leela Bhawan'].pk})
+        self.assertAlmostEqual(found[self.pools['Leela Bhawan'].pk], 2.9, delta=0.1)
+        self.assertEqual(len(self.nearby(radius=50)), 3)
+
+    def test_bad_coordinates_are_rejected(self):
+        for params in ({'lat': 91}, {'radius': 0}, {'radius': 51}, {'lng': 'east'}):
+            self.assertEqual(self.client.get('/pools/nearby/', {'lat': 30, 'lng': 76, **params}).status_code, 400)
@@ -1,10 +1,31 @@
 from rest_framework.routers import DefaultRouter
-from django.urls import path, include   
-from .views import PoolViewSet
+from django.conf import settings
+from django.urls import path, re_path, include
+from Transport_Pool.async_api import as_async_view
+from .views import PoolViewSet, PoolTemplateViewSet, pool_events
 
 router = DefaultRouter()
 router.register(r'pools', PoolViewSet, basename='pool')
+router.register(r'pool-templates', PoolTemplateViewSet, basename='pool-template')
 
 urlpatterns = [
+    # Before the router so "events" is not taken as a pool id
+    path('pools/events/', pool_events, name='pool-events'),
+]
+
+if settings.ASYNC_READS:
+    # GETs on the list and detail routes go to the async handlers; writes still reach the
+    # sync viewset. Numeric ids only, so the router's /pools/<action>/ routes stay reachable.
+    # Named like the router's routes they shadow so that they reverse (and report metrics) the same.
+    urlpatterns += [
+        path('pools/', as_async_view(PoolViewSet, {'get': 'list', 'post': 'create'}, get='alist'), name='pool-list'),
+        re_path(r'^pools/(?P<pk>[0-9]+)/$', as_async_view(
+            PoolViewSet,
+            {'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'},
+            get='aretrieve',
+        ), name='pool-detail'),
+    ]
+
+urlpatterns += [
     path('', include(router.urls)),
-]
\ No newline at end of file
+]
@@ -1,13 +1,39 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from django_filters.rest_framework import DjangoFilterBackend   
 from rest_framework import filters
-from .models import Pool, PoolMember
-from .serializers import PoolSerializer
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min, Prefetch, Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from datetime import timedelta
+from .models import (
+    Pool, PoolMember, ArchivedPool, ArchivedPoolMember, PoolTemplate, nearby_locations, normalize_place,
+)
+from .serializers import PoolSerializer, CustomUserLimitedSerializer, ArchivedPoolSerializer, PoolTemplateSerializer
+from .recurring import create_pools, expand_template, validate_pools
+from . import waitlist
+from .tasks import notify_creator_of_join
+from .matching import match_pools
+from .pagination import PoolCursorPagination
+from .search import PoolSearchFilter
+from .cache import bump_version, cache_response
+from .conditional import (
+    adetail_validators, alist_validators, conditional_response, detail_validators, list_validators,
+)
+from .events import EVENT_FILTER_FIELDS, get_broadcaster, publish_pool_event
+from authentication.authentication import ClaimsJWTAuthentication
+from authentication.tokens import EventStreamTicket
 from authentication.permissions import IsProfileComplete
+from jobs.queue import enqueue
+from Transport_Pool.export import CHUNK_SIZE, batches, export_format, export_response, selected_columns
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,21 +42,114 @@ class PoolViewSet(viewsets.ModelViewSet):
     queryset = Pool.objects.all()
     serializer_class = PoolSerializer
     permission_classes = [IsAuthenticated, IsProfileComplete]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['start_point', 'end_point', 'is_female_only', 'departure_time', 'arrival_time', 'fare_per_head']
-    search_fields = ['start_point', 'end_point']
+    filter_backends = [DjangoFilterBackend, PoolSearchFilter, filters.OrderingFilter]
+    filterset_fields = ['start_point', 'end_point', 'transport_mode', 'is_female_only', 'departure_time', 'arrival_time', 'fare_per_head']
+    search_fields = ['start_point', 'end_point', 'description']
     ordering_fields = ['departure_time', 'arrival_time', 'fare_per_head']
+    ordering = ['departure_time']
+    pagination_class = PoolCursorPagination
+    export_fields = [
+        'id', 'start_point', 'end_point', 'departure_time', 'arrival_time', 'transport_mode', 'total_persons',
+        'current_persons', 'fare_per_head', 'description', 'is_female_only', 'updated_at', 'created_by', 'members',
+    ]
+    # sync re-sends changes from slightly before the cursor so that a write which committed
+    # after the previous sync started (but stamped updated_at before it) is not missed.
+    sync_overlap = timedelta(seconds=5)
+    sync_limit = 500
+    match_window = 30  # minutes either side of the wanted time
+    match_max_window = 180
+    nearby_radius = 2  # km
+    nearby_max_radius = 50
+
+    def get_base_queryset(self):
+        # Pool rows for the current action, without the joins needed for rendering.
+        if self.action in ('list', 'facets', 'sync', 'nearby'):
+            # The list only serves rides that have not left yet; departed ones are
+            # moved out by archive_pools and served from `history`.
+            return Pool.objects.filter(departure_time__gte=timezone.now())
+        return Pool.objects.all()
+
+    def get_queryset(self):
+        queryset = self.get_base_queryset()
+        if self.action in ('join', 'leave', 'waitlist_entry', 'facets'):
+            return queryset
+
+        # Join the creator and prefetch members with their users in one extra query,
+        # loading only the columns PoolSerializer renders.
+        members = PoolMember.objects.select_related('user').only(
+            'pool_id', 'is_creator', 'user__full_name', 'user__phone_number', 'user__gender'
+        )
+        pool_fields = [field.name for field in Pool._meta.concrete_fields]
+        creator_fields = [f'created_by__{name}' for name in CustomUserLimitedSerializer.Meta.fields]
+        return (
+            queryset
+            .select_related('created_by')
+            .only(*pool_fields, *creator_fields)
+            .prefetch_related(Prefetch('members', queryset=members))
+        )
     
     def perform_create(self, serializer):
         if serializer.validated_data.get('is_female_only', False) and self.request.user.gender != 'Female':
             raise PermissionDenied("Only female users can create female-only pools.")
 
-        pool = serializer.save(created_by=self.request.user)
-        PoolMember.objects.create(pool=pool, user=self.request.user, is_creator=True)
+        with transaction.atomic():
+            pool = serializer.save(created_by=self.request.user)
+            PoolMember.objects.create(pool=pool, user=self.request.user, is_creator=True)
+            bump_version()
+            publish_pool_event('pool.created', pool.pk)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            # Lock the row and re-read the seat count, so that saving the whole row cannot
+            # undo a join or leave that committed after the pool was loaded.
+            pool = serializer.instance
+            pool.current_persons = (
+                Pool.objects.select_for_update().values_list('current_persons', flat=True).get(pk=pool.pk)
+            )
+            if serializer.validated_data.get('total_persons', pool.total_persons) < pool.current_persons:
+                raise ValidationError(
+                    {"total_persons": "Total persons cannot be less than the current number of members."}
+                )
+            pool = serializer.save()
+            # Seats added by raising total_persons go to the waitlist first.
+            if waitlist.seat_waitlisted(pool):
+                Pool.objects.filter(pk=pool.pk).update(current_persons=pool.current_persons)
+            bump_version()
+            publish_pool_event('pool.updated', pool.pk)
+
+    @conditional_response(list_validators)
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_response(detail_validators)
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    # Async counterparts of list/retrieve, served under ASGI when settings.ASYNC_READS is on
+    # (see Pool/urls.py). Same filtering, pagination and serializers; the queries are awaited.
+    @conditional_response(alist_validators)
+    @cache_response
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @conditional_response(adetail_validators)
+    @cache_response
+    async def aretrieve(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        instance = await aget_object_or_404(queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(request, instance)
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
 
     def update(self, request, *args, **kwargs):
         pool = self.get_object()
-        if pool.created_by != request.user:
+        if pool.created_by_id != request.user.id:
             raise PermissionDenied("You do not have permission to update this pool.")
 
         # Check for is_female_only change
@@ -41,7 +160,7 @@ class PoolViewSet(viewsets.ModelViewSet):
 
     def partial_update(self, request, *args, **kwargs):
         pool = self.get_object()
-        if pool.created_by != request.user:
+        if pool.created_by_id != request.user.id:
             raise PermissionDenied("You do not have permission to update this pool.")
 
         # Check for is_female_only change
@@ -53,29 +172,373 @@ class PoolViewSet(viewsets.ModelViewSet):
     def destroy(self, request, *args, **kwargs):
         return Response({'detail' : 'Delete operation is not allowed,'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
     
+    @action(detail=False, methods=['get'])
+    @cache_response
+    def facets(self, request):
+        # One GROUP BY over (start_point, end_point, transport_mode) on the filtered pools,
+        # folded into per-field counts here. The number of groups is bounded by distinct routes,
+        # not by the number of pools.
+        groups = (
+            self.filter_queryset(self.get_queryset())
+            .order_by()
+            .values('start_point', 'end_point', 'transport_mode')
+            .annotate(
+                count=Count('id'),
+                female_only=Count('id', filter=Q(is_female_only=True)),
+                min_fare=Min('fare_per_head'),
+                max_fare=Max('fare_per_head'),
+            )
+        )
+
+        counts = {'start_point': {}, 'end_point': {}, 'transport_mode': {}}
+        total, female_only, min_fare, max_fare = 0, 0, None, None
+        for group in groups:
+            total += group['count']
+            female_only += group['female_only']
+            for field, field_counts in counts.items():
+                field_counts[group[field]] = field_counts.get(group[field], 0) + group['count']
+            if group['min_fare'] is not None:
+                min_fare = group['min_fare'] if min_fare is None else min(min_fare, group['min_fare'])
+                max_fare = group['max_fare'] if max_fare is None else max(max_fare, group['max_fare'])
+
+        def as_list(field_counts):
+            ordered = sorted(field_counts.items(), key=lambda item: (-item[1], item[0]))
+            return [{'value': value, 'count': count} for value, count in ordered]
+
+        return Response({
+            'total': total,
+            'female_only': female_only,
+            'start_points': as_list(counts['start_point']),
+            'end_points': as_list(counts['end_point']),
+            'transport_modes': as_list(counts['transport_mode']),
+            'fare': {'min': min_fare, 'max': max_fare},
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def sync(self, request):
+        # Incremental refresh of the upcoming-pool list. Without ?since= this is a full snapshot;
+        # with it, only pools created/updated/joined since then plus ids of pools that have left
+        # the list (departed or archived). Clients pass the returned cursor as the next ?since=.
+        now = timezone.now()
+        cursor = now.isoformat().replace('+00:00', 'Z')  # no '+' to escape in the next query string
+        since = request.query_params.get('since')
+        if since is None:
+            changed = self.get_queryset()
+            removed = []
+        else:
+            since = parse_datetime(since)
+            if since is None:
+                raise ValidationError({'since': 'Expected an ISO 8601 timestamp or a cursor returned by sync.'})
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+            changed = self.get_queryset().filter(updated_at__gt=since - self.sync_overlap)
+            removed = [
+                *Pool.objects.filter(departure_time__gte=since, departure_time__lt=now).values_list('id', flat=True),
+                *ArchivedPool.objects.filter(departure_time__gte=since).values_list('id', flat=True),
+            ]
+
+        if since is None:
+            # The snapshot is what a client reloads on reset, so it is never cut short.
+            changed = list(changed.order_by('updated_at', 'id'))
+        else:
+            changed = list(changed.order_by('updated_at', 'id')[:self.sync_limit + 1])
+            if len(changed) > self.sync_limit:
+                # Too far behind to patch up cheaply; the client should reload the list.
+                return Response({'cursor': cursor, 'reset': True, 'changed': [], 'removed': []})
+
+        return Response({
+            'cursor': cursor,
+            'reset': False,
+            'changed': self.get_serializer(changed, many=True).data,
+            'removed': removed,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def match(self, request):
+        # Open pools the user can join leaving within ?window= minutes (default 30) of ?time=,
+        # best match first; ?end_point= ranks by destination too (see Pool/matching.py).
+        # ?start_point= matches the place however it is capitalised or spaced.
+        params = request.query_params
+        at = parse_datetime(params.get('time', ''))
+        if at is None:
+            raise ValidationError({'time': 'Expected an ISO 8601 timestamp.'})
+        if timezone.is_naive(at):
+            at = timezone.make_aware(at)
+        try:
+            window = int(params.get('window', self.match_window))
+            seats = int(params.get('seats', 1))
+            limit = int(params.get('limit', 20))
+        except ValueError:
+            raise ValidationError({'detail': 'window, seats and limit must be integers.'})
+        if not (1 <= window <= self.match_max_window and 1 <= seats and 1 <= limit <= 50):
+            raise ValidationError(
+                {'detail': f'Expected 1 <= window <= {self.match_max_window}, seats >= 1 and 1 <= limit <= 50.'}
+            )
+
+        # Not the user's own pools, nor ones they are already in.
+        queryset = Pool.objects.exclude(created_by_id=request.user.id).exclude(members__user_id=request.user.id)
+        if params.get('start_point'):
+            queryset = queryset.filter(start_location__key=normalize_place(params['start_point']))
+        matches = match_pools(
+            queryset, at, timedelta(minutes=window),
+            destination=params.get('end_point'), seats=seats, female=request.user.gender == 'Female',
+        )[:limit]
+
+        pools = self.get_queryset().in_bulk([pool_id for pool_id, *_ in matches])
+        results = []
+        for pool_id, score, minutes_off, similarity in matches:
+            if pool_id not in pools:
+                continue  # archived or deleted since it was matched
+            data = self.get_serializer(pools[pool_id]).data
+            data['match'] = {'score': score, 'minutes_off': minutes_off, 'destination_similarity': similarity}
+            results.append(data)
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def nearby(self, request):
+        # Upcoming pools starting within ?radius= km (default 2) of ?lat=&lng=, filtered, ordered and
+        # paginated like the list, each with its start_distance_km. Places are found through their
+        # geohash cells (Pool/geo.py), then pools through pool_start_location_idx.
+        params = request.query_params
+        try:
+            latitude, longitude = float(params['lat']), float(params['lng'])
+            radius = float(params.get('radius', self.nearby_radius))
+        except (KeyError, ValueError):
+            raise ValidationError({'detail': 'lat and lng are required; lat, lng and radius must be numbers.'})
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180 and 0 < radius <= self.nearby_max_radius):
+            raise ValidationError(
+                {'detail': f'Expected -90 <= lat <= 90, -180 <= lng <= 180 and 0 < radius <= {self.nearby_max_radius}.'}
+            )
+
+        distances = nearby_locations(latitude, longitude, radius)
+        queryset = self.filter_queryset(self.get_queryset()).filter(start_location_id__in=distances)
+        page = self.paginate_queryset(queryset)
+        data = self.get_serializer(page, many=True).data
+        for item, pool in zip(data, page):
+            item['start_distance_km'] = round(distances[pool.start_location_id], 3)
+        return self.get_paginated_response(data)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        # A JSON list of pools, each validated like POST /pools/ (errors come back per row).
+        # Nothing is created unless every row is valid; then all are inserted together.
+        if not isinstance(request.data, list) or not request.data:
+            raise ValidationError({'detail': 'Expected a non-empty list of pools.'})
+        if len(request.data) > settings.POOL_BULK_CREATE_LIMIT:
+            raise ValidationError({'detail': f'At most {settings.POOL_BULK_CREATE_LIMIT} pools per request.'})
+        pools = create_pools(request.user.id, validate_pools(request.data, request.user.gender))
+        return Response({'created': [pool.pk for pool in pools]}, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def export(self, request):
+        # Streams every pool matching the list filters (including past ones) as NDJSON, or CSV
+        # with ?export=csv; ?fields= picks the columns. Members come from one query per chunk.
+        fmt = export_format(request) or 'ndjson'
+        columns = selected_columns(request, self.export_fields)
+        queryset = self.filter_queryset(self.get_base_queryset()).order_by('id')
+        return export_response(request, self.export_rows(queryset, columns), columns, fmt, 'pools')
+
+    def export_rows(self, queryset, columns):
+        values = ['id', *[column for column in columns if column not in ('id', 'created_by', 'members')]]
+        if 'created_by' in columns:
+            values.append('created_by__email')
+        rows = queryset.values(*values).iterator(chunk_size=CHUNK_SIZE)
+        for batch in batches(rows, CHUNK_SIZE):
+            members = {}
+            if 'members' in columns:
+                for member in (
+                    PoolMember.objects.filter(pool_id__in=[row['id'] for row in batch])
+                    .order_by('id')
+                    .values('pool_id', 'is_creator', 'user__full_name', 'user__email', 'user__phone_number', 'user__gender')
+                ):
+                    members.setdefault(member.pop('pool_id'), []).append(
+                        {key.removeprefix('user__'): value for key, value in member.items()}
+                    )
+            for row in batch:
+                if 'created_by' in columns:
+                    row['created_by'] = row.pop('created_by__email')
+                row['members'] = members.get(row['id'], [])
+                yield row
+
+    @action(detail=False, methods=['get'])
+    def mine(self, request):
+        # Pools the user created or joined. ?when=upcoming (default, soonest first) or ?when=past
+        # (latest first; rides archive_pools has moved out are served by `history`), optionally
+        # narrowed by ?role=created|joined. The rows are found through poolmember_user_pool_idx,
+        # so the cost follows the user's own rides, not the size of the pool table.
+        params = request.query_params
+        when = params.get('when', 'upcoming')
+        role = params.get('role')
+        if when not in ('upcoming', 'past'):
+            raise ValidationError({'when': 'Expected upcoming or past.'})
+        if role not in (None, 'created', 'joined'):
+            raise ValidationError({'role': 'Expected created or joined.'})
+
+        # One filter() call, so the user and is_creator conditions apply to the same membership row.
+        membership = {'members__user_id': request.user.id}
+        if role is not None:
+            membership['members__is_creator'] = role == 'created'
+        queryset = self.get_queryset().filter(**membership)
+        if when == 'upcoming':
+            queryset = queryset.filter(departure_time__gte=timezone.now())
+        else:
+            queryset = queryset.filter(departure_time__lt=timezone.now())
+            self.ordering = ['-departure_time']
+        page = self.paginate_queryset(self.filter_queryset(queryset))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def history(self, request):
+        # Archived rides the requesting user created or joined. archive_pools moves rides
+        # out once they depart; until it has run they are listed by mine?when=past.
+        members = ArchivedPoolMember.objects.select_related('user').only(
+            'pool_id', 'is_creator', 'user__full_name', 'user__phone_number', 'user__gender'
+        )
+        creator_fields = [f'created_by__{name}' for name in CustomUserLimitedSerializer.Meta.fields]
+        queryset = (
+            ArchivedPool.objects
+            .filter(members__user_id=request.user.id)
+            .select_related('created_by')
+            .only(*[field.name for field in ArchivedPool._meta.concrete_fields], *creator_fields)
+            .prefetch_related(Prefetch('members', queryset=members))
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = ArchivedPoolSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['post'], url_path='events/ticket')
+    def event_ticket(self, request):
+        # A ticket for ?ticket= on /pools/events/; fetch a new one for every (re)connect.
+        ticket = EventStreamTicket.for_user(request.user)
+        return Response({'ticket': str(ticket), 'expires_in': int(EventStreamTicket.lifetime.total_seconds())})
+
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def join(self, request, pk=None):
         pool = self.get_object()
 
         # Check if the requester is the creator of the pool 
-        if pool.created_by == request.user:
+        if pool.created_by_id == request.user.id:
             return Response({'detail': 'Creators cannot join their own pool.'}, status=status.HTTP_400_BAD_REQUEST)
         
         # Checking if already member of pool 
-        if PoolMember.objects.filter(pool = pool, user = request.user).exists():
+        if PoolMember.objects.filter(pool = pool, user_id = request.user.id).exists():
             return Response({'detail': 'Already a member of this pool.'}, status=status.HTTP_400_BAD_REQUEST)
         
-        #Checking if pool has reached its capacity 
-        if pool.current_persons >= pool.total_persons:
-            return Response({'detail': 'This pool is already full.'}, status=status.HTTP_400_BAD_REQUEST)
-        
         # Check if the pool is female-only and the user is not female 
         if pool.is_female_only and request.user.gender != 'Female':
             return Response({'detail': 'Only female users can join this pool.'}, status=status.HTTP_403_FORBIDDEN)
         
-        # Add the user to the pool 
-        PoolMember.objects.create(pool=pool, user=request.user)
-        pool.current_persons += 1
-        pool.save()
+        # Take the seat and add the member in one transaction. The conditional UPDATE locks the
+        # pool row, so concurrent joins queue up behind it instead of overselling the last seat,
+        # and the unique (pool, user) constraint catches a racing duplicate join.
+        try:
+            with transaction.atomic():
+                seated = Pool.objects.filter(pk=pool.pk, current_persons__lt=F('total_persons')).update(
+                    current_persons=F('current_persons') + 1, updated_at=timezone.now()
+                )
+                if not seated:
+                    # POST /pools/<id>/waitlist/ queues for the next free seat.
+                    return Response({'detail': 'This pool is already full.'}, status=status.HTTP_400_BAD_REQUEST)
+                PoolMember.objects.create(pool=pool, user_id=request.user.id)
+                bump_version()
+                publish_pool_event('pool.joined', pool.pk)
+                enqueue(notify_creator_of_join, pool_id=pool.pk, user_id=request.user.id)
+        except IntegrityError:
+            return Response({'detail': 'Already a member of this pool.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'detail': 'Joined the pool successfully.'}, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    def leave(self, request, pk=None):
+        pool = self.get_object()
+        if pool.created_by_id == request.user.id:
+            return Response({'detail': 'Creators cannot leave their own pool.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # The freed seat goes to the head of the waitlist in the same transaction (Pool/waitlist.py).
+        if waitlist.leave(pool.pk, request.user.id) is None:
+            return Response({'detail': 'Not a member of this pool.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'detail': 'Left the pool.'}, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get', 'post', 'delete'], url_path='waitlist',
+            permission_classes=[IsAuthenticated])
+    def waitlist_entry(self, request, pk=None):
+        # GET: the user's place in the queue. POST: take a free seat, or queue for the next
+        # one (oldest first). DELETE: leave the queue.
+        pool = self.get_object()
+        if request.method == 'GET':
+            return Response({'position': waitlist.position(pool.pk, request.user.id)}, status=status.HTTP_200_OK)
+        if request.method == 'DELETE':
+            if not waitlist.cancel(pool.pk, request.user.id):
+                return Response({'detail': 'Not on the waitlist.'}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({'detail': 'Left the waitlist.'}, status=status.HTTP_200_OK)
+
+        if pool.created_by_id == request.user.id:
+            return Response({'detail': 'Creators cannot join their own pool.'}, status=status.HTTP_400_BAD_REQUEST)
+        if PoolMember.objects.filter(pool=pool, user_id=request.user.id).exists():
+            return Response({'detail': 'Already a member of this pool.'}, status=status.HTTP_400_BAD_REQUEST)
+        if pool.is_female_only and request.user.gender != 'Female':
+            return Response({'detail': 'Only female users can join this pool.'}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            place = waitlist.join_or_wait(pool.pk, request.user.id)
+        except IntegrityError:
+            return Response({'detail': 'Already a member of this pool or on its waitlist.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if place is None:
+            return Response({'detail': 'Joined the pool successfully.'}, status=status.HTTP_200_OK)
+        return Response({'detail': 'Added to the waitlist.', 'position': place}, status=status.HTTP_201_CREATED)
+
+class PoolTemplateViewSet(viewsets.ModelViewSet):
+    """
+    The requesting user's recurring pools. A template is expanded into pools
+    for the coming POOL_TEMPLATE_HORIZON_DAYS as soon as it is saved; the
+    expand_pool_templates command extends that every day. Editing or deleting
+    a template leaves the pools already created alone.
+    """
+    serializer_class = PoolTemplateSerializer
+    permission_classes = [IsAuthenticated, IsProfileComplete]
+
+    def get_queryset(self):
+        return PoolTemplate.objects.filter(created_by_id=self.request.user.id).order_by('id')
+
+    def perform_create(self, serializer):
+        self.check_female_only(serializer)
+        template = serializer.save(created_by_id=self.request.user.id)
+        expand_template(template.pk)
+        template.refresh_from_db(fields=['generated_until'])
+
+    def perform_update(self, serializer):
+        self.check_female_only(serializer)
+        template = serializer.save()
+        expand_template(template.pk)
+        template.refresh_from_db(fields=['generated_until'])
+
+    def check_female_only(self, serializer):
+        if serializer.validated_data.get('is_female_only', False) and self.request.user.gender != 'Female':
+            raise PermissionDenied("Only female users can create female-only pools.")
+
+async def pool_events(request):
+    """
+    Server-sent event stream of pool.created / pool.updated / pool.joined / pool.left events.
+
+    EventSource cannot send headers, so the stream is opened with a ticket from
+    POST /pools/events/ticket/ in ?ticket=, never the access token. The
+    stream can be narrowed with exact-match filters on EVENT_FILTER_FIELDS, e.g.
+    ?end_point=Patiala%20Railway%20Station. Needs an ASGI server: an idle client
+    then only costs an open connection.
+    """
+    auth = ClaimsJWTAuthentication()
+    try:
+        ticket = EventStreamTicket(request.GET.get('ticket', ''))
+        user = await auth.aget_user(ticket)
+    except (TokenError, InvalidToken, AuthenticationFailed):
+        return JsonResponse({'detail': 'Authentication credentials were not provided or are invalid.'}, status=401)
+    if not user.profile_complete:
+        return JsonResponse({'detail': IsProfileComplete.message}, status=403)
 
-        return Response({'detail': 'Joined the pool successfully.'}, status=status.HTTP_200_OK)
\ No newline at end of file
+    filters = {field: request.GET[field] for field in EVENT_FILTER_FIELDS if field in request.GET}
+    subscription = get_broadcaster().subscribe(filters)
+    response = StreamingHttpResponse(subscription.stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # stop nginx from buffering the stream
+    return response
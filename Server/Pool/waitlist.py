@@ -0,0 +1,118 @@
+"""
+Leaving pools, and the per-pool FIFO waitlist for full ones.
+
+Seat counts only change with the pool row locked (by join's conditional
+UPDATE, or select_for_update here), so current_persons stays equal to the
+number of members. A seat freed by leave(), or added by raising
+total_persons, goes to the head of the waitlist in the same transaction.
+
+The head is read with SKIP LOCKED: an entry that a concurrent cancel() is
+deleting is passed over rather than waited for, and a promotion only ever
+locks its own pool's row and entries, so promotions on different pools never
+wait on each other.
+"""
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from jobs.queue import enqueue
+
+from .cache import bump_version
+from .events import publish_pool_event
+from .models import Pool, PoolMember, WaitlistEntry
+from .tasks import notify_creator_of_join, notify_promoted_from_waitlist
+
+
+def position(pool_id, user_id):
+    """The user's 1-based place in the pool's waitlist; None when not waiting."""
+    entry_id = WaitlistEntry.objects.filter(pool_id=pool_id, user_id=user_id).values_list('id', flat=True).first()
+    if entry_id is None:
+        return None
+    return WaitlistEntry.objects.filter(pool_id=pool_id, id__lte=entry_id).count()
+
+
+def seat_waitlisted(pool):
+    """
+    Give the pool's free seats to the head of its waitlist and return the promoted
+    user ids. The caller holds the pool row lock and writes pool.current_persons,
+    which is updated here, back to the row.
+    """
+    promoted = []
+    while pool.current_persons + len(promoted) < pool.total_persons:
+        wanted = pool.total_persons - pool.current_persons - len(promoted)
+        heads = list(
+            WaitlistEntry.objects.select_for_update(skip_locked=True, of=('self',))
+            .select_related('user')
+            .only('user_id', 'user__gender')
+            .filter(pool=pool)
+            .order_by('id')[:wanted]
+        )
+        if not heads:
+            break
+        # Entries that can no longer be served (the pool has become female-only, or the
+        # user got a seat some other way) leave the queue without taking a seat.
+        members = set(
+            PoolMember.objects.filter(pool=pool, user_id__in=[entry.user_id for entry in heads])
+            .values_list('user_id', flat=True)
+        )
+        promoted += [
+            entry.user_id for entry in heads
+            if entry.user_id not in members and (not pool.is_female_only or entry.user.gender == 'Female')
+        ]
+        WaitlistEntry.objects.filter(id__in=[entry.id for entry in heads]).delete()
+
+    if promoted:
+        PoolMember.objects.bulk_create([PoolMember(pool=pool, user_id=user_id) for user_id in promoted])
+        pool.current_persons += len(promoted)
+        for user_id in promoted:
+            enqueue(notify_promoted_from_waitlist, pool_id=pool.pk, user_id=user_id)
+    return promoted
+
+
+def join_or_wait(pool_id, user_id):
+    """
+    Seat the user if the pool has a free seat and nobody is waiting for it,
+    otherwise add them to the end of the waitlist. Returns None when seated,
+    else the user's place in the queue. The caller has checked eligibility.
+    Raises IntegrityError if the user is already a member or already waiting.
+    """
+    with transaction.atomic():
+        pool = get_object_or_404(Pool.objects.select_for_update(), pk=pool_id)
+        if pool.current_persons < pool.total_persons and not WaitlistEntry.objects.filter(pool=pool).exists():
+            PoolMember.objects.create(pool=pool, user_id=user_id)
+            Pool.objects.filter(pk=pool.pk).update(
+                current_persons=pool.current_persons + 1, updated_at=timezone.now()
+            )
+            bump_version()
+            publish_pool_event('pool.joined', pool.pk)
+            enqueue(notify_creator_of_join, pool_id=pool.pk, user_id=user_id)
+            return None
+        WaitlistEntry.objects.create(pool=pool, user_id=user_id)
+    return position(pool_id, user_id)
+
+
+def cancel(pool_id, user_id):
+    """Take the user off the pool's waitlist; False if they were not on it."""
+    deleted, _ = WaitlistEntry.objects.filter(pool_id=pool_id, user_id=user_id).delete()
+    return bool(deleted)
+
+
+def leave(pool_id, user_id):
+    """
+    Remove a member (not the creator) and hand the seat to the head of the
+    waitlist. Returns the promoted user ids, or None if the user was not a
+    member who can leave.
+    """
+    with transaction.atomic():
+        pool = get_object_or_404(Pool.objects.select_for_update(), pk=pool_id)
+        removed, _ = PoolMember.objects.filter(pool=pool, user_id=user_id, is_creator=False).delete()
+        if not removed:
+            return None
+        pool.current_persons -= 1
+        promoted = seat_waitlisted(pool)
+        Pool.objects.filter(pk=pool.pk).update(current_persons=pool.current_persons, updated_at=timezone.now())
+        bump_version()
+        publish_pool_event('pool.left', pool.pk)
+        if promoted:
+            publish_pool_event('pool.joined', pool.pk)
+    return promoted
@@ -0,0 +1,81 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+
+
+async def aauthenticate(request):
+    # Request._authenticate, awaiting authenticators that support it.
+    for authenticator in request.authenticators:
+        try:
+            if hasattr(authenticator, 'aauthenticate'):
+                user_auth_tuple = await authenticator.aauthenticate(request)
+            else:
+                user_auth_tuple = await sync_to_async(authenticator.authenticate)(request)
+        except exceptions.APIException:
+            request._not_authenticated()
+            raise
+        if user_auth_tuple is not None:
+            request._authenticator = authenticator
+            request.user, request.auth = user_auth_tuple
+            return
+    request._not_authenticated()
+
+
+async def adispatch(view, handler_name, request, *args, **kwargs):
+    """
+    APIView.dispatch for an async handler: the same negotiation, authentication,
+    permission and exception handling, without leaving the event loop except
+    for the queries the handler itself awaits.
+    """
+    view.args = args
+    view.kwargs = kwargs
+    request = view.initialize_request(request, *args, **kwargs)
+    view.request = request
+    view.headers = view.default_response_headers
+
+    try:
+        view.format_kwarg = view.get_format_suffix(**kwargs)
+        request.accepted_renderer, request.accepted_media_type = view.perform_content_negotiation(request)
+        await aauthenticate(request)
+        view.check_permissions(request)
+        view.check_throttles(request)
+        response = await getattr(view, handler_name)(request, *args, **kwargs)
+    except Exception as exc:
+        response = view.handle_exception(exc)
+
+    response = view.finalize_response(request, response, *args, **kwargs)
+    if not hasattr(response, 'render'):
+        return response
+
+    # Render here: Django would otherwise hand a DRF Response to a worker thread to render it.
+    response.render()
+    rendered = HttpResponse(response.content, status=response.status_code)
+    for header, value in response.items():
+        rendered[header] = value
+    return rendered
+
+
+def as_async_view(view_class, actions=None, **async_handlers):
+    """
+    Route the HTTP methods named in `async_handlers` to async handlers on
+    `view_class`; every other method goes to the regular sync view, which
+    Django runs in a worker thread as usual. Only worth it under ASGI.
+
+        as_async_view(PoolViewSet, {'get': 'list', 'post': 'create'}, get='alist')
+    """
+    sync_view = view_class.as_view(actions) if actions is not None else view_class.as_view()
+
+    async def view(request, *args, **kwargs):
+        handler_name = async_handlers.get(request.method.lower())
+        if handler_name is None:
+            return await sync_to_async(sync_view)(request, *args, **kwargs)
+
+        instance = view_class()
+        if actions is not None:
+            # What ViewSetMixin.as_view sets up; initialize_request derives `action` from it.
+            instance.action_map = actions
+        return await adispatch(instance, handler_name, request, *args, **kwargs)
+
+    view.view_class = view_class
+    return csrf_exempt(view)
@@ -0,0 +1,95 @@
+import atexit
+import json
+import logging
+import os
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueListener
+
+# Attributes every LogRecord has; anything else on a record came in through `extra=`.
+RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'taskName'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, any `extra=` fields and the traceback."""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in RECORD_ATTRS)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # The queue may be full at shutdown; wait for room instead of failing to stop.
+        self.queue.put(self._sentinel)
+
+
+class BackgroundHandler(logging.Handler):
+    """
+    Hands records to a bounded queue; a QueueListener thread writes them out
+    through the `targets` handlers. In LOGGING they are given as
+    "cfg://handlers.<name>" references, which dictConfig resolves to the
+    configured handlers as long as their names sort before this one's. Logging
+    calls therefore never wait on disk or console I/O. When the queue is full
+    records are dropped and counted in `dropped` rather than blocking.
+
+    The listener is started lazily in each process, so gunicorn workers forked
+    after settings were loaded each get their own writer thread.
+    """
+
+    def __init__(self, targets, queue_size=10000):
+        super().__init__()
+        # Indexing a dictConfig ConvertingList resolves the cfg:// references; iterating does not.
+        self.targets = [targets[i] for i in range(len(targets))]
+        for target in self.targets:
+            if not isinstance(target, logging.Handler):
+                raise ValueError(f'BackgroundHandler targets must be configured handlers, not {target!r}')
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.listener = None
+        self.listener_pid = None
+        self.dropped = 0
+
+    def start(self):
+        with self.lock:
+            if self.listener_pid == os.getpid():
+                return
+            self.queue = queue.Queue(maxsize=self.queue.maxsize)
+            self.listener = _Listener(self.queue, *self.targets, respect_handler_level=True)
+            self.listener.start()
+            self.listener_pid = os.getpid()
+        atexit.register(self.stop)
+
+    def stop(self):
+        if self.listener is not None and self.listener_pid == os.getpid():
+            self.listener.stop()
+            self.listener = self.listener_pid = None
+
+    def prepare(self, record):
+        # Resolve the message and traceback now: args may be mutated after the call returns,
+        # and the writer thread should not hold on to frames.
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.msg, record.args = record.message, None
+        return record
+
+    def emit(self, record):
+        if self.listener_pid != os.getpid():
+            self.start()
+        try:
+            self.queue.put_nowait(self.prepare(record))
+        except queue.Full:
+            self.dropped += 1
+        except Exception:
+            self.handleError(record)
@@ -0,0 +1,99 @@
+"""
+Request metrics in the Prometheus text format.
+
+Figures are recorded per resolved URL name (pool-list, pool-join,
+google_login, ...) by LogRequestMiddleware and served from
+/metrics, together with the job queue figures (jobs/metrics.py) and the
+database connection pool figures (pooled_postgresql/metrics.py).
+With PROMETHEUS_MULTIPROC_DIR set (see gunicorn.conf.py) every
+worker process writes its samples to memory-mapped files in that directory
+and a scrape sums them across workers, so it does not matter which worker
+answers it.
+
+The endpoint is not public: see metrics_allowed().
+"""
+import hmac
+import os
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+from jobs.metrics import QUEUE_REGISTRY
+# Registers the connection pool metrics, which the database backend records into.
+from Transport_Pool.pooled_postgresql import metrics as db_pool_metrics  # noqa: F401
+
+LABELS = ['route', 'method']
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+REQUESTS = Counter(
+    'http_requests_total', 'Requests served, by route, method and status.', LABELS + ['status'],
+)
+DURATION = Histogram(
+    'http_request_duration_seconds', 'Time from the first middleware to the response.', LABELS,
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_QUERIES = Histogram(
+    'http_request_db_queries', 'Database queries run while serving a request.', LABELS,
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+DB_TIME = Histogram(
+    'http_request_db_seconds', 'Time spent in database queries while serving a request.', LABELS,
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes', 'Size of non-streaming response bodies.', LABELS,
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576),
+)
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.url_name or match.route
+
+
+_children = {}
+
+
+def _histograms(route, method):
+    # Resolving labelled children takes a lock and a few lookups; do it once per (route, method).
+    key = (route, method)
+    if key not in _children:
+        _children[key] = tuple(metric.labels(route, method) for metric in (DURATION, DB_QUERIES, DB_TIME, RESPONSE_SIZE))
+    return _children[key]
+
+
+def observe_request(request, response, duration, query_count, query_seconds):
+    route = route_name(request)
+    # Unknown methods are folded together so clients cannot mint new label values.
+    method = request.method if request.method in METHODS else 'other'
+    duration_hist, queries_hist, db_time_hist, size_hist = _histograms(route, method)
+    REQUESTS.labels(route, method, str(response.status_code)).inc()
+    duration_hist.observe(duration)
+    queries_hist.observe(query_count)
+    db_time_hist.observe(query_seconds)
+    if not response.streaming:
+        size_hist.observe(len(response.content))
+
+
+def metrics_allowed(request):
+    """A staff session, or the METRICS_TOKEN bearer token a Prometheus scrape config sends."""
+    if request.user.is_staff:
+        return True
+    token = settings.METRICS_TOKEN
+    return bool(token) and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+
+
+def metrics_view(request):
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        # A fresh registry per scrape: the collector reads the current files of all workers.
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry) + generate_latest(QUEUE_REGISTRY), content_type=CONTENT_TYPE_LATEST)
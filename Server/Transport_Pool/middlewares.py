@@ -1,17 +1,130 @@
 import logging
+import random
+import time
+from contextvars import ContextVar
 
-logger = logging.getLogger("django") 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from Transport_Pool.metrics import observe_request
+
+logger = logging.getLogger("api.access")
 
 class LogRequestMiddleware:
+    """
+    Records every request in the Prometheus metrics (Transport_Pool/metrics.py)
+    and logs one structured record per request to the "api.access" logger: method,
+    route pattern, path, status, duration, number of DB queries and client IP.
+
+    REQUEST_LOG_SAMPLE_RATE controls the share of requests logged; server errors
+    and requests slower than REQUEST_LOG_SLOW_MS are always logged. The handlers
+    behind the logger are queue-backed (see LOGGING), so the request thread only
+    pays for building the record.
+    """
+    # Async-capable so that under ASGI the middleware chain (and async views) stay on the event loop.
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.sample_rate = settings.REQUEST_LOG_SAMPLE_RATE
+        self.slow_ms = settings.REQUEST_LOG_SLOW_MS
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        queries = QueryCounter()
+        started = time.perf_counter()
+        token = current_queries.set(queries)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_queries.reset(token)
+        self.record(request, response, started, queries)
+        return response
+
+    async def __acall__(self, request):
+        queries = QueryCounter()
+        started = time.perf_counter()
+        # Context variables are copied into the threads sync_to_async runs the ORM in.
+        token = current_queries.set(queries)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_queries.reset(token)
+        self.record(request, response, started, queries)
+        return response
+
+    def record(self, request, response, started, queries):
+        duration = time.perf_counter() - started
+        try:
+            observe_request(request, response, duration, queries.count, queries.seconds)
+        except Exception as e:
+            logger.error(f"Recording request metrics failed: {e}")
+        self.log(request, response, duration * 1000, queries.count)
+
+    def log(self, request, response, duration_ms, query_count):
+        if not (
+            response.status_code >= 500
+            or duration_ms >= self.slow_ms
+            or (self.sample_rate and random.random() < self.sample_rate)
+        ):
+            return
         try:
-            logger.info(f"Request: {request.method} {request.get_full_path()} | IP: {get_client_ip(request)}")
+            match = request.resolver_match
+            logger.info("request", extra={
+                "method": request.method,
+                "route": match.route if match else None,
+                "path": request.path,
+                "status": response.status_code,
+                "duration_ms": round(duration_ms, 2),
+                "db_queries": query_count,
+                "client_ip": get_client_ip(request),
+            })
         except Exception as e:
             logger.error(f"Request logging failed: {e}")
-        return self.get_response(request)
+
+class QueryCounter:
+    # Counts and times the queries of one request (execute_wrapper works without DEBUG).
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+current_queries = ContextVar('current_queries', default=None)
+
+def count_queries(execute, sql, params, many, context):
+    queries = current_queries.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    return queries(execute, sql, params, many, context)
+
+def install_query_counting(connection=None, **kwargs):
+    """
+    Put count_queries on the connection objects of the calling thread. Each
+    thread has its own (and under ASGI the ORM runs in sync_to_async threads,
+    not on the event loop), so this runs where queries run: whenever a
+    connection is opened, and when a request starts, which under ASGI is sent
+    from the thread the request's sync code runs in.
+    """
+    for conn in [connection] if connection is not None else connections.all():
+        if count_queries not in conn.execute_wrappers:
+            conn.execute_wrappers.append(count_queries)
+
+connection_created.connect(install_query_counting, dispatch_uid='install_query_counting')
+request_started.connect(install_query_counting, dispatch_uid='install_query_counting_on_request')
 
 def get_client_ip(request):
     # Handles cases behind proxy/load balancer
@@ -0,0 +1,88 @@
+"""
+PostgreSQL backend that checks connections out of a per-process pool
+(pool.py) instead of opening one per request.
+
+Configured through OPTIONS['pool'] (min_size, max_size, timeout, max_idle,
+max_lifetime), the same key Django 5.1's built-in psycopg pool uses. Django
+still "closes" the connection at the end of every request (CONN_MAX_AGE must
+stay 0); here that returns it to the pool, rolled back if a transaction was
+left open. With CONN_HEALTH_CHECKS on, a connection idle for more than
+`check_after` seconds is pinged before reuse.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base, creation
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+from .pool import PoolTimeout, close_pool, get_pool
+
+if is_psycopg3:
+    from psycopg.pq import TransactionStatus
+
+    STATUS_IDLE, STATUS_UNKNOWN = TransactionStatus.IDLE, TransactionStatus.UNKNOWN
+else:
+    from psycopg2.extensions import TRANSACTION_STATUS_IDLE as STATUS_IDLE
+    from psycopg2.extensions import TRANSACTION_STATUS_UNKNOWN as STATUS_UNKNOWN
+
+
+def ping(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    if not connection.autocommit:
+        connection.rollback()
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections would keep the test database "in use" and block the DROP.
+        close_pool(self.connection.alias, test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    @property
+    def pool(self):
+        options = dict(self.settings_dict['OPTIONS'].get('pool') or {})
+        if self.settings_dict['CONN_HEALTH_CHECKS']:
+            options.setdefault('check', ping)
+        return get_pool(self.alias, self.settings_dict['NAME'], **options)
+
+    def check_settings(self):
+        super().check_settings()
+        if self.settings_dict['CONN_MAX_AGE'] != 0:
+            raise ImproperlyConfigured('Pooled connections cannot be combined with CONN_MAX_AGE; set it to 0.')
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pool', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        try:
+            return self.pool.getconn(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        except PoolTimeout as exc:
+            # Surfaces as django.db.OperationalError through wrap_database_errors.
+            raise self.Database.OperationalError(str(exc)) from exc
+
+    def _close(self):
+        if self.connection is None:
+            return
+        connection = self.connection
+        # Closed inside an atomic block: Django still considers the transaction open, so
+        # the connection cannot go back for someone else to use.
+        reusable = not self.in_atomic_block and self._reset(connection)
+        self.pool.putconn(connection, reusable)
+
+    def _reset(self, connection):
+        if connection.closed:
+            return False
+        status = connection.info.transaction_status
+        if status == STATUS_UNKNOWN:
+            return False
+        if status != STATUS_IDLE:
+            try:
+                connection.rollback()
+            except self.Database.Error:
+                return False
+        return True
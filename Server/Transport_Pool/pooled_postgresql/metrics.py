@@ -0,0 +1,49 @@
+"""
+Connection pool figures in the Prometheus format, served from /metrics.
+
+Each worker process has its own pools, so the figures are recorded as the
+pools change rather than read from ConnectionPool.stats() at scrape time:
+under PROMETHEUS_MULTIPROC_DIR the counters are summed across all workers
+and the connection gauges across the live ones, whichever worker answers
+the scrape. /internal/db-pool/ still shows a single worker's stats().
+"""
+from prometheus_client import Counter, Gauge
+
+COUNTERS = {
+    'checkouts': Counter('db_pool_checkouts_total', 'Connections checked out of the pool.', ['alias']),
+    'waits': Counter('db_pool_waits_total', 'Checkouts that had to wait for a connection.', ['alias']),
+    'wait_seconds': Counter('db_pool_wait_seconds_total', 'Time checkouts spent waiting for a connection.', ['alias']),
+    'timeouts': Counter('db_pool_timeouts_total', 'Checkouts that gave up waiting for a connection.', ['alias']),
+    'connections_opened': Counter('db_pool_connections_opened_total', 'Connections opened.', ['alias']),
+    'connections_closed': Counter('db_pool_connections_closed_total', 'Connections closed.', ['alias']),
+    'failed_checks': Counter(
+        'db_pool_failed_checks_total', 'Idle connections dropped because their health check failed.', ['alias'],
+    ),
+}
+CONNECTIONS = Gauge(
+    'db_pool_connections', 'Open connections, by state (idle, in_use).', ['alias', 'state'],
+    multiprocess_mode='livesum',
+)
+MAX_CONNECTIONS = Gauge(
+    'db_pool_max_connections', 'Connections the pools may open (max_size per worker).', ['alias'],
+    multiprocess_mode='livesum',
+)
+
+
+class PoolMetrics:
+    """Records one ConnectionPool's figures under its database alias."""
+
+    def __init__(self, alias):
+        # Labelled children resolved once; the pool reports on every checkout and return.
+        self.counters = {stat: counter.labels(alias) for stat, counter in COUNTERS.items()}
+        self.idle = CONNECTIONS.labels(alias, 'idle')
+        self.in_use = CONNECTIONS.labels(alias, 'in_use')
+        self.max_size = MAX_CONNECTIONS.labels(alias)
+
+    def count(self, stat, amount=1):
+        self.counters[stat].inc(amount)
+
+    def connections(self, idle, in_use, max_size):
+        self.idle.set(idle)
+        self.in_use.set(in_use)
+        self.max_size.set(max_size)
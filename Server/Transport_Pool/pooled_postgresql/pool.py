@@ -0,0 +1,207 @@
+import os
+import threading
+import time
+from collections import deque
+
+from .metrics import PoolMetrics
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    A bounded, thread-safe pool of raw DB-API connections for one process.
+
+    At most `max_size` connections are open at once; a checkout beyond that
+    waits up to `timeout` seconds for one to be returned. Idle connections are
+    reused most-recently-returned first, closed after `max_idle` seconds
+    (down to `min_size`) and replaced after `max_lifetime`. A connection that
+    sat idle for more than `check_after` seconds is passed to `check` before
+    being handed out, and dropped if that fails. The figures in stats() are
+    also reported to `metrics` (a PoolMetrics) as they change.
+    """
+
+    def __init__(self, min_size=0, max_size=10, timeout=10.0, max_idle=300.0, max_lifetime=3600.0,
+                 check=None, check_after=10.0, metrics=None):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.check = check
+        self.check_after = check_after
+        self.metrics = metrics
+
+        self._lock = threading.Condition()
+        self._idle = deque()  # (connection, returned_at), most recently returned on the right
+        self._opened_at = {}  # connection -> monotonic time it was opened
+        self._size = 0  # open connections, idle or checked out
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_seconds': 0.0,
+            'timeouts': 0,
+            'connections_opened': 0,
+            'connections_closed': 0,
+            'failed_checks': 0,
+        }
+        self._report_connections()
+
+    def getconn(self, connect):
+        """Check out a connection, opening one with `connect()` if the pool has room."""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+        while True:
+            with self._lock:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._count('timeouts')
+                        raise PoolTimeout(
+                            f'No database connection available within {self.timeout}s '
+                            f'({self.max_size} in use).'
+                        )
+                    waited = True
+                    self._lock.wait(remaining)
+
+                if self._idle:
+                    connection, returned_at = self._idle.pop()
+                else:
+                    connection = None
+                    self._size += 1  # reserve the slot before connecting outside the lock
+
+            if connection is None:
+                try:
+                    connection = connect()
+                except BaseException:
+                    with self._lock:
+                        self._size -= 1
+                        self._lock.notify()
+                        self._report_connections()
+                    raise
+                with self._lock:
+                    self._opened_at[connection] = time.monotonic()
+                    self._count('connections_opened')
+            elif not self._usable(connection, returned_at):
+                self._discard(connection)
+                continue
+
+            with self._lock:
+                self._count('checkouts')
+                if waited:
+                    self._count('waits')
+                    self._count('wait_seconds', time.monotonic() - started)
+                self._report_connections()
+            return connection
+
+    def putconn(self, connection, reusable=True):
+        """Return a checked-out connection; it is closed instead if not `reusable` or too old."""
+        now = time.monotonic()
+        with self._lock:
+            expired = now - self._opened_at.get(connection, now) > self.max_lifetime
+            if reusable and not expired:
+                self._idle.append((connection, now))
+                self._lock.notify()
+                stale = self._take_stale(now)
+                self._report_connections()
+            else:
+                stale = []
+        if not reusable or expired:
+            self._discard(connection)
+        for connection in stale:
+            self._discard(connection)
+
+    def closeall(self):
+        with self._lock:
+            idle = [connection for connection, _ in self._idle]
+            self._idle.clear()
+        for connection in idle:
+            self._discard(connection)
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'max_size': self.max_size,
+            }
+
+    def _usable(self, connection, returned_at):
+        if getattr(connection, 'closed', False):
+            return False
+        if time.monotonic() - self._opened_at.get(connection, 0) > self.max_lifetime:
+            return False
+        if self.check is not None and time.monotonic() - returned_at > self.check_after:
+            try:
+                self.check(connection)
+            except Exception:
+                with self._lock:
+                    self._count('failed_checks')
+                return False
+        return True
+
+    def _take_stale(self, now):
+        # Oldest idle connections sit on the left; keep min_size of them around.
+        stale = []
+        while len(self._idle) > self.min_size and now - self._idle[0][1] > self.max_idle:
+            stale.append(self._idle.popleft()[0])
+        return stale
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._opened_at.pop(connection, None)
+            self._size -= 1
+            self._count('connections_closed')
+            self._lock.notify()
+            self._report_connections()
+
+    def _count(self, stat, amount=1):
+        # With self._lock held.
+        self._stats[stat] += amount
+        if self.metrics is not None:
+            self.metrics.count(stat, amount)
+
+    def _report_connections(self):
+        # With self._lock held, after _size or _idle changed.
+        if self.metrics is not None:
+            self.metrics.connections(len(self._idle), self._size - len(self._idle), self.max_size)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, database, **options):
+    # Keyed by database name too: the test runner points an alias at a different database.
+    with _pools_lock:
+        if (alias, database) not in _pools:
+            _pools[alias, database] = ConnectionPool(metrics=PoolMetrics(alias), **options)
+        return _pools[alias, database]
+
+
+def close_pool(alias, database):
+    with _pools_lock:
+        pool = _pools.pop((alias, database), None)
+    if pool is not None:
+        pool.closeall()
+
+
+def pool_stats():
+    """Stats of this process's pools, one entry per (alias, database)."""
+    with _pools_lock:
+        pools = dict(_pools)
+    return [{'alias': alias, 'database': database, **pool.stats()} for (alias, database), pool in pools.items()]
+
+
+# A forked child (e.g. gunicorn --preload) must not share the parent's sockets. Forget them
+# without closing, which would end the parent's sessions too.
+os.register_at_fork(after_in_child=_pools.clear)
@@ -65,6 +65,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'dj_rest_auth',
     'django.contrib.sites',  # Required for django-allauth
     'allauth',
@@ -78,6 +79,7 @@ INSTALLED_APPS = [
     'corsheaders',
     'authentication',
     'Pool',
+    'jobs',
 ]
 
 MIDDLEWARE = [
@@ -112,18 +114,42 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'Transport_Pool.wsgi.application'    
+ASGI_APPLICATION = 'Transport_Pool.asgi.application'
+
+# Serve the pool list/detail and profile reads from async views (Transport_Pool/async_api.py).
+# Only useful under an ASGI server; under WSGI each async view would spin up its own event loop.
+ASYNC_READS = os.getenv('ASYNC_READS') == 'True'
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# Connection reuse, tuned from the env files:
+# - DB_POOL=True checks connections out of a per-process pool (Transport_Pool/pooled_postgresql).
+#   Safe under ASGI and threads. Each worker process holds up to DB_POOL_MAX_SIZE connections,
+#   so keep workers * DB_POOL_MAX_SIZE below the server's max_connections.
+# - Otherwise DB_CONN_MAX_AGE keeps one connection per thread open for that many seconds
+#   (sync WSGI workers only; leave it at 0 under ASGI).
+DB_POOL = os.getenv('DB_POOL') == 'True'
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'Transport_Pool.pooled_postgresql' if DB_POOL else 'django.db.backends.postgresql',
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASSWORD'),
         'HOST': os.environ.get('DB_HOST'),
         'PORT': os.environ.get('DB_PORT'),
+        'CONN_MAX_AGE': 0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        'OPTIONS': {
+            'pool': {
+                'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+                'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+                'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+                'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', 300)),
+                'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', 3600)),
+            },
+        } if DB_POOL else {},
     }
 }
 
@@ -134,6 +160,71 @@ DATABASES = {
 #     }
 # }
 
+# Cache
+# Local memory by default (tests, single process). In production point CACHE_BACKEND and the
+# *_LOCATION variables at a shared cache (docker-compose.prod.yml uses Redis, one database per
+# alias) so all workers see the same entries.
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+LOCAL_CACHE = CACHE_BACKEND.endswith('.LocMemCache')
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    },
+    # Pool list/detail responses. Every query-string variant of /pools/ is an entry, so they get
+    # a cache of their own where they can only push out each other.
+    'pools': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('POOL_CACHE_LOCATION', 'pools'),
+    },
+    # Users, claim states and recently blacklisted tokens (authentication/). Losing an entry only
+    # costs a query, but the local cache is sized so that it does not happen routinely; a shared
+    # backend must not evict these (Redis: maxmemory-policy noeviction).
+    'auth': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('AUTH_CACHE_LOCATION', 'auth'),
+        'OPTIONS': {'MAX_ENTRIES': 100000} if LOCAL_CACHE else {},
+    },
+}
+
+# Pool list/detail response cache (see Pool/cache.py)
+POOL_CACHE_ALIAS = 'pools'
+POOL_CACHE_TIMEOUT = int(os.getenv('POOL_CACHE_TIMEOUT', 60))
+
+# User rows cached for authentication (authentication/user_cache.py); dropped on every user save.
+AUTH_USER_CACHE_ALIAS = 'auth'
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', 300))
+
+# Recurring pools (Pool/recurring.py): template times are local to this zone, and templates
+# are expanded this many days ahead (by expand_pool_templates, run daily).
+POOL_TEMPLATE_TIME_ZONE = os.getenv('POOL_TEMPLATE_TIME_ZONE', 'Asia/Kolkata')
+POOL_TEMPLATE_HORIZON_DAYS = int(os.getenv('POOL_TEMPLATE_HORIZON_DAYS', 7))
+# Most pools one POST /pools/bulk/ may create
+POOL_BULK_CREATE_LIMIT = int(os.getenv('POOL_BULK_CREATE_LIMIT', 100))
+
+# Background jobs (jobs/queue.py), run by manage.py run_jobs. A claimed job is handed to
+# another worker if it has not finished after JOB_LEASE_SECONDS; failed jobs are retried
+# after JOB_RETRY_BASE_SECONDS, doubling up to JOB_RETRY_MAX_SECONDS, JOB_MAX_ATTEMPTS times in all.
+JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', 300))
+JOB_RETRY_BASE_SECONDS = int(os.getenv('JOB_RETRY_BASE_SECONDS', 10))
+JOB_RETRY_MAX_SECONDS = int(os.getenv('JOB_RETRY_MAX_SECONDS', 3600))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 5))
+
+# Outgoing mail (pool notifications, sent from background jobs). Printed to the console
+# unless an SMTP backend is configured.
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'False') == 'True'
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'webmaster@localhost')
+
+# Realtime pool events (see Pool/events.py). Swap for a shared pub/sub when running several workers.
+POOL_EVENTS_BROADCASTER = os.getenv('POOL_EVENTS_BROADCASTER', 'Pool.events.InProcessBroadcaster')
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -180,13 +271,20 @@ REST_FRAMEWORK = {
        'rest_framework.permissions.AllowAny',  
    ),
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.authentication.ClaimsJWTAuthentication',
     ],
     "EXCEPTION_HANDLER": "rest_framework.views.exception_handler",
 }
 
 REST_USE_JWT = True
 
+GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
+
+# Local verification of Google ID tokens (authentication/google.py)
+GOOGLE_JWKS_URL = os.getenv("GOOGLE_JWKS_URL", "https://www.googleapis.com/oauth2/v3/certs")
+GOOGLE_JWKS_MIN_REFRESH = int(os.getenv("GOOGLE_JWKS_MIN_REFRESH", 60))
+GOOGLE_ID_TOKEN_LEEWAY = 30  # seconds of clock skew tolerated on exp/iat
+
 SOCIALACCOUNT_PROVIDERS = {
     'google': {
         'SCOPE': ['profile', 'email'],
@@ -194,7 +292,7 @@ SOCIALACCOUNT_PROVIDERS = {
             'access_type': 'offline',
         },          
         'APP': {
-            'client_id': os.getenv("GOOGLE_CLIENT_ID"),
+            'client_id': GOOGLE_CLIENT_ID,
             'secret': os.getenv("GOOGLE_CLIENT_SECRET"),
             'key': '',   
         },
@@ -216,12 +314,33 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=5),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
+    # Re-reads the user's profile claims into each refreshed access token (authentication/tokens.py).
+    'TOKEN_REFRESH_SERIALIZER': 'authentication.tokens.ProfileTokenRefreshSerializer',
 }
 
+# Seconds between rebuilds of the in-process filter in front of the token blacklist
+# (authentication/blacklist.py); 0 checks the database on every refresh. Tokens blacklisted
+# between rebuilds are announced through the 'auth' cache, so the filter is off unless that
+# cache is shared by all workers.
+TOKEN_BLACKLIST_FILTER_INTERVAL = int(os.getenv('TOKEN_BLACKLIST_FILTER_INTERVAL', 0 if LOCAL_CACHE else 60))
+
 SITE_ID = 1 # to avoid errors while using django.contrib.sites since site_id is used by G-OAuth
 
 SOCIALACCOUNT_ADAPTER = 'authentication.adapters.CustomSocialAccountAdapter'
 
+# Request logging (Transport_Pool/middlewares.py): share of requests logged; 5xx and slow ones always are.
+REQUEST_LOG_SAMPLE_RATE = float(os.getenv("REQUEST_LOG_SAMPLE_RATE", 1))
+REQUEST_LOG_SLOW_MS = float(os.getenv("REQUEST_LOG_SLOW_MS", 1000))
+
+# /metrics is served to staff sessions and to scrapers sending "Authorization: Bearer <METRICS_TOKEN>"
+# (Prometheus: the scrape config's `authorization` credentials). Empty: staff only.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Loggers write into the "queue" handler; a background thread (Transport_Pool/log.py) does the
+# actual writing, so requests never block on log I/O. Files rotate at LOG_MAX_BYTES.
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 5))
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -230,24 +349,55 @@ LOGGING = {
             "format": "[{asctime}] {levelname} {name} {message}",
             "style": "{",
         },
+        "json": {
+            "()": "Transport_Pool.log.JsonFormatter",
+        },
+    },
+    "filters": {
+        "access": {
+            "()": "logging.Filter",
+            "name": "api.access",
+        },
     },
     "handlers": {
         "file": {
             "level": "ERROR",
-            "class": "logging.FileHandler",
+            "class": "logging.handlers.RotatingFileHandler",
             "filename": os.path.join(BASE_DIR, "errors.log"),
-            "formatter": "verbose",
+            "maxBytes": LOG_MAX_BYTES,
+            "backupCount": LOG_BACKUP_COUNT,
+            "formatter": "json",
+        },
+        "access_file": {
+            "class": "logging.handlers.RotatingFileHandler",
+            "filename": os.path.join(BASE_DIR, "requests.log"),
+            "maxBytes": LOG_MAX_BYTES,
+            "backupCount": LOG_BACKUP_COUNT,
+            "formatter": "json",
+            "filters": ["access"],
         },
         "console": {
+            "level": "ERROR",
             "class": "logging.StreamHandler",
             "formatter": "verbose",
         },
+        "queue": {
+            "class": "Transport_Pool.log.BackgroundHandler",
+            # Handlers are configured in name order; these sort before "queue".
+            "targets": ["cfg://handlers.file", "cfg://handlers.access_file", "cfg://handlers.console"],
+            "queue_size": int(os.getenv("LOG_QUEUE_SIZE", 10000)),
+        },
     },
     "loggers": {
         "django": {
-            "handlers": ["file", "console"],
+            "handlers": ["queue"],
             "level": "ERROR",
             "propagate": True,
         },
+        "api.access": {
+            "handlers": ["queue"],
+            "level": "INFO",
+            "propagate": False,
+        },
     },
 }
\ No newline at end of file
@@ -0,0 +1,247 @@
+import threading
+import time
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from prometheus_client import REGISTRY
+from rest_framework.exceptions import ValidationError
+
+from authentication.models import CustomUser
+from authentication.tokens import ProfileRefreshToken
+from Transport_Pool import export
+from Transport_Pool.pooled_postgresql import pool as pool_module
+from Transport_Pool.pooled_postgresql.metrics import PoolMetrics
+from Transport_Pool.pooled_postgresql.pool import ConnectionPool, PoolTimeout
+
+
+class RequestMetricsTests(TransactionTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email='rider@thapar.edu', full_name='Rider One', phone_number='9812345678', gender='Male',
+        )
+        self.token = str(ProfileRefreshToken.for_user(self.user).access_token)
+
+    def test_queries_are_counted_under_asgi(self):
+        observed = []
+        with mock.patch(
+            'Transport_Pool.middlewares.observe_request',
+            lambda request, response, duration, count, seconds: observed.append(count),
+        ):
+            # The ORM runs in a sync_to_async thread, not where the middleware runs.
+            response = async_to_sync(AsyncClient().get)('/pools/', headers={'authorization': f'Bearer {self.token}'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(observed), 1)
+        self.assertGreater(observed[0], 0)
+
+
+@override_settings(METRICS_TOKEN='scrape-secret')
+class MetricsEndpointTests(TestCase):
+    def test_metrics_need_the_token_or_a_staff_session(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', headers={'authorization': 'Bearer wrong'}).status_code, 403)
+
+        response = self.client.get('/metrics', headers={'authorization': 'Bearer scrape-secret'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'http_requests_total', response.content)
+
+        self.client.force_login(CustomUser.objects.create_superuser(email='admin@thapar.edu', full_name='Admin'))
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    def test_connection_pool_figures_are_served(self):
+        pool = ConnectionPool(max_size=2, metrics=PoolMetrics('scraped'))
+        pool.getconn(lambda: FakeConnection(0))
+
+        response = self.client.get('/metrics', headers={'authorization': 'Bearer scrape-secret'})
+        self.assertIn(b'db_pool_checkouts_total{alias="scraped"} 1.0', response.content)
+        self.assertIn(b'db_pool_connections{alias="scraped",state="in_use"} 1.0', response.content)
+        self.assertIn(b'db_pool_max_connections{alias="scraped"} 2.0', response.content)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_no_token_configured_means_staff_only(self):
+        self.assertEqual(self.client.get('/metrics', headers={'authorization': 'Bearer '}).status_code, 403)
+
+
+@mock.patch.object(export, 'CHUNK_SIZE', 2)
+class ExportResponseTests(SimpleTestCase):
+    rows = [{'id': n, 'name': f'Row {n}', 'tags': ['a', n]} for n in range(5)]
+
+    def chunks(self, fmt, columns):
+        response = export.export_response(RequestFactory().get('/'), iter(self.rows), columns, fmt, 'rows')
+        return [chunk.decode() for chunk in response.streaming_content]
+
+    def test_csv_writes_the_header_once_and_a_chunk_per_batch(self):
+        chunks = self.chunks('csv', ['name', 'tags'])
+
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(''.join(chunks).splitlines(), [
+            'name,tags', *[f'Row {n},"[""a"", {n}]"' for n in range(5)],
+        ])
+
+    def test_ndjson_writes_one_line_per_row(self):
+        chunks = self.chunks('ndjson', ['id'])
+
+        self.assertEqual(chunks, ['{"id": 0}\n{"id": 1}\n', '{"id": 2}\n{"id": 3}\n', '{"id": 4}\n'])
+
+    def test_fields_select_known_columns_in_the_given_order(self):
+        def columns(fields):
+            return export.selected_columns(mock.Mock(query_params={'fields': fields}), ['id', 'name', 'tags'])
+
+        self.assertEqual(columns(''), ['id', 'name', 'tags'])
+        self.assertEqual(columns('tags, id'), ['tags', 'id'])
+        for fields in ('id,secret', ','):
+            with self.assertRaises(ValidationError):
+                columns(fields)
+
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.opened = []
+
+    def connect(self):
+        self.opened.append(FakeConnection(len(self.opened)))
+        return self.opened[-1]
+
+    def test_checkouts_beyond_max_size_wait_then_time_out(self):
+        pool = ConnectionPool(max_size=1, timeout=5)
+        first = pool.getconn(self.connect)
+        got = []
+        waiter = threading.Thread(target=lambda: got.append(pool.getconn(self.connect)))
+        waiter.start()
+        time.sleep(0.05)
+        self.assertEqual(got, [])
+        pool.putconn(first)
+        waiter.join(5)
+
+        self.assertEqual(got, [first])
+        self.assertEqual(len(self.opened), 1)
+        self.assertEqual(pool.stats()['waits'], 1)
+
+        pool.timeout = 0.01
+        with self.assertRaises(PoolTimeout):
+            pool.getconn(self.connect)
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+    def test_a_failed_connect_frees_its_slot(self):
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+
+        def refuse():
+            raise OSError('refused')
+
+        with self.assertRaises(OSError):
+            pool.getconn(refuse)
+        self.assertEqual(pool.getconn(self.connect), self.opened[0])
+
+    @mock.patch.object(pool_module, 'time', new_callable=FakeClock)
+    def test_idle_and_old_connections_are_closed(self, clock):
+        pool = ConnectionPool(min_size=2, max_idle=60, max_lifetime=600)
+        first, second, third = (pool.getconn(self.connect) for _ in range(3))
+        pool.putconn(first)
+        pool.putconn(second)
+        clock.now += 61
+        pool.putconn(third)
+
+        # Both first and second sat idle past max_idle, but min_size connections are kept.
+        self.assertEqual([c.closed for c in self.opened], [True, False, False])
+        self.assertEqual(pool.getconn(self.connect), third)
+
+        clock.now += 600
+        pool.putconn(third)
+        self.assertTrue(third.closed)
+        # Past max_lifetime too: closed when taken instead of handed out.
+        self.assertIs(pool.getconn(self.connect), self.opened[3])
+        self.assertTrue(second.closed)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    @mock.patch.object(pool_module, 'time', new_callable=FakeClock)
+    def test_broken_connections_are_replaced(self, clock):
+        broken = set()
+
+        def check(connection):
+            if connection.number in broken:
+                raise OSError('server closed the connection')
+
+        pool = ConnectionPool(check=check, check_after=10)
+        first = pool.getconn(self.connect)
+        pool.putconn(first)
+        broken.add(first.number)
+        # Recently returned connections are not checked.
+        self.assertEqual(pool.getconn(self.connect), first)
+
+        pool.putconn(first)
+        clock.now += 11
+        second = pool.getconn(self.connect)
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+
+        # Closed by the server side: dropped without running the check.
+        pool.putconn(second)
+        second.closed = True
+        self.assertIs(pool.getconn(self.connect), self.opened[2])
+        self.assertEqual(pool.stats()['failed_checks'], 1)
+
+    def test_unreusable_connections_are_closed(self):
+        pool = ConnectionPool(max_size=1)
+        first = pool.getconn(self.connect)
+        pool.putconn(first, reusable=False)
+
+        self.assertTrue(first.closed)
+        self.assertIsNot(pool.getconn(self.connect), first)
+
+    def test_stats(self):
+        pool = ConnectionPool(max_size=3)
+        first, second = pool.getconn(self.connect), pool.getconn(self.connect)
+        pool.putconn(first)
+        pool.getconn(self.connect)
+        pool.putconn(second, reusable=False)
+
+        self.assertEqual(pool.stats(), {
+            'checkouts': 3,
+            'waits': 0,
+            'wait_seconds': 0.0,
+            'timeouts': 0,
+            'connections_opened': 2,
+            'connections_closed': 1,
+            'failed_checks': 0,
+            'size': 1,
+            'idle': 0,
+            'in_use': 1,
+            'max_size': 3,
+        })
+
+    def test_metrics_follow_the_stats(self):
+        pool = ConnectionPool(max_size=1, timeout=0.01, metrics=PoolMetrics('follows-stats'))
+        first = pool.getconn(self.connect)
+        with self.assertRaises(PoolTimeout):
+            pool.getconn(self.connect)
+        pool.putconn(first)
+        pool.getconn(self.connect)
+        pool.putconn(first, reusable=False)
+
+        def sample(name, **labels):
+            return REGISTRY.get_sample_value(name, {'alias': 'follows-stats', **labels})
+
+        stats = pool.stats()
+        for stat in ('checkouts', 'waits', 'wait_seconds', 'timeouts', 'connections_opened', 'connections_closed'):
+            self.assertEqual(sample(f'db_pool_{stat}_total'), stats[stat], stat)
+        self.assertEqual(sample('db_pool_connections', state='idle'), 0)
+        self.assertEqual(sample('db_pool_connections', state='in_use'), 0)
+        self.assertEqual(sample('db_pool_max_connections'), 1)
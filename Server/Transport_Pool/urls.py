@@ -15,9 +15,13 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import include, path
+from Transport_Pool.metrics import metrics_view
+from Transport_Pool.views import DatabasePoolStatsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('internal/db-pool/', DatabasePoolStatsView.as_view(), name='db_pool_stats'),
+    path('metrics', metrics_view, name='metrics'),
     path('auth/', include('authentication.urls')),
     path('accounts/', include('allauth.urls')),
     path('', include('Pool.urls')),
@@ -0,0 +1,16 @@
+import os
+
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from Transport_Pool.pooled_postgresql.pool import pool_stats
+
+
+class DatabasePoolStatsView(APIView):
+    """Checkout/wait counters of the DB connection pool in the worker process that serves the request."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({'pid': os.getpid(), 'pools': pool_stats()}, status=status.HTTP_200_OK)
@@ -2,13 +2,11 @@ from allauth.socialaccount.adapter import DefaultSocialAccountAdapter
 
 class CustomSocialAccountAdapter(DefaultSocialAccountAdapter):
     def save_user(self, request, sociallogin, form=None):
-        user = super().save_user(request, sociallogin, form)
-        data = sociallogin.account.extra_data
-        name = data.get("name")
+        # Set before the default save so the new user is written once.
+        name = sociallogin.account.extra_data.get("name")
         if name:
-            user.full_name = name
-            user.save()
-        return user
+            sociallogin.user.full_name = name
+        return super().save_user(request, sociallogin, form)
 
 
 # from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
@@ -0,0 +1,126 @@
+from django.utils.functional import SimpleLazyObject
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from authentication.tokens import PROFILE_CLAIMS
+from authentication.user_cache import (
+    aget_cached_user, aget_claims_state, aset_claims_state, get_cached_user, get_claims_state, set_claims_state,
+)
+
+
+def check_user(user, validated_token):
+    # The checks JWTAuthentication.get_user makes once it has the user.
+    if user is None:
+        raise AuthenticationFailed('User not found', code='user_not_found')
+
+    if not user.is_active:
+        raise AuthenticationFailed('User is inactive', code='user_inactive')
+
+    if api_settings.CHECK_REVOKE_TOKEN:
+        if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed("The user's password has been changed.", code='password_changed')
+
+    return user
+
+
+def _revoke_hash(password):
+    return get_md5_hash_password(password) if api_settings.CHECK_REVOKE_TOKEN else None
+
+
+def claims_state(user):
+    """What a token's claims must match to be trusted for `user`, who has passed check_user()."""
+    return (_revoke_hash(user.password), *(getattr(user, claim) for claim in PROFILE_CLAIMS))
+
+
+def token_claims_state(validated_token):
+    revoke = validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) if api_settings.CHECK_REVOKE_TOKEN else None
+    return (revoke, *(validated_token[claim] for claim in PROFILE_CLAIMS))
+
+
+class AsyncJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication with an awaitable `aauthenticate`, used by the async
+    read views (see Transport_Pool/async_api.py). Token checks are pure CPU;
+    only the user lookup goes through the async ORM.
+    """
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        user = await self.user_model.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).afirst()
+        return check_user(user, validated_token)
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    request.user built from a token's claims. id, gender and profile_complete
+    are answered from the token; anything else (full_name, is_staff, using it
+    in a query or comparing it with a model instance) loads the user through
+    the user cache on first use, which needs a sync context.
+    """
+
+    def __init__(self, validated_token):
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        super().__init__(lambda: check_user(get_cached_user(user_id), validated_token))
+        self.__dict__.update(
+            id=user_id, pk=user_id, is_authenticated=True, is_anonymous=False,
+            **{claim: validated_token[claim] for claim in PROFILE_CLAIMS},
+        )
+
+    def __bool__(self):
+        # LazyObject would load the user to answer this; permission checks ask it on every request.
+        return True
+
+
+class ClaimsJWTAuthentication(AsyncJWTAuthentication):
+    """
+    Trusts the profile claims ProfileRefreshToken puts into access tokens, so
+    authenticating a request with a current token runs no user query. A token
+    is current while the claim state stored for its user (user_cache.py)
+    matches it; the state is only stored for active users, and dropped when
+    the user changes. Without a stored state, or when it differs, and for
+    tokens without claims, the user is authenticated from the cached row
+    instead, which stores the state again for the next request.
+    """
+
+    def get_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        claimed = self.has_claims(validated_token)
+        if claimed and get_claims_state(user_id) == token_claims_state(validated_token):
+            return ClaimsUser(validated_token)
+        user = check_user(get_cached_user(user_id), validated_token)
+        if claimed:
+            set_claims_state(user_id, claims_state(user))
+        return user
+
+    async def aget_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        claimed = self.has_claims(validated_token)
+        if claimed and await aget_claims_state(user_id) == token_claims_state(validated_token):
+            return ClaimsUser(validated_token)
+        user = check_user(await aget_cached_user(user_id), validated_token)
+        if claimed:
+            await aset_claims_state(user_id, claims_state(user))
+        return user
+
+    def has_claims(self, validated_token):
+        return all(claim in validated_token for claim in PROFILE_CLAIMS)
@@ -0,0 +1,134 @@
+"""
+In-process screen in front of the refresh-token blacklist.
+
+Every refresh used to ask the database whether the token's jti is
+blacklisted. This module keeps a Bloom filter of the jtis of blacklisted,
+unexpired tokens, rebuilt in a background thread every
+TOKEN_BLACKLIST_FILTER_INTERVAL seconds. A jti the filter does not contain
+was not blacklisted when the filter was built, so the database is only asked
+about the rest (about 1% false positives) and about tokens blacklisted since.
+
+Those recent ones are announced through the 'auth' cache, which must be
+shared by all workers and must not evict (see CACHES): saving a
+BlacklistedToken (signals.py) sets a key for the jti that outlives any filter
+built before it. A filter is only used while the cache has held those keys
+since before the filter was built, which SINCE_KEY records: if the cache was
+flushed or restarted, keys may have been lost and every check goes to the
+database until the next rebuild. So does every check until a filter younger
+than the interval exists.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from authentication.user_cache import user_cache
+
+logger = logging.getLogger(__name__)
+
+RECENT_KEY = 'auth:blacklisted:{}'
+# Time from which the cache holds a RECENT_KEY for every token blacklisted since.
+SINCE_KEY = 'auth:blacklisted-since'
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter of strings, sized for `capacity` items at `error_rate`."""
+
+    def __init__(self, capacity, error_rate=0.01):
+        # At least 1024 bits, so that a nearly empty blacklist does not make a tiny, saturated filter.
+        self.size = max(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2), 1024)
+        self.hash_count = max(round(-math.log2(error_rate)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # Double hashing: k positions from the two halves of one digest.
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class BlacklistFilter:
+    def __init__(self, interval):
+        self.interval = interval
+        # (bloom filter, time.monotonic() and time.time() taken before its query), replaced whole
+        self.built = None
+        self.building = False
+        self.lock = threading.Lock()
+
+    def might_be_blacklisted(self, jti):
+        """False only if `jti` is certainly not blacklisted; True means ask the database."""
+        built = self.built
+        if built is None or time.monotonic() - built[1] > self.interval:
+            self.rebuild_in_background()
+            return True
+        bloom, _, queried_at = built
+        if jti in bloom:
+            return True
+        recent_key = RECENT_KEY.format(jti)
+        found = user_cache().get_many([recent_key, SINCE_KEY])
+        since = found.get(SINCE_KEY)
+        return recent_key in found or since is None or since > queried_at
+
+    def rebuild_in_background(self):
+        with self.lock:
+            if self.building:
+                return
+            self.building = True
+        threading.Thread(target=self._rebuild_thread, name='blacklist-filter', daemon=True).start()
+
+    def _rebuild_thread(self):
+        try:
+            self.rebuild()
+        finally:
+            connection.close()
+
+    def rebuild(self):
+        try:
+            # Start the record of recent keys if the cache has none (first use, or flushed).
+            user_cache().add(SINCE_KEY, time.time(), timeout=None)
+            # Taken before the query: a jti blacklisted after this is covered by its cache key,
+            # which lives longer than this filter is used.
+            started, queried_at = time.monotonic(), time.time()
+            blacklisted = BlacklistedToken.objects.filter(token__expires_at__gt=aware_utcnow())
+            bloom = BloomFilter(blacklisted.count())
+            for jti in blacklisted.values_list('token__jti', flat=True).iterator(chunk_size=10000):
+                bloom.add(jti)
+            self.built = (bloom, started, queried_at)
+        except Exception:
+            logger.exception('Rebuilding the token blacklist filter failed')
+        finally:
+            self.building = False
+
+
+def note_blacklisted(jti):
+    if settings.TOKEN_BLACKLIST_FILTER_INTERVAL:
+        user_cache().set(RECENT_KEY.format(jti), 1, timeout=2 * settings.TOKEN_BLACKLIST_FILTER_INTERVAL)
+
+
+_filter = None
+
+
+def get_filter():
+    global _filter
+    if _filter is None:
+        _filter = BlacklistFilter(settings.TOKEN_BLACKLIST_FILTER_INTERVAL)
+    return _filter
+
+
+def might_be_blacklisted(jti):
+    if not settings.TOKEN_BLACKLIST_FILTER_INTERVAL:
+        return True
+    return get_filter().might_be_blacklisted(jti)
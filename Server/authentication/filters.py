@@ -0,0 +1,12 @@
+import django_filters
+
+from authentication.models import CustomUser
+
+
+class UserFilter(django_filters.FilterSet):
+    joined_after = django_filters.IsoDateTimeFilter(field_name='date_joined', lookup_expr='gte')
+    joined_before = django_filters.IsoDateTimeFilter(field_name='date_joined', lookup_expr='lt')
+
+    class Meta:
+        model = CustomUser
+        fields = ['gender', 'is_active', 'google_authenticated']
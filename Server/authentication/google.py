@@ -0,0 +1,103 @@
+"""
+Verification of Google ID tokens (the `credential` Google Identity Services
+hands to the browser) without calling Google per login.
+
+Google signs ID tokens with keys it publishes as a JWKS. GoogleKeySet keeps
+that set in memory for as long as its Cache-Control max-age allows and
+fetches it again when it expires or a token names a key it has not seen
+(Google rotates keys every few days), at most once per
+GOOGLE_JWKS_MIN_REFRESH seconds.
+"""
+import re
+import threading
+import time
+
+import jwt
+import requests
+from django.conf import settings
+
+GOOGLE_ISSUERS = ('accounts.google.com', 'https://accounts.google.com')
+MAX_AGE = re.compile(r'max-age=(\d+)')
+
+
+class InvalidGoogleToken(Exception):
+    pass
+
+
+def fetch_jwks(url):
+    """The JWKS at `url` and how many seconds it may be cached."""
+    response = requests.get(url, timeout=5)
+    response.raise_for_status()
+    max_age = MAX_AGE.search(response.headers.get('Cache-Control', ''))
+    return response.json(), int(max_age.group(1)) if max_age else 0
+
+
+class GoogleKeySet:
+    def __init__(self, url, min_refresh, fetch=fetch_jwks):
+        self.url = url
+        self.min_refresh = min_refresh
+        self.fetch = fetch
+        self.keys = {}
+        self.expires_at = 0.0
+        self.fetched_at = None
+        self.lock = threading.Lock()
+
+    def get_key(self, kid):
+        now = time.monotonic()
+        if now >= self.expires_at or kid not in self.keys:
+            self.refresh(now)
+        try:
+            return self.keys[kid]
+        except KeyError:
+            raise InvalidGoogleToken(f'Unknown signing key {kid!r}.')
+
+    def refresh(self, now):
+        with self.lock:
+            # Unknown kids in forged tokens must not turn into a request to Google each.
+            recently = self.fetched_at is not None and now - self.fetched_at < self.min_refresh
+            if recently and now < self.expires_at:
+                return
+            try:
+                jwks, max_age = self.fetch(self.url)
+                keys = {key.key_id: key for key in jwt.PyJWKSet.from_dict(jwks).keys}
+            except (requests.RequestException, ValueError, jwt.PyJWTError) as exc:
+                if not self.keys:
+                    raise InvalidGoogleToken(f"Could not fetch Google's signing keys: {exc}")
+                # Keep verifying with the keys we have; try again after min_refresh.
+                self.fetched_at = now
+                self.expires_at = now + self.min_refresh
+                return
+            self.keys = keys
+            self.fetched_at = now
+            self.expires_at = now + max(max_age, self.min_refresh)
+
+
+_key_set = None
+
+
+def get_key_set():
+    global _key_set
+    if _key_set is None:
+        _key_set = GoogleKeySet(settings.GOOGLE_JWKS_URL, settings.GOOGLE_JWKS_MIN_REFRESH)
+    return _key_set
+
+
+def verify_id_token(token):
+    """The claims of a valid Google ID token issued to this app; raises InvalidGoogleToken otherwise."""
+    try:
+        header = jwt.get_unverified_header(token)
+        key = get_key_set().get_key(header.get('kid'))
+        claims = jwt.decode(
+            token,
+            key.key,
+            algorithms=['RS256'],
+            audience=settings.GOOGLE_CLIENT_ID,
+            issuer=GOOGLE_ISSUERS,
+            leeway=settings.GOOGLE_ID_TOKEN_LEEWAY,
+            options={'require': ['exp', 'iat', 'iss', 'aud', 'sub']},
+        )
+    except jwt.PyJWTError as exc:
+        raise InvalidGoogleToken(str(exc))
+    if not claims.get('email') or not claims.get('email_verified'):
+        raise InvalidGoogleToken('Token has no verified email address.')
+    return claims
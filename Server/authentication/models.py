@@ -61,4 +61,9 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     
 
     def __str__(self):
-        return f"{self.full_name} ({self.email})"
\ No newline at end of file
+        return f"{self.full_name} ({self.email})"
+
+    # Required before creating or joining pools; also carried in access tokens (see tokens.py).
+    @property
+    def profile_complete(self):
+        return bool(self.phone_number and self.gender)
\ No newline at end of file
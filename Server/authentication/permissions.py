@@ -10,6 +10,6 @@ class IsProfileComplete(BasePermission):
 
     def has_permission(self, request, view):
         u = request.user
-        if not (u and u.is_authenticated and u.phone_number and u.gender):
+        if not (u and u.is_authenticated and u.profile_complete):
             raise PermissionDenied(self.message)
         return True
\ No newline at end of file
@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from authentication.models import CustomUser
+from authentication.blacklist import note_blacklisted
+from authentication.user_cache import invalidate_user
+
+
+# QuerySet.update() sends no signals; call invalidate_user() after bulk changes to users.
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def user_changed(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def token_blacklisted(sender, instance, created, **kwargs):
+    if created:
+        note_blacklisted(instance.token.jti)
@@ -1,3 +1,315 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import time
+from datetime import timedelta
 
-# Create your tests here.
+import jwt
+from allauth.socialaccount.models import SocialAccount
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from authentication import blacklist, google
+from authentication.models import CustomUser
+from authentication.tokens import ProfileRefreshToken
+from authentication.user_cache import user_cache
+from authentication.views import AllUsersView
+from Pool.models import Pool
+
+CLIENT_ID = 'test-client.apps.googleusercontent.com'
+
+
+def make_key(kid):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    jwk.update(kid=kid, alg='RS256', use='sig')
+    return private_key, jwk
+
+
+class StandInJwks:
+    """Plays Google's certs endpoint: serves whatever keys the test has published."""
+
+    def __init__(self, *jwks):
+        self.keys = list(jwks)
+        self.fetches = 0
+
+    def __call__(self, url):
+        self.fetches += 1
+        return {'keys': self.keys}, 3600
+
+
+@override_settings(GOOGLE_CLIENT_ID=CLIENT_ID)
+class GoogleIdTokenLoginTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.private_key, cls.jwk = make_key('key-1')
+
+    def setUp(self):
+        self.jwks = StandInJwks(self.jwk)
+        google._key_set = google.GoogleKeySet('https://certs.invalid', min_refresh=60, fetch=self.jwks)
+        self.client = APIClient()
+
+    def tearDown(self):
+        google._key_set = None
+
+    def id_token(self, private_key=None, kid='key-1', **claims):
+        now = int(time.time())
+        payload = {
+            'iss': 'https://accounts.google.com', 'aud': CLIENT_ID, 'sub': '1234567890',
+            'email': 'rider@thapar.edu', 'email_verified': True, 'name': 'Rider One',
+            'iat': now, 'exp': now + 3600,
+        }
+        payload.update(claims)
+        return jwt.encode(payload, private_key or self.private_key, algorithm='RS256', headers={'kid': kid})
+
+    def login(self, token, **data):
+        return self.client.post('/auth/google/id-token/', {'id_token': token, **data}, format='json')
+
+    def test_first_login_creates_user_and_asks_for_profile(self):
+        response = self.login(self.id_token())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('temp_token', response.data)
+        user = CustomUser.objects.get(email='rider@thapar.edu')
+        self.assertTrue(user.google_authenticated)
+        self.assertEqual(user.full_name, 'Rider One')
+        self.assertTrue(SocialAccount.objects.filter(user=user, provider='google', uid='1234567890').exists())
+
+    def test_returning_user_logs_in_with_few_queries(self):
+        self.login(self.id_token())
+        CustomUser.objects.filter(email='rider@thapar.edu').update(phone_number='9812345678', gender='Female')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.login(self.id_token())
+
+        # Account and user in one query, last_login, and the outstanding refresh token
+        # (TestCase turns the transaction into a savepoint; leave those out).
+        statements = [q['sql'] for q in queries.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertEqual(len(statements), 3, statements)
+
+        self.assertEqual(response.status_code, 200)
+        access = jwt.decode(response.data['access'], options={'verify_signature': False})
+        self.assertEqual(access['gender'], 'Female')
+        self.assertTrue(access['profile_complete'])
+        self.assertEqual(self.jwks.fetches, 1)
+
+    def test_other_domains_are_rejected_before_any_write(self):
+        with self.assertNumQueries(0):
+            response = self.login(self.id_token(email='someone@gmail.com'))
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(CustomUser.objects.exists())
+
+    def test_invalid_tokens_are_rejected(self):
+        other_key, _ = make_key('key-1')
+        for token in (
+            self.id_token(private_key=other_key),
+            self.id_token(aud='someone-else'),
+            self.id_token(iss='https://evil.example'),
+            self.id_token(exp=int(time.time()) - 3600),
+            self.id_token(email_verified=False),
+            'not-a-token',
+        ):
+            self.assertEqual(self.login(token).status_code, 400)
+        self.assertFalse(CustomUser.objects.exists())
+
+    def test_rotated_keys_are_fetched_once(self):
+        self.login(self.id_token())
+        new_key, new_jwk = make_key('key-2')
+        self.jwks.keys.append(new_jwk)
+        google._key_set.fetched_at -= 61
+
+        self.assertEqual(self.login(self.id_token(private_key=new_key, kid='key-2')).status_code, 200)
+        self.assertEqual(self.jwks.fetches, 2)
+        # Unknown kids do not send every forged token to Google.
+        self.assertEqual(self.login(self.id_token(kid='key-3')).status_code, 400)
+        self.assertEqual(self.jwks.fetches, 2)
+
+    def test_signup_intent_for_existing_user(self):
+        self.login(self.id_token())
+
+        response = self.login(self.id_token(), signup_intent=True)
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_deactivated_users_get_no_tokens(self):
+        self.login(self.id_token())
+        CustomUser.objects.filter(email='rider@thapar.edu').update(
+            phone_number='9812345678', gender='Female', is_active=False,
+        )
+
+        response = self.login(self.id_token())
+
+        self.assertEqual(response.status_code, 403)
+        self.assertNotIn('access', response.data)
+        # Found by email rather than by Google account: still refused, and nothing is linked.
+        response = self.login(self.id_token(sub='another-google-account'))
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(SocialAccount.objects.count(), 1)
+
+
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        user_cache().clear()
+        self.user = CustomUser.objects.create_user(
+            email='rider@thapar.edu', full_name='Rider One', phone_number='9812345678', gender='Female',
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {ProfileRefreshToken.for_user(self.user).access_token}')
+
+    def user_queries(self, path='/pools/'):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return [q['sql'] for q in queries.captured_queries if 'authentication_customuser' in q['sql']]
+
+    def change(self, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            for name, value in fields.items():
+                setattr(self.user, name, value)
+            self.user.save()
+
+    def test_current_claims_skip_the_user_lookup(self):
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(self.user_queries(), [])
+
+    def test_claims_are_checked_again_after_the_state_is_lost(self):
+        self.user_queries()
+        user_cache().clear()
+        self.assertEqual(len(self.user_queries()), 1)
+
+    def test_stale_claims_are_not_trusted(self):
+        creator = CustomUser.objects.create_user(
+            email='creator@thapar.edu', full_name='Creator', phone_number='9812345679', gender='Female',
+        )
+        pool = Pool.objects.create(
+            end_point='Patiala Railway Station', departure_time=timezone.now() + timedelta(days=1),
+            arrival_time=timezone.now() + timedelta(days=1, hours=1), transport_mode='Cab',
+            total_persons=4, created_by=creator, is_female_only=True,
+        )
+        self.user_queries()
+        self.change(gender='Male')
+
+        # The token still says Female; the user row decides.
+        response = self.client.post(f'/pools/{pool.pk}/join/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_deactivated_users_are_refused(self):
+        self.user_queries()
+        self.change(is_active=False)
+
+        self.assertEqual(self.client.get('/pools/').status_code, 401)
+
+    def test_deactivation_without_signals_is_refused_once_the_state_is_gone(self):
+        self.user_queries()
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=False)
+        # Expired or evicted: a missing state means a lookup, never trust.
+        user_cache().clear()
+
+        self.assertEqual(self.client.get('/pools/').status_code, 401)
+
+
+class UserExportTests(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(email='admin@thapar.edu', full_name='Admin')
+        self.riders = [
+            CustomUser.objects.create_user(
+                email=f'rider{n}@thapar.edu', full_name=f'Rider {n}', phone_number=f'981234567{n}', gender=gender,
+            )
+            for n, gender in enumerate(['Female', 'Male', 'Female'])
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def export(self, **params):
+        response = self.client.get('/auth/users/', params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv_streams_the_selected_columns(self):
+        response, body = self.export(export='csv', fields='email,gender')
+
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="users.csv"')
+        self.assertEqual(list(csv.reader(io.StringIO(body))), [
+            ['email', 'gender'],
+            ['admin@thapar.edu', ''],
+            *[[rider.email, rider.gender] for rider in self.riders],
+        ])
+
+    def test_ndjson_is_narrowed_by_the_user_filters(self):
+        _, body = self.export(export='ndjson', gender='Female')
+
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['email'] for row in rows], [self.riders[0].email, self.riders[2].email])
+        self.assertEqual(list(rows[0]), AllUsersView.export_fields)
+        self.assertNotIn('password', rows[0])
+
+    def test_bad_exports_are_rejected(self):
+        for params in (
+            {'export': 'xml'},
+            {'export': 'csv', 'fields': 'email,password'},
+            {'export': 'csv', 'joined_after': 'garbage'},
+        ):
+            self.assertEqual(self.client.get('/auth/users/', params).status_code, 400, params)
+
+        self.client.force_authenticate(self.riders[0])
+        self.assertEqual(self.client.get('/auth/users/', {'export': 'csv'}).status_code, 403)
+
+
+@override_settings(TOKEN_BLACKLIST_FILTER_INTERVAL=60)
+class BlacklistFilterTests(TestCase):
+    def setUp(self):
+        user_cache().clear()
+        self.user = CustomUser.objects.create_user(
+            email='rider@thapar.edu', full_name='Rider One', phone_number='9812345678', gender='Male',
+        )
+        blacklist._filter = blacklist.BlacklistFilter(60)
+        # Built by the tests themselves, in the test transaction.
+        blacklist._filter.rebuild_in_background = lambda: None
+
+    def tearDown(self):
+        blacklist._filter = None
+
+    def refresh(self, token):
+        return self.client.post('/auth/token/refresh/', {'refresh': str(token)}, content_type='application/json')
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = blacklist.BloomFilter(5000)
+        for n in range(5000):
+            bloom.add(f'in-{n}')
+
+        self.assertTrue(all(f'in-{n}' in bloom for n in range(5000)))
+        false_positives = sum(f'out-{n}' in bloom for n in range(5000))
+        self.assertLess(false_positives, 150)
+
+    def test_rebuilt_filter_answers_without_the_database(self):
+        blacklisted, kept = ProfileRefreshToken.for_user(self.user), ProfileRefreshToken.for_user(self.user)
+        blacklisted.blacklist()
+        user_cache().clear()
+        # Before the first build every check goes to the database.
+        self.assertTrue(blacklist.might_be_blacklisted(kept['jti']))
+
+        blacklist.get_filter().rebuild()
+
+        with self.assertNumQueries(0):
+            self.assertFalse(blacklist.might_be_blacklisted(kept['jti']))
+        self.assertTrue(blacklist.might_be_blacklisted(blacklisted['jti']))
+
+    def test_rotated_tokens_cannot_be_replayed(self):
+        blacklist.get_filter().rebuild()
+        token = ProfileRefreshToken.for_user(self.user)
+
+        self.assertEqual(self.refresh(token).status_code, 200)
+        # Blacklisted after the filter was built: caught by the recent-token key.
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+        # A flushed cache may have lost recent keys; the filter is not trusted until rebuilt.
+        user_cache().clear()
+        self.assertEqual(self.refresh(token).status_code, 401)
+        blacklist.get_filter().rebuild()
+        self.assertEqual(self.refresh(token).status_code, 401)
@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken, Token
+
+from authentication.blacklist import might_be_blacklisted
+
+# Claims copied from the user into every access token, read back by ClaimsJWTAuthentication.
+PROFILE_CLAIMS = ('gender', 'profile_complete')
+
+
+class ProfileRefreshToken(RefreshToken):
+    """
+    RefreshToken whose access tokens carry the user's gender and profile_complete
+    flag, read when the access token is minted (at login and on every refresh),
+    so that a changed profile shows up in the next access token.
+
+    The user is read from the database rather than the user cache. Claims that
+    have gone stale are not trusted anyway (see ClaimsJWTAuthentication), but
+    fresh ones keep requests on the path without a user lookup.
+
+    The blacklist check is screened by the in-process filter in blacklist.py.
+    """
+
+    # User handed over by for_user(); spares the first access token a query.
+    profile = None
+
+    @classmethod
+    def for_user(cls, user, current=False):
+        """`current`: `user` was just read from the database and has not been changed since."""
+        token = super().for_user(user)
+        if current:
+            token.profile = user
+        return token
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        # RefreshToken copies its own iat; the claims are as fresh as this token, not the login.
+        access.set_iat()
+        if self.profile is not None:
+            user, self.profile = self.profile, None
+        else:
+            user = get_user_model().objects.filter(
+                **{api_settings.USER_ID_FIELD: self[api_settings.USER_ID_CLAIM]}
+            ).first()
+        if user is not None:
+            for claim in PROFILE_CLAIMS:
+                access[claim] = getattr(user, claim)
+        return access
+
+    def check_blacklist(self):
+        # Runs whenever a refresh token is read (refresh, logout); most are not blacklisted.
+        if might_be_blacklisted(self[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+
+class ProfileTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = ProfileRefreshToken
+
+
+class EventStreamTicket(Token):
+    """
+    Opens the pool event stream (Pool.views.pool_events) and nothing else.
+
+    EventSource cannot send headers, so the stream is authenticated from the
+    query string, which ends up in access logs. A ticket there is only good
+    for a few seconds and only for that one URL, unlike an access token.
+    """
+    token_type = 'event_stream'
+    lifetime = timedelta(seconds=30)
@@ -1,5 +1,7 @@
+from django.conf import settings
 from django.urls import path
-from authentication.views import GoogleLoginView, UserAdditionalInfoView, AllUsersView, LogoutView, CurrentUserProfileView
+from Transport_Pool.async_api import as_async_view
+from authentication.views import GoogleLoginView, GoogleIdTokenLoginView, UserAdditionalInfoView, AllUsersView, LogoutView, CurrentUserProfileView
 from rest_framework_simplejwt import views as jwt_views
 
 app_name = 'authentication' # Adding namespace for frontend integration ease
@@ -7,6 +9,8 @@ app_name = 'authentication' # Adding namespace for frontend integration ease
 urlpatterns = [    
     # Google OAuth login
     path('google/', GoogleLoginView.as_view(), name='google_login'),
+    # Google login from an ID token, verified without calling Google
+    path('google/id-token/', GoogleIdTokenLoginView.as_view(), name='google_id_token_login'),
 
     # Additional info
     path('user/register-info/', UserAdditionalInfoView.as_view(), name='register_info'),
@@ -17,5 +21,9 @@ urlpatterns = [
     path('logout/', LogoutView.as_view(), name='logout'),
 
     # Fetching current logged in user details
-    path('user/profile/', CurrentUserProfileView.as_view(), name='user_profile'),
+    path(
+        'user/profile/',
+        as_async_view(CurrentUserProfileView, get='aget') if settings.ASYNC_READS else CurrentUserProfileView.as_view(),
+        name='user_profile',
+    ),
 ]
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Short-lived cache of CustomUser rows, and of the state access-token claims
+are checked against.
+
+Read by ClaimsJWTAuthentication and by token minting (tokens.py). The claim
+state of a user (whether they may log in, and the values of their profile
+claims) is stored after a full lookup has checked them; a token is only
+trusted without a lookup while a stored state exists and matches it. Every
+save or delete of a user (signals.py) drops both entries, so a missing entry,
+whether never written, expired or evicted, means "look the user up". A change
+made with QuerySet.update() sends no signal and is only seen once the entries
+expire, after AUTH_USER_CACHE_TIMEOUT.
+
+Like the pool cache, this only holds across workers when CACHES points at a
+shared backend.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+USER_KEY = 'auth:user:{}'
+STATE_KEY = 'auth:user-state:{}'
+
+
+def user_cache():
+    return caches[settings.AUTH_USER_CACHE_ALIAS]
+
+
+def _user_model():
+    from authentication.models import CustomUser
+    return CustomUser
+
+
+def get_cached_user(user_id):
+    """The user with this id (None if there is none), from the cache or the database."""
+    key = USER_KEY.format(user_id)
+    user = user_cache().get(key)
+    if user is None:
+        user = _user_model().objects.filter(pk=user_id).first()
+        if user is not None:
+            user_cache().set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+    return user
+
+
+async def aget_cached_user(user_id):
+    key = USER_KEY.format(user_id)
+    user = await user_cache().aget(key)
+    if user is None:
+        user = await _user_model().objects.filter(pk=user_id).afirst()
+        if user is not None:
+            await user_cache().aset(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+    return user
+
+
+def get_claims_state(user_id):
+    """The claim state stored for the user by set_claims_state(), or None."""
+    return user_cache().get(STATE_KEY.format(user_id))
+
+
+async def aget_claims_state(user_id):
+    return await user_cache().aget(STATE_KEY.format(user_id))
+
+
+def set_claims_state(user_id, state):
+    user_cache().set(STATE_KEY.format(user_id), state, settings.AUTH_USER_CACHE_TIMEOUT)
+
+
+async def aset_claims_state(user_id, state):
+    await user_cache().aset(STATE_KEY.format(user_id), state, settings.AUTH_USER_CACHE_TIMEOUT)
+
+
+def invalidate_user(user_id):
+    # Deferred to commit so a concurrent request cannot re-cache the old row.
+    transaction.on_commit(
+        lambda: user_cache().delete_many([USER_KEY.format(user_id), STATE_KEY.format(user_id)])
+    )
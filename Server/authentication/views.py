@@ -3,9 +3,13 @@ from rest_framework.decorators import api_view
 from rest_framework.response import Response 
 from rest_framework import status  
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
-from rest_framework_simplejwt.tokens import RefreshToken, AccessToken
+from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from authentication.filters import UserFilter
+from authentication.google import InvalidGoogleToken, verify_id_token
 from authentication.permissions import IsGoogleAuthenticated
+from authentication.tokens import ProfileRefreshToken
+from authentication.user_cache import aget_cached_user
 from authentication.models import CustomUser 
 from authentication.serializers import CustomUserSerializer 
 from dj_rest_auth.registration.views import SocialLoginView
@@ -13,7 +17,11 @@ from allauth.socialaccount.models import SocialAccount
 from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
 from rest_framework.authentication import SessionAuthentication
 from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
 from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework.exceptions import ValidationError
+from Transport_Pool.export import CHUNK_SIZE, export_format, export_response, selected_columns
 
 # dj_rest_auth -> extension of DRF - provides out of box authentication solns. like Social Login
 import logging
@@ -51,7 +59,7 @@ class GoogleLoginView(SocialLoginView):
                 return Response({"error": "Social account not found. Login failed."},
                                 status=status.HTTP_400_BAD_REQUEST)
 
-            email = social_user.user.email
+            email = request.user.email
             email_domain = email.split('@')[-1]
 
             # 3) Domain guard
@@ -60,8 +68,8 @@ class GoogleLoginView(SocialLoginView):
                 return Response({"error": "Only thapar.edu emails are allowed."},
                                 status=status.HTTP_403_FORBIDDEN)
 
-            # 4) Load user & detect existing signup
-            user = CustomUser.objects.get(id=request.user.id)
+            # 4) Detect existing signup (request.user is the user dj-rest-auth just logged in)
+            user = request.user
             already_signed_up = bool(user.google_authenticated)
 
             # 5) If this request is a SIGNUP attempt but user already exists -> block
@@ -77,8 +85,7 @@ class GoogleLoginView(SocialLoginView):
                 user.save()
 
             # 7) Enforce profile completeness for everyone (new or returning)
-            profile_complete = bool(user.phone_number and user.gender)
-            if not profile_complete:
+            if not user.profile_complete:
                 temp_token = AccessToken.for_user(user)
                 temp_token.set_exp(lifetime=timedelta(minutes=5))
                 return Response({
@@ -89,7 +96,7 @@ class GoogleLoginView(SocialLoginView):
                 }, status=status.HTTP_200_OK)
 
             # 8) Full login only when profile is complete
-            refresh = RefreshToken.for_user(user)
+            refresh = ProfileRefreshToken.for_user(user)
             return Response({
                 "message": "Login successful.",
                 "email": user.email,
@@ -102,6 +109,83 @@ class GoogleLoginView(SocialLoginView):
             logger.exception(f"Unexpected error during login: {str(e)}")
             return Response({"error": f"{str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class GoogleIdTokenLoginView(APIView):
+    """
+    Google login from an ID token (the `credential` Google Identity Services
+    returns), verified locally against Google's cached signing keys instead of
+    calling Google. Same request flags and responses as GoogleLoginView. The
+    domain is checked before anything is written, and the user and their
+    SocialAccount are upserted in one transaction.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        try:
+            claims = verify_id_token(request.data.get('id_token') or '')
+        except InvalidGoogleToken as e:
+            return Response({"error": f"Invalid Google token: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        email = CustomUser.objects.normalize_email(claims['email'])
+        if email.split('@')[-1] != "thapar.edu":
+            return Response({"error": "Only thapar.edu emails are allowed."},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        with transaction.atomic():
+            account = (
+                SocialAccount.objects.select_related('user')
+                .filter(provider='google', uid=claims['sub'])
+                .first()
+            )
+            if account is not None:
+                user, created = account.user, False
+            else:
+                user, created = CustomUser.objects.get_or_create(email=email, defaults={
+                    'full_name': claims.get('name') or email.split('@')[0],
+                    'google_authenticated': True,
+                })
+            if not user.is_active:
+                return Response({"error": "This account has been deactivated."},
+                                status=status.HTTP_403_FORBIDDEN)
+            if account is None:
+                SocialAccount.objects.create(user=user, provider='google', uid=claims['sub'], extra_data=claims)
+            already_signed_up = not created and user.google_authenticated
+
+            if request.data.get("signup_intent") is True and already_signed_up:
+                return Response(
+                    {"error": "You have already signed up. Please log in instead."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            changed = created
+            if not user.google_authenticated:
+                user.google_authenticated = True
+                user.save(update_fields=['google_authenticated'])
+                changed = True
+            # update() rather than save(): last_login is not in the token claims, so
+            # logging in should not invalidate the user's other access tokens.
+            CustomUser.objects.filter(pk=user.pk).update(last_login=timezone.now())
+
+        if not user.profile_complete:
+            temp_token = AccessToken.for_user(user)
+            temp_token.set_exp(lifetime=timedelta(minutes=5))
+            return Response({
+                "message": "Google auth successful. Please complete your profile.",
+                "email": user.email,
+                "name": user.full_name,
+                "temp_token": str(temp_token),
+            }, status=status.HTTP_200_OK)
+
+        # An unchanged user row is still what was just read; the first access token can use it.
+        refresh = ProfileRefreshToken.for_user(user, current=not changed)
+        return Response({
+            "message": "Login successful.",
+            "email": user.email,
+            "name": user.full_name,
+            "access": str(refresh.access_token),
+            "refresh": str(refresh)
+        }, status=status.HTTP_200_OK)
+
 # View for adding additional user information (phone_number, gender)
 class UserAdditionalInfoView(APIView):
     authentication_classes = [JWTAuthentication]
@@ -113,7 +197,7 @@ class UserAdditionalInfoView(APIView):
         if serializer.is_valid():
             serializer.save()
     
-            refresh = RefreshToken.for_user(user)
+            refresh = ProfileRefreshToken.for_user(user)
             return Response({
                 "message": "User profile updated successfully.",
                 "access": str(refresh.access_token),
@@ -129,13 +213,41 @@ class CurrentUserProfileView(APIView):
         serializer = CustomUserSerializer(user)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    # Served instead of get() when settings.ASYNC_READS is on. request.user may only hold the
+    # token's claims, and loading the rest of it lazily is not allowed on the event loop.
+    async def aget(self, request):
+        user = await aget_cached_user(request.user.id)
+        serializer = CustomUserSerializer(user)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
 class AllUsersView(APIView):
+    """
+    All users. With ?export=ndjson or ?export=csv the rows are streamed instead
+    (see Transport_Pool/export.py), optionally narrowed by UserFilter's filters
+    and to the columns in ?fields=.
+    """
     permission_classes = [IsAdminUser]
+    export_fields = [
+        'id', 'email', 'full_name', 'phone_number', 'gender', 'google_authenticated',
+        'is_active', 'is_staff', 'date_joined', 'last_login',
+    ]
+
     def get(self, request):
+        fmt = export_format(request)
+        if fmt is not None:
+            return self.export(request, fmt)
         users = CustomUser.objects.all()
         serializer = CustomUserSerializer(users, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    def export(self, request, fmt):
+        filterset = UserFilter(request.query_params, queryset=CustomUser.objects.order_by('id'))
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        columns = selected_columns(request, self.export_fields)
+        rows = filterset.qs.values(*columns).iterator(chunk_size=CHUNK_SIZE)
+        return export_response(request, rows, columns, fmt, 'users')
+
 class LogoutView(APIView):
     permission_classes = [AllowAny]
 
@@ -145,7 +257,7 @@ class LogoutView(APIView):
             if not refresh_token:
                 return Response({"error": "Refresh token missing."}, status=status.HTTP_400_BAD_REQUEST)
 
-            token = RefreshToken(refresh_token)
+            token = ProfileRefreshToken(refresh_token)
             token.blacklist()
 
             return Response({"message": "Logout successful."}, status=status.HTTP_200_OK)
@@ -0,0 +1,19 @@
+# Picked up automatically by gunicorn when started from this directory (see Dockerfile).
+import os
+import shutil
+
+from prometheus_client import multiprocess
+
+
+def on_starting(server):
+    # Workers append to the metric files in PROMETHEUS_MULTIPROC_DIR; start each deployment
+    # from an empty directory so counters of a previous run are not summed in.
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(worker.pid)
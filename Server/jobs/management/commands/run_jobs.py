@@ -0,0 +1,82 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from prometheus_client import start_http_server
+
+from jobs.queue import claim, release_expired, run
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs (jobs/queue.py) with a pool of worker threads until "
+        "SIGTERM/SIGINT; a job in progress is finished first. Start as many of these "
+        "processes as needed: jobs are claimed with SKIP LOCKED, so they never collide."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Worker threads.')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds an idle worker waits before looking for jobs again.')
+        parser.add_argument('--metrics-port', type=int, default=0,
+                            help='Serve job metrics for Prometheus on this port (0: off).')
+        parser.add_argument('--once', action='store_true',
+                            help='Run the jobs that are ready now in this thread, then exit.')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            release_expired()
+            done = 0
+            while jobs := claim():
+                run(jobs[0])
+                done += 1
+            self.stdout.write(f"Ran {done} jobs.")
+            return
+
+        if options['metrics_port']:
+            start_http_server(options['metrics_port'])
+
+        stop = threading.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: stop.set())
+
+        threads = [
+            threading.Thread(target=self.work, args=(stop, options['poll_interval']), name=f'job-worker-{n}')
+            for n in range(options['workers'])
+        ]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f"Running jobs with {len(threads)} workers.")
+
+        # Meanwhile, hand the jobs of workers that died (here or elsewhere) back to the queue.
+        while not stop.wait(settings.JOB_LEASE_SECONDS / 2):
+            close_old_connections()
+            if released := release_expired():
+                self.stdout.write(f"Released {released} jobs from expired claims.")
+
+        for thread in threads:
+            thread.join()
+        connection.close()
+
+    def work(self, stop, poll_interval):
+        try:
+            while not stop.is_set():
+                close_old_connections()
+                try:
+                    jobs = claim()
+                except Exception as exc:
+                    # The database may be briefly unreachable; keep the worker alive.
+                    self.stderr.write(f"Claiming jobs failed: {exc}")
+                    jobs = []
+                if not jobs:
+                    stop.wait(poll_interval)
+                    continue
+                try:
+                    run(jobs[0])
+                except Exception as exc:
+                    # Recording the result failed; the claim lapses and the job runs again.
+                    self.stderr.write(f"Finishing job {jobs[0].pk} failed: {exc}")
+        finally:
+            connection.close()
@@ -0,0 +1,53 @@
+"""
+Job queue metrics in the Prometheus format.
+
+Queue depth and the age of the oldest ready job are read from the jobs table
+whenever /metrics is scraped (QUEUE_REGISTRY, served next to the request
+metrics). Per-job figures are recorded by the workers, which serve them on
+their own port (run_jobs --metrics-port).
+"""
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+from prometheus_client import CollectorRegistry, Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily
+
+from .models import Job
+
+JOBS = Counter('jobs_total', 'Jobs run, by task and outcome (succeeded, retried, failed, expired).', ['task', 'outcome'])
+LATENCY = Histogram(
+    'job_queue_latency_seconds', 'Time from when a job was due to when a worker claimed it.', ['task'],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900),
+)
+DURATION = Histogram(
+    'job_duration_seconds', 'Time a job ran for.', ['task'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+
+def observe_job(task, outcome, latency, duration):
+    JOBS.labels(task, outcome).inc()
+    LATENCY.labels(task).observe(latency)
+    DURATION.labels(task).observe(duration)
+
+
+class QueueCollector:
+    def collect(self):
+        now = timezone.now()
+        depth = GaugeMetricFamily('job_queue_depth', 'Jobs in the queue, by task and status.', labels=['task', 'status'])
+        oldest = GaugeMetricFamily(
+            'job_queue_oldest_ready_seconds', 'How long the oldest ready job has been waiting, by task.',
+            labels=['task'],
+        )
+        rows = Job.objects.values('task', 'status').annotate(
+            count=Count('id'), due=Min('run_at', filter=Q(status=Job.QUEUED, run_at__lte=now)),
+        ).order_by()
+        for row in rows:
+            depth.add_metric([row['task'], row['status']], row['count'])
+            if row['due'] is not None:
+                oldest.add_metric([row['task']], (now - row['due']).total_seconds())
+        yield depth
+        yield oldest
+
+
+QUEUE_REGISTRY = CollectorRegistry()
+QUEUE_REGISTRY.register(QueueCollector())
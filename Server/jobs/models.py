@@ -0,0 +1,37 @@
+from django.db import models
+from django.utils import timezone
+
+
+# A unit of background work (jobs/queue.py). Jobs are deleted once they succeed, so the
+# table only holds work still to do, in progress, or given up on.
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (FAILED, 'Failed')]
+
+    task = models.CharField(max_length=200)  # dotted path of a function registered with @task
+    payload = models.JSONField(default=dict)  # keyword arguments for the task
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)  # not before; pushed back on every retry
+    created_at = models.DateTimeField(auto_now_add=True)
+    # While RUNNING: when the worker's claim lapses and the job may be picked up again.
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            # The claim query: ready jobs, oldest first
+            models.Index(
+                fields=['run_at', 'id'], name='job_ready_idx', condition=models.Q(status='queued'),
+            ),
+            # Finding claims left behind by a worker that died
+            models.Index(
+                fields=['locked_until'], name='job_running_idx', condition=models.Q(status='running'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} ({self.status}, attempt {self.attempts}/{self.max_attempts})"
@@ -0,0 +1,130 @@
+"""
+A job queue kept in the application database, for side effects that should
+not hold up a request (notification emails and the like). No broker needed.
+
+    @task
+    def notify_creator_of_join(pool_id, user_id): ...
+
+    enqueue(notify_creator_of_join, pool_id=pool.pk, user_id=user.pk)
+
+enqueue() inserts the job in the caller's transaction: workers see it once
+that transaction commits, and it is gone with it if it rolls back.
+
+Workers (manage.py run_jobs) claim ready jobs with SELECT ... FOR UPDATE SKIP
+LOCKED, so any number of them can poll the table without handing out the same
+job twice or waiting on each other (on SQLite, which has no row locks, run a
+single worker). A job that raises is retried with exponential backoff until
+max_attempts, then kept as FAILED with its last error. A claim lapses after
+JOB_LEASE_SECONDS, so the jobs of a worker that died are run again: tasks must
+cope with running more than once.
+"""
+import random
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .metrics import observe_job
+from .models import Job
+
+_tasks = {}
+
+
+def task(func):
+    """Register `func` as a task; jobs refer to it by dotted path."""
+    func.task_name = f'{func.__module__}.{func.__qualname__}'
+    _tasks[func.task_name] = func
+    return func
+
+
+def get_task(name):
+    if name not in _tasks:
+        # Importing the function's module registers it. Paths that do not end up
+        # registered are refused, whatever they import.
+        import_string(name)
+    if name not in _tasks:
+        raise LookupError(f"{name} is not a registered task.")
+    return _tasks[name]
+
+
+def enqueue(func, *, delay=None, max_attempts=None, **payload):
+    """Queue func(**payload); `payload` must be JSON-serialisable (pass ids, not objects)."""
+    return Job.objects.create(
+        task=func.task_name,
+        payload=payload,
+        run_at=timezone.now() + (delay or timedelta()),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+def backoff(attempts):
+    """Seconds before retry number `attempts`: doubling from JOB_RETRY_BASE_SECONDS, capped, jittered."""
+    delay = min(settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.JOB_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def claim(limit=1):
+    """Take up to `limit` ready jobs, oldest first, and mark them RUNNING under a lease."""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.QUEUED, run_at__lte=now)
+            .order_by('run_at', 'id')[:limit]
+        )
+        if not jobs:
+            return []
+        locked_until = now + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+        Job.objects.filter(id__in=[job.id for job in jobs]).update(
+            status=Job.RUNNING, attempts=F('attempts') + 1, locked_until=locked_until
+        )
+    for job in jobs:
+        job.latency = (now - job.run_at).total_seconds()
+        job.status, job.attempts, job.locked_until = Job.RUNNING, job.attempts + 1, locked_until
+    return jobs
+
+
+def run(job):
+    """
+    Run a claimed job: delete it on success, otherwise schedule a retry or mark it FAILED.
+    Returns the outcome; 'expired' when the claim lapsed while the job ran, leaving the row alone.
+    """
+    started = time.monotonic()
+    # Only while this claim holds: once it lapsed, release_expired() may have handed the job
+    # to another worker, whose run must not be deleted or overwritten from here.
+    claimed = Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_until=job.locked_until)
+    try:
+        get_task(job.task)(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            outcome, changes = 'failed', {'status': Job.FAILED}
+        else:
+            retry_at = timezone.now() + timedelta(seconds=backoff(job.attempts))
+            outcome, changes = 'retried', {'status': Job.QUEUED, 'run_at': retry_at}
+        if not claimed.update(locked_until=None, last_error=error, **changes):
+            outcome = 'expired'
+    else:
+        outcome = 'succeeded'
+        deleted, _ = claimed.delete()
+        if not deleted:
+            outcome = 'expired'
+    observe_job(job.task, outcome, getattr(job, 'latency', 0.0), time.monotonic() - started)
+    return outcome
+
+
+def release_expired():
+    """Put jobs whose claim has lapsed back in the queue (or fail them if out of attempts)."""
+    now = timezone.now()
+    expired = Job.objects.filter(status=Job.RUNNING, locked_until__lt=now)
+    message = 'The worker running this job stopped before it finished.'
+    failed = expired.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, locked_until=None, last_error=message
+    )
+    requeued = expired.update(status=Job.QUEUED, run_at=now, locked_until=None, last_error=message)
+    return requeued + failed
@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import claim, enqueue, release_expired, run, task
+from Pool.tests import join, make_pool, make_user
+
+calls = []
+
+
+@task
+def record(value):
+    calls.append(value)
+
+
+@task
+def explode():
+    raise RuntimeError('boom')
+
+
+@override_settings(JOB_RETRY_BASE_SECONDS=10, JOB_RETRY_MAX_SECONDS=60, JOB_LEASE_SECONDS=300)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_jobs_of_rolled_back_transactions_are_dropped(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            enqueue(record, value=1)
+            raise RuntimeError
+
+        self.assertFalse(Job.objects.exists())
+
+    def test_jobs_run_in_order_once_due(self):
+        enqueue(record, value='later', delay=timedelta(minutes=5))
+        enqueue(record, value='first')
+        enqueue(record, value='second')
+
+        while jobs := claim():
+            self.assertEqual(run(jobs[0]), 'succeeded')
+
+        self.assertEqual(calls, ['first', 'second'])
+        self.assertEqual(list(Job.objects.values_list('payload', flat=True)), [{'value': 'later'}])
+
+    def test_failures_back_off_then_fail(self):
+        job = enqueue(explode, max_attempts=2)
+
+        self.assertEqual(run(claim()[0]), 'retried')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertIn('boom', job.last_error)
+        self.assertGreaterEqual(job.run_at, timezone.now() + timedelta(seconds=4))
+        self.assertEqual(claim(), [])
+
+        Job.objects.update(run_at=timezone.now())
+        self.assertEqual(run(claim()[0]), 'failed')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_expired_claims_are_released(self):
+        enqueue(record, value=1)
+        claim()
+        Job.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(release_expired(), 1)
+        run(claim()[0])
+        self.assertEqual(calls, [1])
+
+    def test_a_lapsed_claim_cannot_finish_the_next_run(self):
+        enqueue(explode, max_attempts=5)
+        stale = claim()[0]
+        Job.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        release_expired()
+        current = claim()[0]
+
+        # The first worker finally gives up; the second is still running the job.
+        self.assertEqual(run(stale), 'expired')
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts, job.locked_until), (Job.RUNNING, 2, current.locked_until))
+
+        stale.task, stale.payload = record.task_name, {'value': 1}
+        self.assertEqual(run(stale), 'expired')
+        self.assertTrue(Job.objects.filter(status=Job.RUNNING).exists())
+
+        self.assertEqual(run(current), 'retried')
+        self.assertEqual(Job.objects.get().status, Job.QUEUED)
+
+    def test_joining_notifies_the_creator_off_the_request(self):
+        creator = make_user(0)
+        pool = make_pool(creator)
+
+        self.assertEqual(join(make_user(1), pool).status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+
+        run(claim()[0])
+        self.assertEqual(mail.outbox[0].to, [creator.email])
+        self.assertIn('User 1 joined your pool', mail.outbox[0].subject)